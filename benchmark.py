@@ -0,0 +1,429 @@
+"""
+Git 同步工具性能基准
+生成不同规模的本地仓库（含本地裸仓库作为 origin），测量页面刷新耗时、
+每次刷新启动的进程数以及峰值内存，另外测量 import sync 的耗时与加载的模块数，
+结果写入 JSON 便于发现性能回退；每个场景在独立的解释器中运行，峰值内存互不影响
+
+用法:
+    python benchmark.py                          # 快速档: 1k 文件 / 10 分支
+    python benchmark.py --preset full            # 完整矩阵: 1k/10k/100k 文件 × 10/1k/10k 分支
+    python benchmark.py --files 10000 --branches 1000 --output results.json
+    python benchmark.py --compare baseline.json  # 与基线对比，出现回退时返回非零退出码
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource     # 仅 Unix；Windows 上改用 psutil（如已安装）或不记录峰值内存
+except ImportError:
+    resource = None
+
+PRESETS = {
+    "quick": {"files": [1000], "branches": [10]},
+    "full": {"files": [1000, 10000, 100000], "branches": [10, 1000, 10000]},
+}
+
+APP_FILE = Path(__file__).resolve().parent / "sync.py"
+
+# 页面刷新时需要测量的 GitOperations 方法
+METHODS = [
+    "is_git_repo",
+    "get_current_branch",
+    "get_remote_url",
+    "get_snapshot",
+    "get_local_branches",
+    "get_remote_branches",
+]
+
+
+# ==================== 进程计数 ====================
+
+class SpawnCounter:
+    """统计 subprocess.Popen 的调用次数（asyncio 子进程同样经过 Popen）"""
+
+    def __init__(self):
+        self.count = 0
+
+    @contextlib.contextmanager
+    def patch(self):
+        original = subprocess.Popen.__init__
+        counter = self
+
+        def counting_init(self, *args, **kwargs):
+            counter.count += 1
+            return original(self, *args, **kwargs)
+
+        subprocess.Popen.__init__ = counting_init
+        try:
+            yield self
+        finally:
+            subprocess.Popen.__init__ = original
+
+    def reset(self):
+        self.count = 0
+
+
+def peak_rss_kb():
+    """
+    本进程与已结束子进程的峰值常驻内存（KB），无法获取的项为 None
+    ru_maxrss 是整个进程的历史峰值，因此每个场景单独启动一个进程（见 run_scenario_isolated）
+    """
+    if resource is not None:
+        scale = 1024 if sys.platform == "darwin" else 1  # macOS 返回字节
+        return {
+            "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+            "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale,
+        }
+    try:
+        import psutil
+    except ImportError:
+        return {"self": None, "children": None}
+    info = psutil.Process().memory_info()
+    # Windows 提供峰值工作集；其他平台只有当前常驻内存
+    return {"self": getattr(info, "peak_wset", info.rss) // 1024, "children": None}
+
+
+# ==================== 导入耗时 ====================
+
+IMPORT_PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import sync\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(elapsed, len(sys.modules), int('streamlit' in sys.modules))\n"
+)
+
+
+def bench_import(repeat):
+    """
+    在新解释器中测量 import sync：耗时取最小值，并记录加载的模块数、是否导入了 Streamlit
+    先预编译字节码，避免首次编译的耗时混入结果
+    """
+    root = APP_FILE.parent
+    subprocess.run([sys.executable, "-m", "compileall", "-q", str(root)], capture_output=True)
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=root,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "导入失败"}
+        elapsed, modules, streamlit = result.stdout.split()
+        samples.append((float(elapsed), int(modules), bool(int(streamlit))))
+    return {
+        "wall_s": min(s[0] for s in samples),
+        "modules": samples[-1][1],
+        "streamlit": samples[-1][2],
+    }
+
+
+# ==================== 仓库生成 ====================
+
+def _git(args, cwd, stdin=None):
+    subprocess.run(["git", *args], cwd=cwd, input=stdin, check=True,
+                   capture_output=True, text=True)
+
+
+def generate_repo(root, files, branches):
+    """
+    在 root 下生成 origin.git（裸仓库）与 work（工作区）
+    work 中包含 files 个文件、branches 个本地分支，origin 中有同样数量的远程分支
+    """
+    root = Path(root)
+    origin = root / "origin.git"
+    work = root / "work"
+    _git(["init", "-q", "--bare", "-b", "main", str(origin)], cwd=root)
+    _git(["init", "-q", "-b", "main", str(work)], cwd=root)
+    _git(["config", "user.email", "bench@example.com"], cwd=work)
+    _git(["config", "user.name", "bench"], cwd=work)
+
+    # 每个目录 1000 个文件
+    for i in range(files):
+        directory = work / f"dir{i // 1000:03d}"
+        if i % 1000 == 0:
+            directory.mkdir()
+        (directory / f"file{i:06d}.txt").write_text(f"{i}\n")
+    _git(["add", "-A"], cwd=work)
+    _git(["commit", "-q", "-m", "initial"], cwd=work)
+    _git(["remote", "add", "origin", str(origin)], cwd=work)
+    _git(["push", "-q", "-u", "origin", "main"], cwd=work)
+
+    head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=work, check=True,
+                          capture_output=True, text=True).stdout.strip()
+    local_refs = "".join(f"create refs/heads/branch{i:05d} {head}\n" for i in range(branches))
+    _git(["update-ref", "--stdin"], cwd=work, stdin=local_refs)
+    remote_refs = "".join(f"create refs/heads/remote{i:05d} {head}\n" for i in range(branches))
+    _git(["update-ref", "--stdin"], cwd=origin, stdin=remote_refs)
+    _git(["fetch", "-q", "origin"], cwd=work)
+    _git(["pack-refs", "--all"], cwd=work)
+
+    # 少量未提交改动，使状态列表非空
+    for i in range(min(files, 20)):
+        with open(work / "dir000" / f"file{i:06d}.txt", "a") as f:
+            f.write("changed\n")
+    return work
+
+
+# ==================== 测量 ====================
+
+def _timed(func, counter):
+    counter.reset()
+    start = time.perf_counter()
+    func()
+    return {"wall_s": time.perf_counter() - start, "spawns": counter.count}
+
+
+def bench_methods(work, counter, repeat):
+    """直接调用 GitOperations 的读取方法（每次使用新实例，与页面刷新一致），并对比读取阶段的串行/并发耗时"""
+    from sync_core import AsyncGitOperations, GitOperations
+
+    results = {}
+    for name in METHODS:
+        try:
+            samples = [_timed(lambda: getattr(GitOperations(work), name)(), counter) for _ in range(repeat)]
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        results[name] = {
+            "wall_s": min(s["wall_s"] for s in samples),
+            "spawns": samples[-1]["spawns"],
+        }
+
+    # 页面读取阶段（状态快照 + 远程地址）：逐条执行、强制并发执行，以及 prefetch 的实际选择
+    def serial():
+        git_ops = GitOperations(work)
+        git_ops.get_snapshot(refresh=True)
+        git_ops.get_remote_url()
+
+    def concurrent():
+        import asyncio
+        aio = AsyncGitOperations(GitOperations(work))
+        asyncio.run(aio.gather(aio.get_snapshot(refresh=True), aio.get_remote_url()))
+
+    # 暂存前大文件检查：没有大小索引（首次）与索引已建立（文件未变化时只需 stat）
+    def staging_scan_cold():
+        git_ops = GitOperations(work)
+        GitOperations._size_indexes.clear()
+        (git_ops.tool_dir() / "size-index.json").unlink(missing_ok=True)
+        git_ops.scan_staging_candidates()
+
+    phases = {
+        "read_phase_serial": serial,
+        "read_phase_async": concurrent,
+        "read_phase_prefetch": lambda: AsyncGitOperations(GitOperations(work)).prefetch(refresh=True),
+        "staging_scan_cold": staging_scan_cold,
+        "staging_scan_warm": lambda: GitOperations(work).scan_staging_candidates(),
+    }
+    for name, func in phases.items():
+        samples = [_timed(func, counter) for _ in range(repeat)]
+        results[name] = {
+            "wall_s": min(s["wall_s"] for s in samples),
+            "spawns": samples[-1]["spawns"],
+        }
+    return results
+
+
+def bench_reruns(work, counter, repeat):
+    """通过 Streamlit AppTest 无界面运行 main()，测量首次与后续刷新"""
+    from streamlit.testing.v1 import AppTest
+
+    previous_cwd = os.getcwd()
+    os.chdir(work)
+    try:
+        app = AppTest.from_file(str(APP_FILE), default_timeout=600)
+        # 关闭后台获取，避免网络操作混入计数
+        app.session_state["auto_fetch_enabled"] = False
+        first = _timed(app.run, counter)
+        if app.exception:
+            return {"error": f"页面运行异常: {[e.value for e in app.exception]}"}
+        samples = [_timed(app.run, counter) for _ in range(repeat)]
+    finally:
+        os.chdir(previous_cwd)
+    return {
+        "first": first,
+        "rerun": {
+            "wall_s": min(s["wall_s"] for s in samples),
+            "wall_s_max": max(s["wall_s"] for s in samples),
+            "spawns": samples[-1]["spawns"],
+        },
+    }
+
+
+def run_scenario(files, branches, repeat, keep):
+    counter = SpawnCounter()
+    tmp = tempfile.mkdtemp(prefix=f"sync-bench-{files}f-{branches}b-")
+    print(f"[生成] {files} 文件 / {branches} 分支 → {tmp}", flush=True)
+    start = time.perf_counter()
+    work = generate_repo(tmp, files, branches)
+    setup_s = time.perf_counter() - start
+
+    with counter.patch():
+        methods = bench_methods(str(work), counter, repeat)
+        reruns = bench_reruns(str(work), counter, repeat)
+
+    if not keep:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "name": f"{files}f-{branches}b",
+        "files": files,
+        "branches": branches,
+        "setup_s": setup_s,
+        "methods": methods,
+        "reruns": reruns,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def run_scenario_isolated(files, branches, repeat, keep):
+    """在新解释器中运行一个场景（benchmark.py --scenario），结果经临时 JSON 文件传回"""
+    fd, path = tempfile.mkstemp(prefix="sync-bench-", suffix=".json")
+    os.close(fd)
+    try:
+        args = [sys.executable, str(Path(__file__).resolve()), "--scenario", str(files), str(branches),
+                "--repeat", str(repeat), "--output", path]
+        if keep:
+            args.append("--keep")
+        result = subprocess.run(args)
+        if result.returncode != 0:
+            return {"name": f"{files}f-{branches}b", "files": files, "branches": branches,
+                    "error": f"场景进程退出码 {result.returncode}"}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.unlink(path)
+
+
+# ==================== 对比 ====================
+
+def compare(current, baseline, tolerance):
+    """与基线对比：耗时超过 (1 + tolerance) 倍、进程数或导入的模块数增加视为回退"""
+    regressions = []
+    now, before = current.get("import"), baseline.get("import")
+    if now and before and "error" not in before:
+        if "error" in now:
+            regressions.append("import sync: 导入失败")
+        else:
+            if now["streamlit"] and not before["streamlit"]:
+                regressions.append("import sync: 导入了 Streamlit")
+            if now["modules"] > before["modules"]:
+                regressions.append(f"import sync: 模块数 {before['modules']} → {now['modules']}")
+            if now["wall_s"] > before["wall_s"] * (1 + tolerance) and now["wall_s"] - before["wall_s"] > 0.005:
+                regressions.append(
+                    f"import sync: 耗时 {before['wall_s'] * 1000:.1f} ms → {now['wall_s'] * 1000:.1f} ms"
+                )
+
+    base_by_name = {s["name"]: s for s in baseline["scenarios"]}
+    for scenario in current["scenarios"]:
+        base = base_by_name.get(scenario["name"])
+        if not base or "error" in base:
+            continue
+        if "error" in scenario:
+            regressions.append(f"{scenario['name']}: 运行失败")
+            continue
+        pairs = [("rerun", scenario["reruns"].get("rerun"), base["reruns"].get("rerun"))]
+        pairs += [(f"method:{name}", scenario["methods"][name], base["methods"].get(name))
+                  for name in scenario["methods"]]
+        for label, now, before in pairs:
+            if now is None or "error" in now:
+                if before is not None and "error" not in before:
+                    regressions.append(f"{scenario['name']} {label}: 运行失败")
+                continue
+            if before is None or "error" in before:
+                continue
+            if now["spawns"] > before["spawns"]:
+                regressions.append(f"{scenario['name']} {label}: 进程数 {before['spawns']} → {now['spawns']}")
+            if now["wall_s"] > before["wall_s"] * (1 + tolerance) and now["wall_s"] - before["wall_s"] > 0.005:
+                regressions.append(
+                    f"{scenario['name']} {label}: 耗时 {before['wall_s'] * 1000:.1f} ms → {now['wall_s'] * 1000:.1f} ms"
+                )
+    return regressions
+
+
+def print_summary(results):
+    print()
+    imp = results.get("import")
+    if imp:
+        if "error" in imp:
+            print(f"import sync: 失败: {imp['error']}")
+        else:
+            print(f"import sync: {imp['wall_s'] * 1000:.1f}ms  模块 {imp['modules']}"
+                  f"  Streamlit {'已加载' if imp['streamlit'] else '未加载'}")
+        print()
+    print(f"{'场景':<16}{'首次刷新':>12}{'后续刷新':>12}{'进程/次':>10}{'峰值内存':>12}")
+    for s in results["scenarios"]:
+        if "error" in s:
+            print(f"{s['name']:<16}{s['error']}")
+            continue
+        if "error" in s["reruns"]:
+            print(f"{s['name']:<16}{s['reruns']['error']}")
+        else:
+            first, rerun = s["reruns"]["first"], s["reruns"]["rerun"]
+            rss = s["peak_rss_kb"]["self"]
+            print(f"{s['name']:<16}{first['wall_s'] * 1000:>10.1f}ms{rerun['wall_s'] * 1000:>10.1f}ms"
+                  f"{rerun['spawns']:>10}" + (f"{rss / 1024:>10.1f}MB" if rss is not None else f"{'-':>12}"))
+        for name, m in s["methods"].items():
+            if "error" in m:
+                print(f"    {name:<24}失败: {m['error']}")
+            else:
+                print(f"    {name:<24}{m['wall_s'] * 1000:>8.2f}ms  进程 {m['spawns']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Git 同步工具性能基准")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--files", type=int, nargs="+", help="覆盖预设的文件数列表")
+    parser.add_argument("--branches", type=int, nargs="+", help="覆盖预设的分支数列表")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测量重复次数")
+    parser.add_argument("--output", default="bench_results.json", help="结果 JSON 路径")
+    parser.add_argument("--compare", help="基线结果 JSON，出现回退时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的耗时增长比例")
+    parser.add_argument("--keep", action="store_true", help="保留生成的临时仓库")
+    # 内部使用：只运行一个场景并把结果写入 --output（由 run_scenario_isolated 调用）
+    parser.add_argument("--scenario", type=int, nargs=2, metavar=("FILES", "BRANCHES"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run_scenario(*args.scenario, args.repeat, args.keep), f, ensure_ascii=False)
+        return 0
+
+    files = args.files or PRESETS[args.preset]["files"]
+    branches = args.branches or PRESETS[args.preset]["branches"]
+    git_version = subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "git": git_version,
+        "import": bench_import(args.repeat),
+        "scenarios": [run_scenario_isolated(f, b, args.repeat, args.keep) for f in files for b in branches],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print_summary(results)
+    print(f"\n结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n⚠️ 发现性能回退:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n✅ 未发现性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+Git 同步工具 - 命令行模式
+不启动 Streamlit，适合脚本与定时任务；结果以文本或 JSON（--json）输出
+
+用法:
+    python sync.py status [--json]
+    python sync.py pull [--json]
+    python sync.py push [--location Home] [--all-branches] [--large-files skip|lfs|include] [--max-size 50] [--json]
+    python sync.py branches [--remote] [--search 关键字] [--limit 50] [--json]
+    python sync.py clone <url> [目录] [--strategy blobless|shallow|full] [--depth 1] [--branch 分支]
+    python sync.py watch [--location Home] [--quiet-period 120] [--min-interval 600] [--max-wait 1800]
+
+退出码: 0 成功，1 操作失败，2 参数错误，130 按 Ctrl+C 取消（正在执行的 git 进程会被结束）
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from sync_core import DEFAULT_LARGE_FILE_LIMIT, AutoSyncer, GitOperations, TreeWatcher
+
+
+class Reporter:
+    """输出 Git 进度与结果：文本模式下进度写到 stderr，JSON 模式下 stdout 只输出一个 JSON 对象"""
+
+    def __init__(self, as_json=False, quiet=False):
+        self.as_json = as_json
+        self.quiet = quiet or as_json
+        self.interactive = sys.stderr.isatty()
+
+    def on_output(self, msg_type, line):
+        if not self.quiet:
+            self._clear_progress()
+            print(line, file=sys.stderr)
+
+    def on_progress(self, progress):
+        if not self.quiet and self.interactive:
+            sys.stderr.write(f"\r\033[K{progress.describe()}")
+            sys.stderr.flush()
+
+    def _clear_progress(self):
+        if self.interactive:
+            sys.stderr.write("\r\033[K")
+
+    def done(self, ok, data, text):
+        """输出结果并返回退出码"""
+        if self.as_json:
+            print(json.dumps({"ok": bool(ok), **data}, ensure_ascii=False, indent=2))
+        else:
+            if not self.quiet:
+                self._clear_progress()
+            if text:
+                print(text)
+        return 0 if ok else 1
+
+
+def _console_tail(git_ops, lines=20):
+    """最近的命令输出（JSON 结果中附带，便于排查失败原因）"""
+    return [line for _, line in git_ops.console_output][-lines:]
+
+
+def _failure(git_ops):
+    """网络操作的失败原因（超时 / 认证 / 冲突 / 网络 / 取消），成功时为 None"""
+    failure = git_ops.last_failure
+    if failure is None:
+        return None
+    return {"kind": failure.kind, "message": failure.message, "attempts": failure.attempts}
+
+
+def _failure_text(git_ops, text):
+    """在失败提示后附上失败类别与最相关的一行输出"""
+    failure = git_ops.last_failure
+    if failure is None:
+        return text
+    text += f"（{failure.label}"
+    if failure.attempts > 1:
+        text += f"，已重试 {failure.attempts - 1} 次"
+    text += "）"
+    return f"{text}\n    {failure.message}" if failure.message else text
+
+
+def cmd_status(git_ops, args, reporter):
+    snapshot = git_ops.get_snapshot()
+    if not snapshot.valid:
+        return reporter.done(False, {"error": "无法读取仓库状态"}, "❌ 无法读取仓库状态")
+    manifests = git_ops.get_config_files_status()
+    data = {
+        "repo": str(git_ops.repo_path),
+        "branch": snapshot.branch,
+        "upstream": snapshot.upstream,
+        "ahead": snapshot.ahead,
+        "behind": snapshot.behind,
+        "changes": [{"status": e.xy, "path": e.path, "orig_path": e.orig_path} for e in snapshot.entries],
+        "changed_manifests": manifests,
+    }
+    lines = [
+        f"分支: {snapshot.branch or '(分离头指针)'}"
+        + (f" → {snapshot.upstream}  领先 {snapshot.ahead} / 落后 {snapshot.behind}" if snapshot.upstream else "  (未设置上游)"),
+        f"未提交文件: {len(snapshot.entries)}",
+    ]
+    lines += [f"  {line}" for line in snapshot.status_lines()]
+    if manifests:
+        lines.append("⚠️ 依赖配置已变更: " + ", ".join(manifests))
+    return reporter.done(True, data, "\n".join(lines))
+
+
+def cmd_pull(git_ops, args, reporter):
+    ok = git_ops.pull(on_output=reporter.on_output, on_progress=reporter.on_progress)
+    manifests = [{"path": c.path, "commits": [{"sha": sha, "subject": subject} for sha, subject in c.commits]}
+                 for c in git_ops.pulled_manifests]
+    lines = ["✅ 拉取成功" if ok else _failure_text(git_ops, "❌ 拉取失败，请检查网络连接或手动解决冲突")]
+    for change in git_ops.pulled_manifests:
+        lines.append(f"⚠️ 依赖配置已变更: {change.path}")
+        lines += [f"    {sha} {subject}" for sha, subject in change.commits]
+    data = {"changed_manifests": manifests, "failure": _failure(git_ops), "output": _console_tail(git_ops)}
+    return reporter.done(ok, data, "\n".join(lines))
+
+
+_FLAG_ACTIONS = {"skip": "已跳过", "lfs": "改用 Git LFS", "include": "仍然提交"}
+
+
+def _flagged_files(scan, skip, lfs):
+    """暂存前检查命中的文件及其处理方式"""
+    skip, lfs = set(skip), set(lfs)
+    return [{
+        "path": hit.path,
+        "size": hit.size,
+        "pattern": hit.pattern,
+        "binary": hit.binary,
+        "action": "skip" if hit.path in skip else "lfs" if hit.path in lfs else "include",
+    } for hit in scan.hits]
+
+
+def _flag_reason(item):
+    if item["size"] is None:
+        size = "目录"
+    elif item["size"] >= 1024 * 1024:
+        size = f"{item['size'] / 1024 / 1024:.1f} MB"
+    else:
+        size = f"{item['size'] / 1024:.1f} KB"
+    return f"{size}，匹配 {item['pattern']}" if item["pattern"] else size
+
+
+def cmd_push(git_ops, args, reporter):
+    if args.all_branches:
+        branches, diverged = git_ops.get_ahead_branches()
+        if not branches:
+            return reporter.done(True, {"results": [], "diverged": [b.name for b in diverged]}, "没有需要推送的分支")
+        results = git_ops.push_ahead_branches(branches, on_output=reporter.on_output, on_progress=reporter.on_progress)
+        ok = bool(results) and all(r.ok for r in results)
+        lines = [f"{'✅' if r.ok else '❌'} {r.remote}/{r.branch}: {r.summary}" for r in results]
+        lines += [f"⏭️ {b.name}: 已分叉，需先拉取合并" for b in diverged]
+        data = {
+            "results": [{"branch": r.branch, "remote": r.remote, "ok": r.ok, "summary": r.summary} for r in results],
+            "diverged": [b.name for b in diverged],
+            "failure": _failure(git_ops),
+        }
+        return reporter.done(ok, data, "\n".join(lines))
+
+    if git_ops.check_remote_has_updates():
+        return reporter.done(False, {"error": "remote_has_updates"}, "⚠️ 远程有新内容，请先执行 pull")
+
+    committed = False
+    flagged = []
+    if git_ops.has_uncommitted_changes():
+        message = args.message or f"Sync from {args.location} - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+        scan = git_ops.scan_staging_candidates(max_size=int(args.max_size * 1024 * 1024))
+        skip, lfs = scan.plan(args.large_files)
+        if lfs and not git_ops.lfs_available():
+            return reporter.done(False, {"error": "lfs_unavailable"}, "❌ 未安装 Git LFS，无法使用 --large-files lfs")
+        flagged = _flagged_files(scan, skip, lfs)
+        if flagged and not reporter.quiet:
+            for item in flagged:
+                print(f"⚠️ {_FLAG_ACTIONS[item['action']]}: {item['path']} ({_flag_reason(item)})", file=sys.stderr)
+        if not git_ops.stage_scanned(scan, skip=skip, lfs=lfs):
+            return reporter.done(False, {"error": "add_failed", "output": _console_tail(git_ops)}, "❌ 添加文件失败")
+        committed = bool(git_ops.commit(message))
+    elif git_ops.get_snapshot().ahead == 0 and git_ops.get_snapshot().has_upstream:
+        return reporter.done(True, {"committed": False, "pushed": False}, "没有需要提交的更改，所有内容已是最新")
+
+    ok = git_ops.push(on_output=reporter.on_output, on_progress=reporter.on_progress)
+    text = "✅ 推送成功" if ok else _failure_text(git_ops, "❌ 推送失败，请检查网络连接、仓库权限或是否有冲突")
+    data = {"committed": committed, "pushed": bool(ok), "flagged": flagged, "failure": _failure(git_ops),
+            "output": _console_tail(git_ops)}
+    return reporter.done(ok, data, text)
+
+
+def cmd_branches(git_ops, args, reporter):
+    index = git_ops.get_branch_index()
+    remote = args.remote_name if args.remote else None
+    items, total = index.search(args.search or "", remote=remote, page_size=args.limit)
+    data = {
+        "total": total,
+        "branches": [{
+            "name": name,
+            "current": branch.current,
+            "upstream": branch.upstream or None,
+            "ahead": branch.ahead,
+            "behind": branch.behind,
+            "commit_time": branch.commit_time,
+        } for name, branch in items],
+    }
+    lines = []
+    for name, branch in items:
+        track = f"  ↑{branch.ahead} ↓{branch.behind}" if branch.ahead or branch.behind else ""
+        lines.append(f"{'*' if branch.current else ' '} {name}{track}")
+    if total > len(items):
+        lines.append(f"… 共 {total} 个分支，使用 --limit 或 --search 查看更多")
+    return reporter.done(True, data, "\n".join(lines))
+
+
+def cmd_clone(git_ops, args, reporter):
+    target = args.directory or args.url.rstrip('/').rsplit('/', 1)[-1].rsplit(':', 1)[-1]
+    if target.endswith('.git'):
+        target = target[:-len('.git')]
+    ok = git_ops.clone(args.url, target, args.strategy, args.depth, args.branch,
+                       on_output=reporter.on_output, on_progress=reporter.on_progress)
+    path = git_ops.repo_path / target
+    text = f"✅ 已克隆到 {path}" if ok else _failure_text(git_ops, "❌ 克隆失败")
+    return reporter.done(ok, {"path": str(path), "failure": _failure(git_ops), "output": _console_tail(git_ops)}, text)
+
+
+def cmd_watch(git_ops, args, reporter):
+    """前台运行自动同步，Ctrl+C 退出（已生成的提交保留在本地）"""
+    def on_event(text):
+        if not reporter.as_json:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {text}", flush=True)
+
+    watcher = TreeWatcher(git_ops.repo_path)
+    watcher.start()
+    syncer = AutoSyncer(git_ops.repo_path, watcher=watcher, location=args.location,
+                        quiet_period=args.quiet_period, min_interval=args.min_interval,
+                        max_wait=args.max_wait, on_event=on_event)
+    on_event(f"自动同步已启动: 安静 {args.quiet_period} 秒后提交，至少间隔 {args.min_interval} 秒")
+    try:
+        while True:
+            time.sleep(syncer.step())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    data = {
+        "commits": syncer.commits,
+        "last_push_time": syncer.last_push_time,
+        "pending_push": syncer.next_push_time is not None,
+    }
+    return reporter.done(True, data, f"已停止，本次自动提交 {syncer.commits} 次")
+
+
+COMMANDS = {
+    "status": cmd_status,
+    "pull": cmd_pull,
+    "push": cmd_push,
+    "branches": cmd_branches,
+    "clone": cmd_clone,
+    "watch": cmd_watch,
+}
+
+
+def _common_options(in_subcommand=False):
+    """公共选项，既可写在子命令前也可写在子命令后（子命令中不设默认值，避免覆盖前面给出的值）"""
+    def default(value):
+        return argparse.SUPPRESS if in_subcommand else value
+
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("-C", dest="repo", default=default("."), help="仓库目录（默认当前目录）")
+    parser.add_argument("--json", action="store_true", default=default(False), help="以 JSON 输出结果")
+    parser.add_argument("-q", "--quiet", action="store_true", default=default(False), help="不输出 Git 过程信息")
+    return parser
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sync.py", description="Git 同步工具（命令行模式）",
+                                     parents=[_common_options()])
+    sub = parser.add_subparsers(dest="command", required=True)
+    common = _common_options(in_subcommand=True)
+
+    sub.add_parser("status", parents=[common], help="显示分支、领先/落后与未提交的文件")
+    sub.add_parser("pull", parents=[common], help="拉取远程更新并合并")
+
+    push = sub.add_parser("push", parents=[common], help="提交所有更改并推送")
+    push.add_argument("--location", default=os.environ.get("SYNC_LOCATION", "Office"), help="提交信息中的位置标记")
+    push.add_argument("-m", "--message", help="自定义提交信息")
+    push.add_argument("--all-branches", action="store_true", help="以一次原子推送推送所有领先的分支")
+    push.add_argument("--large-files", choices=["skip", "lfs", "include"], default="skip",
+                      help="大文件与构建产物的处理方式：跳过（默认）、大文件改用 Git LFS、仍然提交")
+    push.add_argument("--max-size", type=float, default=DEFAULT_LARGE_FILE_LIMIT / 1024 / 1024,
+                      help="超过此大小（MB）的文件视为大文件")
+
+    branches = sub.add_parser("branches", parents=[common], help="列出分支（默认按最近提交排序）")
+    branches.add_argument("--remote", action="store_true", help="列出远程分支")
+    branches.add_argument("--remote-name", default="origin", help="远程名称")
+    branches.add_argument("--search", help="名称前缀或关键字")
+    branches.add_argument("--limit", type=int, default=50, help="最多显示的分支数")
+
+    clone = sub.add_parser("clone", parents=[common], help="克隆远程仓库（默认部分克隆）")
+    clone.add_argument("url")
+    clone.add_argument("directory", nargs="?")
+    clone.add_argument("--strategy", choices=["blobless", "shallow", "full"], default="blobless")
+    clone.add_argument("--depth", type=int, default=1, help="浅克隆的提交深度")
+    clone.add_argument("--branch", help="要检出的分支")
+
+    watch = sub.add_parser("watch", parents=[common], help="监听工作区，自动提交 WIP 并在后台推送")
+    watch.add_argument("--location", default=os.environ.get("SYNC_LOCATION", "Office"), help="提交信息中的位置标记")
+    watch.add_argument("--quiet-period", type=int, default=120, help="最后一次修改后等待的秒数")
+    watch.add_argument("--min-interval", type=int, default=600, help="两次自动提交的最小间隔（秒）")
+    watch.add_argument("--max-wait", type=int, default=1800, help="持续修改时最多等待的秒数")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    git_ops = GitOperations(args.repo)
+    reporter = Reporter(as_json=args.json, quiet=args.quiet)
+    if args.command != "clone" and not git_ops.is_git_repo():
+        return reporter.done(False, {"error": "not_a_git_repo"}, f"❌ {git_ops.repo_path} 不是 Git 仓库")
+    try:
+        return COMMANDS[args.command](git_ops, args, reporter)
+    except KeyboardInterrupt:
+        print("\n⏹️ 已取消", file=sys.stderr)
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
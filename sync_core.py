@@ -0,0 +1,3658 @@
+"""
+Git 同步工具 - Git 操作层
+只依赖标准库，可被页面、命令行和脚本共同导入
+只在部分功能中用到的模块（asyncio、ctypes、hashlib、concurrent.futures）在使用时才导入，使命令行模式启动更快
+"""
+
+import os
+import subprocess
+import bisect
+import html
+import json
+import math
+import queue
+import random
+import re
+import select
+import shlex
+import shutil
+import signal
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from stat import S_ISREG
+
+
+# ==================== 仓库状态快照 ====================
+
+@dataclass
+class StatusEntry:
+    """工作区中的一个变更条目"""
+    xy: str                 # 两位状态码，与 porcelain v1 一致（未变更位为空格）
+    path: str
+    orig_path: str = None   # 重命名/复制前的路径
+
+    def to_porcelain(self):
+        """转换为 git status --porcelain 的单行格式"""
+        if self.orig_path:
+            return f"{self.xy} {self.orig_path} -> {self.path}"
+        return f"{self.xy} {self.path}"
+
+
+@dataclass
+class RepoSnapshot:
+    """
+    仓库状态快照 - 每次页面刷新只构建一次
+    对应命令: git status --porcelain=v2 --branch -z
+    """
+    valid: bool = False
+    branch: str = ""        # 分离头指针时为空字符串，与 git branch --show-current 一致
+    oid: str = None
+    upstream: str = None
+    ahead: int = 0
+    behind: int = 0
+    entries: list = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, raw):
+        """解析 porcelain v2 (-z) 输出"""
+        snapshot = cls(valid=True)
+        fields = raw.split('\0')
+        i = 0
+        while i < len(fields):
+            record = fields[i]
+            i += 1
+            if not record:
+                continue
+
+            if record.startswith('# '):
+                key, _, value = record[2:].partition(' ')
+                if key == 'branch.oid':
+                    snapshot.oid = None if value == '(initial)' else value
+                elif key == 'branch.head':
+                    snapshot.branch = '' if value == '(detached)' else value
+                elif key == 'branch.upstream':
+                    snapshot.upstream = value
+                elif key == 'branch.ab':
+                    ahead, _, behind = value.partition(' ')
+                    snapshot.ahead = int(ahead.lstrip('+'))
+                    snapshot.behind = int(behind.lstrip('-'))
+                continue
+
+            kind = record[0]
+            if kind == '1':
+                parts = record.split(' ', 8)
+                snapshot.entries.append(StatusEntry(parts[1].replace('.', ' '), parts[8]))
+            elif kind == '2':
+                # 重命名/复制条目后紧跟原路径字段
+                parts = record.split(' ', 9)
+                orig_path = fields[i] if i < len(fields) else None
+                i += 1
+                snapshot.entries.append(StatusEntry(parts[1].replace('.', ' '), parts[9], orig_path))
+            elif kind == 'u':
+                parts = record.split(' ', 10)
+                snapshot.entries.append(StatusEntry(parts[1], parts[10]))
+            elif kind == '?':
+                snapshot.entries.append(StatusEntry('??', record[2:]))
+
+        return snapshot
+
+    @property
+    def has_upstream(self):
+        return self.upstream is not None
+
+    def status_lines(self):
+        """以 git status --porcelain 的格式返回变更列表"""
+        return [entry.to_porcelain() for entry in self.entries]
+
+
+@dataclass
+class TrackedBranch:
+    """设置了上游的本地分支及其领先/落后提交数"""
+    name: str
+    remote: str             # 上游所在远程，如 origin
+    merge_ref: str          # 上游在远程上的引用，如 refs/heads/main
+    ahead: int = 0
+    behind: int = 0
+    gone: bool = False      # 上游分支已在远程删除
+
+    @classmethod
+    def parse_track(cls, track):
+        """解析 %(upstream:track,nobracket)，如 "ahead 2, behind 1" / "gone" → (ahead, behind, gone)"""
+        if track == 'gone':
+            return 0, 0, True
+        counts = {'ahead': 0, 'behind': 0}
+        for part in track.split(','):
+            key, _, value = part.strip().partition(' ')
+            if key in counts and value.isdigit():
+                counts[key] = int(value)
+        return counts['ahead'], counts['behind'], False
+
+
+@dataclass
+class PushRefResult:
+    """git push --porcelain 中一个引用的推送结果"""
+    branch: str
+    remote: str
+    ok: bool
+    flag: str               # 空格=快进 *=新建 +=强制 ==已是最新 !=拒绝
+    summary: str
+
+    @classmethod
+    def parse_porcelain(cls, remote, output):
+        """解析 git push --porcelain 的标准输出: <flag>\t<from>:<to>\t<summary>"""
+        results = []
+        for line in output.splitlines():
+            parts = line.split('\t')
+            if len(parts) < 3 or len(parts[0]) != 1:
+                continue
+            flag, refspec, summary = parts[0], parts[1], parts[2]
+            source = refspec.split(':', 1)[0]
+            branch = source[len('refs/heads/'):] if source.startswith('refs/heads/') else source
+            results.append(cls(branch, remote, flag != '!', flag, summary))
+        return results
+
+
+@dataclass
+class BranchInfo:
+    """分支索引中的一个分支"""
+    name: str               # 短名称：本地为 main，远程为 origin/main
+    is_remote: bool
+    current: bool = False
+    upstream: str = ""      # 上游短名称，如 origin/main
+    remote: str = ""        # 本地分支为上游所在远程，远程分支为所属远程
+    merge_ref: str = ""     # 上游在远程上的引用，如 refs/heads/main
+    ahead: int = 0
+    behind: int = 0
+    gone: bool = False
+    commit_time: int = 0    # 最后一次提交的时间（Unix 时间戳）
+
+
+class BranchIndex:
+    """
+    分支索引 - 一次 git for-each-ref 得到所有本地/远程分支及跟踪信息，按名称查找
+    对应命令: git for-each-ref --format=... refs/heads refs/remotes
+    """
+
+    FORMAT = ("%(refname)%00%(HEAD)%00%(upstream:short)%00%(upstream:remotename)%00%(upstream:remoteref)"
+              "%00%(upstream:track,nobracket)%00%(committerdate:unix)")
+
+    def __init__(self, branches=()):
+        self.local = {}     # name -> BranchInfo
+        self.remote = {}    # remote/name -> BranchInfo
+        self._views = {}    # 搜索用的排序视图，首次搜索时构建（索引被缓存，每次引用变化只构建一次）
+        for branch in branches:
+            (self.remote if branch.is_remote else self.local)[branch.name] = branch
+
+    @classmethod
+    def parse(cls, raw):
+        """解析 FORMAT 的输出（字段以 NUL 分隔，每个引用一行）"""
+        branches = []
+        for line in raw.splitlines():
+            fields = line.split('\0')
+            if len(fields) < 7:
+                continue
+            refname, head, upstream, remote, merge_ref, track, date = fields[:7]
+            if refname.startswith('refs/heads/'):
+                name, is_remote = refname[len('refs/heads/'):], False
+            elif refname.startswith('refs/remotes/'):
+                name, is_remote = refname[len('refs/remotes/'):], True
+                if name.endswith('/HEAD'):
+                    continue
+                remote = name.split('/', 1)[0]
+            else:
+                continue
+            ahead, behind, gone = TrackedBranch.parse_track(track)
+            branches.append(BranchInfo(name, is_remote, head == '*', upstream, remote, merge_ref,
+                                       ahead, behind, gone, int(date) if date.isdigit() else 0))
+        return cls(branches)
+
+    @property
+    def current(self):
+        """当前分支名，分离头指针时为 None"""
+        return next((branch.name for branch in self.local.values() if branch.current), None)
+
+    def remote_branch_names(self, remote="origin"):
+        """指定远程上的分支名（去掉 "origin/" 前缀）"""
+        prefix = remote + '/'
+        return [name[len(prefix):] for name in self.remote if name.startswith(prefix)]
+
+    def _view(self, remote):
+        """
+        返回 (按小写名称排序的 [(显示名, BranchInfo)], 对应的小写名称列表, 按提交时间倒序的列表)
+        remote 为 None 时为本地分支，否则为该远程上的分支（显示名不含远程前缀）
+        """
+        if remote not in self._views:
+            if remote is None:
+                items = list(self.local.items())
+            else:
+                items = [(name, self.remote[f"{remote}/{name}"]) for name in self.remote_branch_names(remote)]
+            by_name = sorted(items, key=lambda item: item[0].lower())
+            by_recency = sorted(items, key=lambda item: -item[1].commit_time)
+            self._views[remote] = (by_name, [name.lower() for name, _ in by_name], by_recency)
+        return self._views[remote]
+
+    def search(self, query="", remote=None, page=1, page_size=50, exclude=()):
+        """
+        搜索分支：前缀匹配（二分查找）排在前面，其次是子串匹配；无查询词时按最近提交排序
+        返回 (当前页的 [(显示名, BranchInfo)], 匹配总数)
+        """
+        by_name, lowered, by_recency = self._view(remote)
+        query = query.strip().lower()
+        if query:
+            lo = bisect.bisect_left(lowered, query)
+            hi = bisect.bisect_left(lowered, query + '\uffff', lo)
+            matches = by_name[lo:hi] + [item for item, name in zip(by_name, lowered)
+                                        if query in name and not name.startswith(query)]
+        else:
+            matches = by_recency
+        if exclude:
+            matches = [item for item in matches if item[0] not in exclude]
+        start = (page - 1) * page_size
+        return matches[start:start + page_size], len(matches)
+
+
+@dataclass
+class ManifestChange:
+    """拉取带来的一个依赖清单变更及涉及的提交"""
+    path: str
+    commits: list = field(default_factory=list)     # [(短 SHA, 提交说明)]
+
+
+# ==================== 依赖清单匹配 ====================
+
+# 默认的依赖清单文件；不含 / 的模式匹配任意目录下的同名文件，含 / 的模式从仓库根目录匹配
+DEFAULT_MANIFEST_PATTERNS = [
+    'package.json', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml',
+    'requirements*.txt', 'pyproject.toml', 'poetry.lock', 'Pipfile', 'Pipfile.lock',
+    '.env.example', 'pom.xml', 'build.gradle', 'build.gradle.kts',
+    'go.mod', 'go.sum', 'Cargo.toml', 'Cargo.lock', 'Gemfile', 'Gemfile.lock', 'composer.json',
+]
+
+
+def _glob_to_regex(pattern):
+    """将 glob 转换为正则：* 与 ? 不跨目录，**/ 匹配零或多级目录，[...] 为字符集合"""
+    pattern = pattern.strip()
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            parts.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end + 1
+            continue
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    regex = ''.join(parts)
+    # 不含 / 的模式匹配任意目录下的文件名
+    return regex if anchored else f"(?:.*/)?{regex}"
+
+
+@lru_cache(maxsize=16)
+def compile_globs(patterns):
+    """将一组 glob（tuple）编译为单个正则，每个路径只需匹配一次"""
+    regexes = [_glob_to_regex(p) for p in patterns if p.strip() and not p.strip().startswith('#')]
+    if not regexes:
+        return None
+    return re.compile('^(?:' + '|'.join(regexes) + ')$')
+
+
+def match_manifests(paths, patterns=DEFAULT_MANIFEST_PATTERNS):
+    """返回 paths 中匹配依赖清单模式的路径（保持原顺序）"""
+    regex = compile_globs(tuple(patterns))
+    if regex is None:
+        return []
+    return [path for path in paths if regex.match(path)]
+
+
+# ==================== 大文件检查 ====================
+
+# 超过此大小的文件在暂存前提示（GitHub 对 50 MB 以上的文件给出警告）
+DEFAULT_LARGE_FILE_LIMIT = 50 * 1024 * 1024
+# GitHub 拒绝推送超过 100 MB 的文件
+GITHUB_FILE_LIMIT = 100 * 1024 * 1024
+
+# 默认的构建产物模式，语法同依赖清单模式；以 /** 结尾的模式匹配整个目录
+DEFAULT_ARTIFACT_PATTERNS = [
+    '**/node_modules/**', '**/__pycache__/**', '**/.venv/**', '**/venv/**', 'dist/**', 'build/**', 'target/**',
+    '*.pyc', '*.class', '*.o', '*.obj', '*.so', '*.dll', '*.dylib', '*.exe', '*.msi', '*.war',
+    '*.zip', '*.7z', '*.rar', '*.tar', '*.tar.gz', '*.tgz', '*.iso', '*.dmg', '*.log',
+]
+
+
+@dataclass
+class StagingHit:
+    """暂存前被标记的文件，或匹配产物目录模式的整个目录（路径以 / 结尾）"""
+    path: str
+    size: int = None        # 字节数；未展开的未跟踪目录为 None
+    files: int = 1          # 目录命中时包含的文件数（未展开时为 0）
+    pattern: str = None     # 命中的产物模式；仅因大小被标记时为 None
+    oversized: bool = False
+    binary: bool = False
+
+    @property
+    def is_directory(self):
+        return self.path.endswith('/')
+
+    @property
+    def rejected(self):
+        """GitHub 会拒绝推送"""
+        return not self.is_directory and self.size is not None and self.size > GITHUB_FILE_LIMIT
+
+
+@dataclass
+class StagingScan:
+    """暂存前检查的结果"""
+    valid: bool = False
+    candidates: list = field(default_factory=list)  # 工作区有变化、要 git add 的路径（未跟踪目录以 / 结尾）
+    indexed: dict = field(default_factory=dict)     # {暂存区中已有改动的路径: 重命名前的路径或 None}
+    expanded: dict = field(default_factory=dict)    # {未跟踪目录: [其中会被暂存的文件]}
+    hits: list = field(default_factory=list)        # [StagingHit]，按大小从大到小
+
+    def plan(self, action="skip", keep=()):
+        """
+        按处理方式返回 (要跳过的命中路径, 交给 Git LFS 的文件)，keep 中的命中项照常提交
+        skip: 全部跳过；lfs: 超过大小限制的文件交给 Git LFS，其余跳过；include: 全部照常提交
+        """
+        if action == "include":
+            return [], []
+        keep = set(keep)
+        hits = [hit for hit in self.hits if hit.path not in keep]
+        if action == "lfs":
+            lfs = [hit.path for hit in hits if hit.oversized and not hit.is_directory]
+            return [hit.path for hit in hits if hit.path not in lfs], lfs
+        return [hit.path for hit in hits], []
+
+    @staticmethod
+    def _skipper(skip):
+        """返回判断路径是否被跳过的函数（跳过的目录以 / 结尾，其下所有路径都被跳过）"""
+        skip_files = {path for path in skip if not path.endswith('/')}
+        skip_dirs = tuple(path for path in skip if path.endswith('/'))
+        return lambda path: path in skip_files or path.startswith(skip_dirs)
+
+    def stage_list(self, skip=()):
+        """
+        跳过 skip 中的命中项后要 git add 的路径
+        未跟踪目录中没有被跳过的文件时保留目录本身，避免展开成大量路径
+        """
+        if not skip:
+            return list(self.candidates)
+        skipped = self._skipper(skip)
+        paths = []
+        for path in self.candidates:
+            if skipped(path):
+                continue
+            files = self.expanded.get(path)
+            if files is not None and any(name.startswith(path) for name in skip):
+                paths.extend(name for name in files if not skipped(name))
+            else:
+                paths.append(path)
+        return paths
+
+    def unstage_list(self, skip=()):
+        """暂存区中已有、但被跳过的路径（重命名时连同原路径），需要从暂存区撤回"""
+        skipped = self._skipper(skip)
+        paths = []
+        for path, orig_path in self.indexed.items():
+            if skipped(path):
+                paths.append(path)
+                if orig_path:
+                    paths.append(orig_path)
+        return paths
+
+    def commit_list(self, skip=()):
+        """只提交部分文件时传给 git commit 的路径：要暂存的路径加上暂存区中未被跳过的路径"""
+        skipped = self._skipper(skip)
+        paths = self.stage_list(skip)
+        paths.extend(path for path in self.indexed if not skipped(path) and path not in self.candidates)
+        return paths
+
+
+class FileSizeIndex:
+    """
+    文件大小索引 - {路径: [mtime_ns, 大小, 是否二进制]}，保存在 .git/sync-tool/size-index.json
+    mtime 与大小都没变的文件直接使用记录，不再读取内容；工作区没有变化时重新检查只需 stat
+    """
+
+    # 与 git 判断二进制的方式一致：前 8000 字节中含 NUL 即视为二进制
+    SNIFF_BYTES = 8000
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.last_scan = None       # (状态快照, 检查参数, StagingScan)：文件监听复用同一快照时直接返回
+        if path is not None:
+            try:
+                data = json.loads(Path(path).read_text(encoding='utf-8'))
+                if data.get('version') == 1:
+                    self.entries = data.get('entries', {})
+            except (OSError, ValueError, AttributeError):
+                pass
+
+    def lookup(self, root, paths):
+        """
+        返回 {路径: (大小, 是否二进制)}（路径相对 root，以 / 分隔）
+        不存在或不是普通文件的路径不在结果中
+        """
+        prefix = str(root).rstrip('/\\') + '/'
+        found = {}
+        with self.lock:
+            for path in paths:
+                full_path = prefix + path
+                try:
+                    info = os.lstat(full_path)
+                except OSError:
+                    continue
+                if not S_ISREG(info.st_mode):
+                    continue
+                cached = self.entries.get(path)
+                if cached and cached[0] == info.st_mtime_ns and cached[1] == info.st_size:
+                    found[path] = (info.st_size, cached[2])
+                    continue
+                try:
+                    with open(full_path, 'rb') as f:
+                        binary = b'\0' in f.read(self.SNIFF_BYTES)
+                except OSError:
+                    binary = False
+                self.entries[path] = [info.st_mtime_ns, info.st_size, binary]
+                self.dirty = True
+                found[path] = (info.st_size, binary)
+        return found
+
+    def save(self, keep=None):
+        """保存索引；指定 keep 时只保留这些路径（已提交或已删除的文件不再记录）"""
+        with self.lock:
+            if keep is not None and len(keep) < len(self.entries):
+                self.entries = {path: value for path, value in self.entries.items() if path in keep}
+                self.dirty = True
+            if not self.dirty or self.path is None:
+                return
+            data = json.dumps({'version': 1, 'entries': self.entries}, ensure_ascii=False, separators=(',', ':'))
+            self.dirty = False
+        tmp_path = Path(str(self.path) + '.tmp')
+        try:
+            tmp_path.write_text(data, encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+class ArtifactMatcher:
+    """
+    产物模式匹配：目录模式按目录判断并缓存结果（同一目录下的文件只判断一次），
+    不含 / 的文件模式只匹配文件名
+    """
+
+    def __init__(self, patterns=DEFAULT_ARTIFACT_PATTERNS):
+        self.patterns = [p.strip() for p in patterns if p.strip() and not p.strip().startswith('#')]
+        # 开头加 / 得到从仓库根目录（或文件名开头）匹配的正则：目录模式本身含 /，文件名模式不带目录前缀
+        self._dir_patterns = [(p, re.compile('^' + _glob_to_regex('/' + p[:-3]) + '$'))
+                              for p in self.patterns if p.endswith('/**')]
+        self._name_patterns = [(p, re.compile('^' + _glob_to_regex('/' + p) + '$'))
+                               for p in self.patterns if not p.endswith('/**') and '/' not in p]
+        self._path_patterns = [(p, re.compile('^' + _glob_to_regex(p) + '$'))
+                               for p in self.patterns if not p.endswith('/**') and '/' in p]
+        self._name_regex = compile_globs(tuple('/' + p for p, _ in self._name_patterns))
+        self._dir_cache = {}
+
+    def _match_directory(self, directory):
+        """directory 或其上级目录匹配目录模式时返回 (最外层匹配的目录/, 模式)"""
+        if directory in self._dir_cache:
+            return self._dir_cache[directory]
+        result = None
+        if directory:
+            result = self._match_directory(directory.rpartition('/')[0])
+            if result is None:
+                result = next(((directory + '/', p) for p, regex in self._dir_patterns if regex.match(directory)), None)
+        self._dir_cache[directory] = result
+        return result
+
+    def match(self, path):
+        """返回 (命中路径, 模式)：目录模式命中时为目录（以 / 结尾）；未命中返回 None"""
+        if path.endswith('/'):
+            return self._match_directory(path[:-1])
+        directory, _, name = path.rpartition('/')
+        result = self._match_directory(directory)
+        if result is not None:
+            return result
+        if self._name_regex is not None and self._name_regex.match(name):
+            return next((path, p) for p, regex in self._name_patterns if regex.match(name))
+        return next(((path, p) for p, regex in self._path_patterns if regex.match(path)), None)
+
+
+# ==================== 进度解析 ====================
+
+# 匹配 git --progress 输出，如:
+# "Receiving objects:  45% (450/1000), 1.20 MiB | 2.00 MiB/s"
+# "remote: Counting objects: 100% (12/12), done."
+_PROGRESS_RE = re.compile(
+    r'(?P<phase>[^:\r\n]+?):\s+(?P<percent>\d+)%\s+\((?P<current>\d+)/(?P<total>\d+)\)'
+    r'(?:,\s*(?P<transferred>[\d.]+\s*(?:[KMGT]i?B|bytes?))(?:\s*\|\s*(?P<rate>[\d.]+\s*(?:[KMGT]i?B|bytes?)/s))?)?'
+)
+
+
+@dataclass
+class GitProgress:
+    """git --progress 的一条进度信息"""
+    phase: str              # 阶段，如 Counting objects / Receiving objects / Resolving deltas
+    percent: int
+    current: int
+    total: int
+    transferred: str = None # 已传输大小，如 1.20 MiB
+    rate: str = None        # 传输速率，如 2.00 MiB/s
+
+    @classmethod
+    def parse(cls, line):
+        """从一行 stderr 中解析进度，不是进度行时返回 None"""
+        match = _PROGRESS_RE.search(line)
+        if not match:
+            return None
+        return cls(
+            phase=match.group('phase').strip(),
+            percent=int(match.group('percent')),
+            current=int(match.group('current')),
+            total=int(match.group('total')),
+            transferred=match.group('transferred'),
+            rate=match.group('rate'),
+        )
+
+    def describe(self):
+        text = f"{self.phase} {self.current}/{self.total}"
+        if self.transferred:
+            text += f" · {self.transferred}"
+        if self.rate:
+            text += f" · {self.rate}"
+        return text
+
+
+# ==================== 失败分类 ====================
+
+# (类别, 输出中的关键字)；按顺序匹配，认证与冲突优先于网络错误
+# （如 "Permission denied (publickey)" 后面通常跟着 "Could not read from remote repository"）
+_FAILURE_PATTERNS = [
+    ("auth", ("authentication failed", "permission denied", "could not read username", "could not read password",
+              "terminal prompts disabled", "invalid username or password", "requested url returned error: 403",
+              "requested url returned error: 401", "repository not found", "host key verification failed")),
+    ("conflict", ("[rejected]", "non-fast-forward", "fetch first", "conflict", "automatic merge failed",
+                  "would be overwritten", "not possible to fast-forward", "divergent branches", "stale info",
+                  "atomic push failed", "needs merge", "unmerged files")),
+    ("timeout", ("timed out", "timeout")),
+    ("network", ("could not resolve host", "connection refused", "connection reset", "connection closed",
+                 "early eof", "remote end hung up", "rpc failed", "unable to access", "failed to connect",
+                 "network is unreachable", "no route to host", "ssl", "gnutls", "curl", "broken pipe",
+                 "could not read from remote repository")),
+]
+
+FAILURE_LABELS = {
+    "timeout": "超时",
+    "auth": "认证失败",
+    "conflict": "冲突",
+    "network": "网络错误",
+    "cancelled": "已取消",
+    "error": "执行失败",
+}
+
+
+@dataclass
+class GitFailure:
+    """一次 Git 操作的失败原因"""
+    kind: str               # timeout / auth / conflict / network / cancelled / error
+    message: str = ""       # 输出中最相关的一行
+    attempts: int = 1       # 包括自动重试在内的执行次数
+
+    @property
+    def label(self):
+        return FAILURE_LABELS.get(self.kind, self.kind)
+
+    @property
+    def retryable(self):
+        """瞬时故障（网络中断、传输停滞）可以自动重试；认证失败与冲突重试也不会成功"""
+        return self.kind in ("network", "timeout")
+
+    @classmethod
+    def classify(cls, result, outcome=None, attempts=1):
+        """
+        根据命令结果分类失败原因
+        outcome 为执行层记录的结果（timeout / stall / cancelled / exception），优先于输出内容
+        """
+        if outcome == "cancelled":
+            return cls("cancelled", "操作已取消", attempts)
+        lines = []
+        if result is not None:
+            lines = [line.strip() for line in f"{result.stderr or ''}\n{result.stdout or ''}".splitlines() if line.strip()]
+        if outcome in ("timeout", "stall"):
+            message = "长时间没有任何输出，已中止" if outcome == "stall" else "超过时限，已中止"
+            return cls("timeout", message, attempts)
+        for kind, keywords in _FAILURE_PATTERNS:
+            for line in lines:
+                lowered = line.lower()
+                if any(keyword in lowered for keyword in keywords):
+                    return cls(kind, line, attempts)
+        return cls("error", lines[-1] if lines else "", attempts)
+
+
+# ==================== 控制台记录 ====================
+
+_CONSOLE_CSS = {
+    "command": "console-command",
+    "output": "console-output",
+    "error": "console-error",
+    "success": "console-success",
+}
+
+
+class ConsoleLog:
+    """
+    命令执行记录 - 固定行数的环形缓冲区
+    每行在写入时完成 HTML 转义，渲染时只需拼接；超出容量的旧行可写入磁盘文件
+    """
+
+    def __init__(self, max_lines=1000, spill_path=None):
+        self.lines = deque(maxlen=max_lines)
+        self.spill_path = spill_path
+        self.dropped = 0
+        if spill_path:
+            # 每次操作重新开始记录
+            try:
+                open(spill_path, 'w', encoding='utf-8').close()
+            except OSError:
+                self.spill_path = None
+
+    def append(self, item):
+        """追加一条记录，格式与原先的列表一致: (prefix, content, msg_type)"""
+        _, content, msg_type = item
+        if not content:
+            return
+        css_class = _CONSOLE_CSS.get(msg_type, "console-command")
+        evicted = []
+        for line in content.split('\n'):
+            if not line.strip():
+                continue
+            if len(self.lines) == self.lines.maxlen:
+                evicted.append(self.lines[0][2])
+                self.dropped += 1
+            self.lines.append((msg_type, f'<div class="console-line {css_class}">{html.escape(line)}</div>', line))
+        if evicted and self.spill_path:
+            try:
+                with open(self.spill_path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(evicted) + '\n')
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        """按 (msg_type, line) 迭代缓冲区中的记录（先复制，后台线程可同时追加）"""
+        for msg_type, _, line in list(self.lines):
+            yield msg_type, line
+
+    def to_html(self):
+        """拼接为一个完整的 HTML 块"""
+        return '\n'.join(rendered for _, rendered, _ in list(self.lines))
+
+
+# ==================== 命令耗时统计 ====================
+
+# git 全局选项中需要带参数的项（确定子命令时跳过其参数）
+_GIT_OPTIONS_WITH_VALUE = {'-c', '-C', '--git-dir', '--work-tree', '--namespace', '--exec-path'}
+
+
+def command_class(command):
+    """
+    提取命令类别（git 子命令名），如 "git -c a=b status -z" → "status"
+    非 git 命令返回可执行文件名
+    """
+    tokens = shlex.split(command) if isinstance(command, str) else list(command)
+    if not tokens:
+        return "unknown"
+    if os.path.basename(tokens[0]) != 'git':
+        return os.path.basename(tokens[0])
+    skip_next = False
+    for token in tokens[1:]:
+        if skip_next:
+            skip_next = False
+            continue
+        if token in _GIT_OPTIONS_WITH_VALUE:
+            skip_next = True
+            continue
+        if not token.startswith('-'):
+            return token
+    return "git"
+
+
+@dataclass
+class CommandRecord:
+    """一次命令执行的记录"""
+    command_class: str
+    wall_s: float
+    returncode: int = None
+    output_bytes: int = 0
+    outcome: str = "ok"         # ok / error / timeout / exception / cancelled
+    timestamp: float = 0.0
+
+
+class CommandMetrics:
+    """
+    Git 命令耗时统计 - 按命令类别保存最近的执行记录，计算 p50/p95
+    可选导出: 每条记录追加到 JSONL 文件；汇总写入 Prometheus textfile（供 node_exporter 采集）
+    """
+
+    EXPORT_INTERVAL = 5.0
+
+    def __init__(self, max_samples=500):
+        self.max_samples = max_samples
+        self.jsonl_path = None
+        self.textfile_path = None
+        self._samples = {}          # command_class -> deque[CommandRecord]
+        self._totals = {}           # command_class -> {"count", "sum", outcome: n}
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+
+    def record(self, command, wall_s, returncode=None, output_bytes=0, outcome="ok"):
+        """记录一次执行；returncode 非零时 outcome 自动记为 error"""
+        if outcome == "ok" and returncode not in (None, 0):
+            outcome = "error"
+        record = CommandRecord(command_class(command), wall_s, returncode, output_bytes, outcome, time.time())
+        with self._lock:
+            self._samples.setdefault(record.command_class, deque(maxlen=self.max_samples)).append(record)
+            totals = self._totals.setdefault(record.command_class, {"count": 0, "sum": 0.0})
+            totals["count"] += 1
+            totals["sum"] += wall_s
+            totals[outcome] = totals.get(outcome, 0) + 1
+        self._export(record)
+        return record
+
+    @staticmethod
+    def _percentile(sorted_values, fraction):
+        """最近秩法百分位数：第 ceil(fraction × n) 个值"""
+        if not sorted_values:
+            return None
+        # round 消除浮点误差（如 0.95 × 60 = 57.00000000000001）
+        rank = math.ceil(round(fraction * len(sorted_values), 9))
+        return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+    def summary(self):
+        """各命令类别的统计，按 p95 从大到小排序"""
+        rows = []
+        with self._lock:
+            items = [(name, list(samples), dict(self._totals[name])) for name, samples in self._samples.items()]
+        for name, samples, totals in items:
+            durations = sorted(record.wall_s for record in samples)
+            rows.append({
+                "command": name,
+                "count": totals["count"],
+                "p50": self._percentile(durations, 0.50),
+                "p95": self._percentile(durations, 0.95),
+                "max": durations[-1],
+                "errors": totals.get("error", 0),
+                "timeouts": totals.get("timeout", 0),
+                "exceptions": totals.get("exception", 0),
+                "cancelled": totals.get("cancelled", 0),
+                "output_bytes": sum(record.output_bytes for record in samples),
+            })
+        return sorted(rows, key=lambda row: -row["p95"])
+
+    # ---------- 导出 ----------
+
+    def _export(self, record):
+        if self.jsonl_path:
+            try:
+                with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record.__dict__, ensure_ascii=False) + '\n')
+            except OSError:
+                pass
+        if self.textfile_path and time.monotonic() - self._last_export >= self.EXPORT_INTERVAL:
+            self._last_export = time.monotonic()
+            self.write_textfile(self.textfile_path)
+
+    def to_prometheus(self):
+        """生成 Prometheus 文本格式"""
+        lines = [
+            "# HELP git_sync_command_duration_seconds Wall time of git commands run by the sync tool.",
+            "# TYPE git_sync_command_duration_seconds summary",
+        ]
+        with self._lock:
+            totals = {name: dict(values) for name, values in self._totals.items()}
+        summary = {row["command"]: row for row in self.summary()}
+        for name in sorted(totals):
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95")):
+                lines.append(f'git_sync_command_duration_seconds{{command="{label}",quantile="{quantile}"}} '
+                             f'{summary[name][key]:.6f}')
+            lines.append(f'git_sync_command_duration_seconds_sum{{command="{label}"}} {totals[name]["sum"]:.6f}')
+            lines.append(f'git_sync_command_duration_seconds_count{{command="{label}"}} {totals[name]["count"]}')
+        lines += [
+            "# HELP git_sync_command_failures_total Failed git commands by outcome.",
+            "# TYPE git_sync_command_failures_total counter",
+        ]
+        for name in sorted(totals):
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            for outcome in ("error", "timeout", "exception", "cancelled"):
+                lines.append(f'git_sync_command_failures_total{{command="{label}",outcome="{outcome}"}} '
+                             f'{totals[name].get(outcome, 0)}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """原子写入 Prometheus textfile（先写临时文件再重命名）"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+# ==================== .git 目录读取 ====================
+
+def _parse_git_config(text):
+    """
+    解析 git config 文件内容
+    返回 {(section, subsection, key): [values]}，section/key 小写，subsection 保持原样
+    """
+    entries = {}
+    section, subsection = None, None
+    pending = ""
+    for raw_line in text.splitlines():
+        # 行尾反斜杠表示续行
+        if raw_line.endswith('\\') and not raw_line.endswith('\\\\'):
+            pending += raw_line[:-1]
+            continue
+        line = (pending + raw_line).strip()
+        pending = ""
+        if not line or line[0] in '#;':
+            continue
+
+        if line.startswith('['):
+            header = line[1:line.index(']')] if ']' in line else line[1:]
+            if '"' in header:
+                name, _, rest = header.partition('"')
+                section = name.strip().lower()
+                subsection = rest.rsplit('"', 1)[0].replace('\\"', '"').replace('\\\\', '\\')
+            elif '.' in header:
+                # 旧式写法 [section.subsection]，子节名不区分大小写
+                name, _, rest = header.partition('.')
+                section, subsection = name.strip().lower(), rest.strip().lower()
+            else:
+                section, subsection = header.strip().lower(), None
+            continue
+
+        if section is None:
+            continue
+
+        key, sep, value = line.partition('=')
+        key = key.strip().lower()
+        if not sep:
+            value = "true"
+        else:
+            chars = []
+            in_quotes = False
+            i = 0
+            value = value.strip()
+            while i < len(value):
+                c = value[i]
+                if c == '\\' and i + 1 < len(value):
+                    i += 1
+                    chars.append({'n': '\n', 't': '\t', 'b': '\b'}.get(value[i], value[i]))
+                elif c == '"':
+                    in_quotes = not in_quotes
+                elif c in '#;' and not in_quotes:
+                    break
+                else:
+                    chars.append(c)
+                i += 1
+            value = ''.join(chars).strip()
+        entries.setdefault((section, subsection, key), []).append(value)
+    return entries
+
+
+class GitDirReader:
+    """
+    纯 Python 读取 .git 目录（HEAD、refs、packed-refs、config），不启动任何进程
+    支持 packed-refs、符号引用以及 worktree 的 gitdir: 文件
+    无法确定结果时返回 None，由调用方回退到 git 命令
+    """
+
+    MAX_SYMREF_DEPTH = 5
+
+    def __init__(self, repo_path):
+        self.repo_path = Path(repo_path).resolve()
+        self.work_tree = None
+        self.git_dir = None
+        self.common_dir = None
+        self._config = None
+        self._packed_refs = None
+        self._packed_refs_mtime = None
+        self._locate()
+
+    def _locate(self):
+        """自下而上查找 .git（目录或 gitdir: 文件）"""
+        # 通过环境变量指定仓库时，交给 git 命令处理
+        if os.environ.get('GIT_DIR') or os.environ.get('GIT_WORK_TREE'):
+            return
+
+        for candidate in [self.repo_path, *self.repo_path.parents]:
+            dot_git = candidate / '.git'
+            try:
+                if dot_git.is_dir():
+                    git_dir = dot_git
+                elif dot_git.is_file():
+                    content = dot_git.read_text(encoding='utf-8').strip()
+                    if not content.startswith('gitdir:'):
+                        return
+                    git_dir = Path(content[len('gitdir:'):].strip())
+                    if not git_dir.is_absolute():
+                        git_dir = (candidate / git_dir).resolve()
+                else:
+                    continue
+            except OSError:
+                return
+
+            if not (git_dir / 'HEAD').is_file():
+                return
+            # 位于 .git 目录内部时不属于工作区
+            if '.git' in self.repo_path.relative_to(candidate).parts:
+                return
+
+            # commondir 无法读取或指向不存在的目录时视为无法直接读取，交给 git 命令处理
+            try:
+                common_dir = git_dir
+                commondir_file = git_dir / 'commondir'
+                if commondir_file.is_file():
+                    common_dir = Path(commondir_file.read_text(encoding='utf-8').strip())
+                    if not common_dir.is_absolute():
+                        common_dir = (git_dir / common_dir).resolve()
+
+                # 其他用户的仓库会被 safe.directory 拦截，交给 git 判断
+                if hasattr(os, 'getuid') and common_dir.stat().st_uid != os.getuid():
+                    return
+            except OSError:
+                return
+
+            self.work_tree, self.git_dir, self.common_dir = candidate, git_dir, common_dir
+            return
+
+    @property
+    def found(self):
+        return self.git_dir is not None
+
+    # ---------- config ----------
+
+    def _load_config(self):
+        if self._config is None:
+            try:
+                text = (self.common_dir / 'config').read_text(encoding='utf-8', errors='replace')
+            except OSError:
+                text = ""
+            self._config = _parse_git_config(text)
+        return self._config
+
+    def _config_is_authoritative(self):
+        """仓库配置中不含 include 指令、特殊扩展或 worktree 配置时，才可直接作为结果"""
+        config = self._load_config()
+        for (section, _, key), values in config.items():
+            if section in ('include', 'includeif'):
+                return False
+            if section == 'extensions' and key in ('refstorage', 'worktreeconfig'):
+                return False
+            if section == 'core' and key == 'worktree':
+                return False
+            if section == 'core' and key == 'bare' and values[-1].lower() in ('true', 'yes', 'on', '1'):
+                return False
+        return True
+
+    def config_get(self, section, subsection, key):
+        """读取仓库级配置项（最后一次出现的值），未找到返回 None"""
+        if not self.found or not self._config_is_authoritative():
+            return None
+        values = self._load_config().get((section.lower(), subsection, key.lower()))
+        return values[-1] if values else None
+
+    # ---------- refs ----------
+
+    def _load_packed_refs(self):
+        path = self.common_dir / 'packed-refs'
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return {}
+        if self._packed_refs is None or mtime != self._packed_refs_mtime:
+            refs = {}
+            with open(path, encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    if line.startswith(('#', '^')):
+                        continue
+                    sha, _, name = line.rstrip('\n').partition(' ')
+                    if name:
+                        refs[name] = sha
+            self._packed_refs, self._packed_refs_mtime = refs, mtime
+        return self._packed_refs
+
+    def _read_loose(self, name):
+        """读取松散引用文件内容；HEAD 等伪引用位于各自 worktree 的 git_dir"""
+        base = self.git_dir if '/' not in name else self.common_dir
+        try:
+            return (base / name).read_text(encoding='utf-8').strip()
+        except OSError:
+            return None
+
+    def read_symbolic_ref(self, name="HEAD"):
+        """读取符号引用的目标（如 refs/heads/main），非符号引用返回空字符串"""
+        if not self.found:
+            return None
+        content = self._read_loose(name)
+        if content is None:
+            return None
+        if content.startswith('ref:'):
+            return content[len('ref:'):].strip()
+        return ""
+
+    def resolve_ref(self, name):
+        """将引用解析为提交 SHA，依次查找松散引用和 packed-refs"""
+        if not self.found or not self._config_is_authoritative():
+            return None
+        for _ in range(self.MAX_SYMREF_DEPTH):
+            content = self._read_loose(name)
+            if content is None:
+                return self._load_packed_refs().get(name)
+            if not content.startswith('ref:'):
+                return content
+            name = content[len('ref:'):].strip()
+        return None
+
+    def index_entry_count(self):
+        """读取 .git/index 头部记录的条目数（即跟踪的文件数），无法读取返回 None"""
+        if not self.found:
+            return None
+        try:
+            with open(self.git_dir / 'index', 'rb') as f:
+                header = f.read(12)
+        except OSError:
+            return None
+        if len(header) < 12 or header[:4] != b'DIRC':
+            return None
+        return struct.unpack('>I', header[8:12])[0]
+
+    def refs_signature(self):
+        """
+        引用状态签名：HEAD、packed-refs、config 以及 refs/heads、refs/remotes 下各目录的修改时间
+        git 通过“写 .lock 再重命名”更新引用，所在目录的 mtime 随之改变；无法判断返回 None
+        """
+        if not self.found or not self._config_is_authoritative():
+            return None
+        parts = [self._read_loose('HEAD')]
+        for path in (self.common_dir / 'packed-refs', self.common_dir / 'config'):
+            try:
+                stat = path.stat()
+                parts.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                parts.append(None)
+        stack = [self.common_dir / 'refs' / 'heads', self.common_dir / 'refs' / 'remotes']
+        while stack:
+            directory = stack.pop()
+            try:
+                parts.append((str(directory), directory.stat().st_mtime_ns))
+                with os.scandir(directory) as entries:
+                    stack.extend(Path(entry.path) for entry in entries if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+        return tuple(parts)
+
+    # ---------- 高层查询 ----------
+
+    def is_work_tree(self):
+        """当前目录位于工作区内返回 True，无法判断返回 None"""
+        if not self.found or not self._config_is_authoritative():
+            return None
+        return True
+
+    def current_branch(self):
+        """当前分支名；分离头指针返回空字符串，无法判断返回 None"""
+        target = self.read_symbolic_ref("HEAD")
+        if target is None:
+            return None
+        if target.startswith('refs/heads/'):
+            return target[len('refs/heads/'):]
+        return ""
+
+    def remote_url(self, remote_name="origin"):
+        """远程地址；存在 insteadOf 改写规则或未配置时返回 None"""
+        if not self.found or not self._config_is_authoritative():
+            return None
+        if any(section == 'url' for section, _, _ in self._load_config()):
+            return None
+        if self._global_config_rewrites_urls():
+            return None
+        return self.config_get('remote', remote_name, 'url')
+
+    @staticmethod
+    def _global_config_rewrites_urls():
+        """
+        用户级/系统级配置中可能存在 url.<base>.insteadOf 改写
+        与 git 一样遵循 GIT_CONFIG_GLOBAL / GIT_CONFIG_SYSTEM / GIT_CONFIG_NOSYSTEM；
+        配置文件含 include 指令或通过环境变量传入配置时无法判断，同样返回 True（交给 git config）
+        """
+        if os.environ.get('GIT_CONFIG_PARAMETERS') or os.environ.get('GIT_CONFIG_COUNT'):
+            return True
+        home = os.path.expanduser('~')
+        if 'GIT_CONFIG_GLOBAL' in os.environ:
+            paths = [os.environ['GIT_CONFIG_GLOBAL']]
+        else:
+            xdg = os.environ.get('XDG_CONFIG_HOME') or os.path.join(home, '.config')
+            paths = [os.path.join(home, '.gitconfig'), os.path.join(xdg, 'git', 'config')]
+        if not os.environ.get('GIT_CONFIG_NOSYSTEM'):
+            paths.append(os.environ.get('GIT_CONFIG_SYSTEM') or '/etc/gitconfig')
+        for path in paths:
+            if not path:
+                continue
+            try:
+                with open(path, encoding='utf-8', errors='replace') as f:
+                    config = _parse_git_config(f.read())
+            except OSError:
+                continue
+            for section, _, key in config:
+                if section in ('include', 'includeif') or (section == 'url' and key == 'insteadof'):
+                    return True
+        return False
+
+    def upstream_ref(self, branch):
+        """
+        分支上游对应的本地远程跟踪引用（如 refs/remotes/origin/main）
+        未配置上游返回空字符串，无法判断返回 None
+        """
+        if not branch or not self.found or not self._config_is_authoritative():
+            return None
+        remote = self.config_get('branch', branch, 'remote')
+        merge = self.config_get('branch', branch, 'merge')
+        if not remote or not merge:
+            return ""
+        if remote == '.':
+            return merge
+
+        for refspec in self._load_config().get(('remote', remote, 'fetch'), []):
+            src, _, dst = refspec.lstrip('+').partition(':')
+            if src.endswith('*') and dst.endswith('*') and merge.startswith(src[:-1]):
+                return dst[:-1] + merge[len(src) - 1:]
+            if src == merge and dst:
+                return dst
+        return None
+
+    def has_upstream(self, branch):
+        """分支上游是否存在（与 git rev-parse @{u} 成功与否一致），无法判断返回 None"""
+        ref = self.upstream_ref(branch)
+        if ref is None:
+            return None
+        if ref == "":
+            return False
+        return self.resolve_ref(ref) is not None
+
+
+# ==================== Git 操作类 ====================
+
+class GitOperations:
+    """Git 命令执行核心类"""
+
+    # 命令耗时统计（CommandMetrics），为 None 时不记录
+    metrics = None
+    # 分支索引缓存 {仓库 .git 目录: (引用签名, BranchIndex)}，由页面设置为跨刷新共享的字典
+    branch_index_cache = {}
+    # 每个仓库同时运行的 git 进程数上限（页面、后台获取、自动同步、维护等共享）
+    MAX_PROCESSES_PER_REPO = 4
+    # 只读命令的环境变量：不抢占 index.lock（git status 不回写索引），使用 C 语言环境避免加载本地化
+    READ_ONLY_ENV = {'GIT_OPTIONAL_LOCKS': '0', 'LC_ALL': 'C'}
+    # 网络命令的环境变量：固定英文输出，失败分类与进度解析依赖 git 的原文（中文语言包会翻译 stderr）
+    NETWORK_ENV = {'LC_ALL': 'C', 'LANGUAGE': 'C'}
+    _repo_slots = {}                # {仓库 .git 目录: BoundedSemaphore}
+    _repo_slots_lock = threading.Lock()
+    _size_indexes = {}              # {仓库 .git 目录: FileSizeIndex}，进程内共享
+    # 各类操作的超时策略（秒）: (总时限, 停滞时限)；停滞时限内没有任何输出/进度即中止
+    TIMEOUT_POLICIES = {
+        "read": (30, None),             # 本地只读查询
+        "write": (120, None),           # 本地写操作（add、commit、checkout 等）
+        "network": (6 * 3600, 120),     # 网络操作：大文件传输可能很久，主要依靠停滞检测
+    }
+    # 网络操作遇到瞬时故障时的执行次数与首次重试前的等待秒数（之后每次翻倍）
+    RETRY_ATTEMPTS = 3
+    RETRY_BASE_DELAY = 2.0
+
+    def __init__(self, repo_path=".", watcher=None):
+        self.repo_path = Path(repo_path).resolve()
+        self.reader = GitDirReader(self.repo_path)
+        self.console_output = ConsoleLog()
+        self.watcher = watcher          # TreeWatcher，可跨页面刷新复用状态快照
+        self._snapshot = None
+        self._remote_url = None
+        self.pulled_manifests = []      # 最近一次 pull 带来的依赖清单变更 [ManifestChange]
+        self.cancel_event = threading.Event()   # 设置后中止正在执行的网络操作
+        self.on_tick = None             # 网络操作执行期间约每 0.5 秒调用 on_tick(已用秒数)
+        self.last_outcome = None        # 最近一条命令的结果: ok / error / timeout / stall / cancelled / exception
+        self.last_failure = None        # 最近一次网络操作的失败原因（GitFailure），成功时为 None
+
+    @staticmethod
+    def format_command(args):
+        """参数列表转为可复制到终端执行的命令行（用于控制台回显与耗时统计）"""
+        return ' '.join(shlex.quote(str(arg)) for arg in args)
+
+    def repo_slots(self):
+        """本仓库的进程数信号量（按 .git 目录区分，同一仓库的所有实例共享）"""
+        key = str(self.reader.common_dir) if self.reader.found else str(self.repo_path)
+        with GitOperations._repo_slots_lock:
+            slots = GitOperations._repo_slots.get(key)
+            if slots is None:
+                slots = GitOperations._repo_slots[key] = threading.BoundedSemaphore(self.MAX_PROCESSES_PER_REPO)
+        return slots
+
+    def _command_env(self, env=None, read_only=False):
+        """子进程环境变量，无需修改时返回 None（直接继承）"""
+        if read_only:
+            env = {**self.READ_ONLY_ENV, **env} if env else self.READ_ONLY_ENV
+        return {**os.environ, **env} if env else None
+
+    def _run_command(self, args, capture_output=True, env=None, timeout=None, input=None, read_only=False):
+        """
+        执行 Git 命令（参数列表，不经过 shell）
+        对应底层: subprocess.run(["git", ...]) 执行原生 Git 命令
+        read_only=True 时附加 READ_ONLY_ENV；同一仓库同时运行的 git 进程数受 MAX_PROCESSES_PER_REPO 限制
+        timeout 默认取 TIMEOUT_POLICIES 中 read / write 的总时限
+        超时（含等待进程名额）或异常时返回 None，结果均记录到命令耗时统计
+        """
+        if timeout is None:
+            timeout = self.TIMEOUT_POLICIES["read" if read_only else "write"][0]
+        command = self.format_command(args)
+        start = time.monotonic()
+        slots = self.repo_slots()
+        if not slots.acquire(timeout=timeout):
+            self._record(command, start, outcome="timeout")
+            return None
+        try:
+            result = subprocess.run(
+                args,
+                cwd=self.repo_path,
+                capture_output=capture_output,
+                input=input,
+                env=self._command_env(env, read_only),
+                text=True,
+                encoding='utf-8',
+                errors='replace',  # 替换无法解码的字符，避免中文文件名报错
+                timeout=max(timeout - (time.monotonic() - start), 1)
+            )
+            self._record(command, start, result)
+            return result
+        except subprocess.TimeoutExpired:
+            self._record(command, start, outcome="timeout")
+            return None
+        except Exception as e:
+            self._record(command, start, outcome="exception")
+            return None
+        finally:
+            slots.release()
+
+    def _record(self, command, start, result=None, outcome="ok"):
+        """写入命令耗时统计，并记录到 last_outcome"""
+        if outcome == "ok" and result is not None and result.returncode != 0:
+            self.last_outcome = "error"
+        else:
+            self.last_outcome = outcome
+        if outcome == "stall":
+            outcome = "timeout"
+        if self.metrics is None:
+            return
+        output_bytes = 0
+        if result is not None:
+            output_bytes = len(result.stdout or "") + len(result.stderr or "")
+        self.metrics.record(command, time.monotonic() - start,
+                            returncode=result.returncode if result is not None else None,
+                            output_bytes=output_bytes, outcome=outcome)
+
+    def _stream_command(self, args, on_line=None, on_progress=None, timeout=600, env=None, cwd=None,
+                        stall_timeout=None):
+        """
+        流式执行命令（参数列表，不经过 shell），逐行回调输出并解析 --progress 进度
+        对应底层: subprocess.Popen() + 读取线程
+        回调在调用线程中执行（Streamlit 元素只能在脚本线程中更新）
+        git 命令占用本仓库的进程名额，其他程序（如依赖安装）不占用
+        超过 timeout、stall_timeout 秒没有任何输出或设置了 cancel_event 时结束进程并返回 None；
+        回调抛出异常（页面中断执行、Ctrl+C）时同样先结束进程再向上抛出
+        """
+        command = self.format_command(args)
+        start = time.monotonic()
+        slots = self.repo_slots() if args[0] == "git" else None
+        if slots is not None and not slots.acquire(timeout=timeout):
+            self._record(command, start, outcome="timeout")
+            return None
+        try:
+            return self._stream_process(args, command, start, on_line, on_progress, timeout, env, cwd, stall_timeout)
+        finally:
+            if slots is not None:
+                slots.release()
+
+    def _stream_process(self, args, command, start, on_line, on_progress, timeout, env, cwd, stall_timeout):
+        """启动进程并读取输出，供 _stream_command 在取得进程名额后调用"""
+        try:
+            process = subprocess.Popen(
+                args,
+                cwd=cwd or self.repo_path,
+                env=self._command_env(env),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                # 独立进程组：结束时连同 ssh、凭据助手等子进程一起结束
+                start_new_session=hasattr(os, "killpg"),
+            )
+        except Exception:
+            self._record(command, start, outcome="exception")
+            return None
+
+        events = queue.Queue()
+
+        def pump(stream, name):
+            # 进度行以 \r 结尾并反复覆盖，普通行以 \n 结尾；按字节切分后再解码，避免截断多字节字符
+            buffer = b""
+            while True:
+                chunk = stream.read1(4096)
+                if not chunk:
+                    break
+                buffer += chunk
+                pieces = re.split(rb'(\r|\n)', buffer)
+                buffer = pieces.pop()
+                for piece, sep in zip(pieces[::2], pieces[1::2]):
+                    events.put((name, piece.decode('utf-8', errors='replace'), sep == b'\r'))
+            if buffer:
+                events.put((name, buffer.decode('utf-8', errors='replace'), False))
+            events.put((name, None, False))
+
+        for stream, name in ((process.stdout, "stdout"), (process.stderr, "stderr")):
+            threading.Thread(target=pump, args=(stream, name), daemon=True).start()
+
+        output = {"stdout": [], "stderr": []}
+        open_streams = 2
+        deadline = start + timeout
+        last_activity = last_tick = time.monotonic()
+        try:
+            while open_streams:
+                now = time.monotonic()
+                outcome = None
+                if self.cancel_event.is_set():
+                    outcome = "cancelled"
+                elif now >= deadline:
+                    outcome = "timeout"
+                elif stall_timeout and now - last_activity >= stall_timeout:
+                    outcome = "stall"
+                if outcome:
+                    self._stop_process(process)
+                    self._record(command, start, outcome=outcome)
+                    return None
+                if self.on_tick and now - last_tick >= 0.5:
+                    last_tick = now
+                    self.on_tick(now - start)
+                try:
+                    name, text, transient = events.get(timeout=min(deadline - now, 0.5))
+                except queue.Empty:
+                    continue
+                last_activity = time.monotonic()
+                if text is None:
+                    open_streams -= 1
+                    continue
+
+                progress = GitProgress.parse(text) if name == "stderr" else None
+                if progress and on_progress:
+                    on_progress(progress)
+                # 中间进度只更新进度条，不写入输出
+                if (progress and transient) or not text.strip():
+                    continue
+                text = text.rstrip()
+                output[name].append(text)
+                if on_line:
+                    on_line(name, text)
+        except BaseException:
+            self._stop_process(process)
+            self._record(command, start, outcome="cancelled")
+            raise
+
+        returncode = process.wait()
+        result = subprocess.CompletedProcess(
+            command, returncode, '\n'.join(output["stdout"]), '\n'.join(output["stderr"])
+        )
+        self._record(command, start, result)
+        return result
+
+    @staticmethod
+    def _stop_process(process, grace=5):
+        """结束子进程及其进程组：先 SIGTERM（git 会清理 index.lock 等锁文件），超时后再强制结束"""
+        def send(sig):
+            try:
+                if hasattr(os, "killpg"):
+                    os.killpg(process.pid, sig)
+                elif sig == signal.SIGTERM:
+                    process.terminate()
+                else:
+                    process.kill()
+            except (ProcessLookupError, PermissionError):
+                pass
+
+        send(signal.SIGTERM)
+        try:
+            process.wait(grace)
+        except subprocess.TimeoutExpired:
+            send(getattr(signal, "SIGKILL", signal.SIGTERM))
+            process.wait()
+
+    def cancel(self):
+        """中止本实例正在执行的网络操作（包括重试前的等待）"""
+        self.cancel_event.set()
+
+    def _wait_cancellable(self, seconds):
+        """等待指定秒数，期间保持 on_tick 回调；被取消时返回 True"""
+        end = time.monotonic() + seconds
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self.cancel_event.wait(min(remaining, 0.5)):
+                return True
+            if self.on_tick:
+                self.on_tick(None)
+
+    def _run_network(self, args, stderr_type="output", on_output=None, on_progress=None, env=None, retries=None):
+        """
+        执行网络命令: 使用 network 超时策略（停滞检测），遇到瞬时故障（网络错误、传输停滞）时按指数退避自动重试
+        认证失败、冲突与取消不重试；失败原因记录到 last_failure
+        始终附加 NETWORK_ENV（含后台命令的 _background_env），保证失败原因按英文原文分类
+        """
+        env = {**self.NETWORK_ENV, **env} if env else self.NETWORK_ENV
+        self.cancel_event.clear()
+        timeout, stall_timeout = self.TIMEOUT_POLICIES["network"]
+        attempts = self.RETRY_ATTEMPTS if retries is None else retries + 1
+        result = None
+        for attempt in range(1, attempts + 1):
+            result = self._run_streaming(args, stderr_type, on_output, on_progress, timeout=timeout, env=env,
+                                         stall_timeout=stall_timeout)
+            if result and result.returncode == 0:
+                self.last_failure = None
+                return result
+            self.last_failure = GitFailure.classify(result, self.last_outcome, attempt)
+            if not self.last_failure.retryable or attempt == attempts:
+                break
+            delay = self.RETRY_BASE_DELAY * (2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+            self.console_output.append(("", f"{self.last_failure.label}: {self.last_failure.message}"
+                                            f"（{delay:.0f} 秒后第 {attempt} 次重试）\n", "error"))
+            if self._wait_cancellable(delay):
+                self.last_failure = GitFailure.classify(None, "cancelled", attempt)
+                break
+        return result
+
+    def _run_streaming(self, args, stderr_type, on_output=None, on_progress=None, timeout=600, env=None,
+                       stall_timeout=None):
+        """流式执行命令，同时将输出逐行写入控制台记录"""
+        self.console_output.append(("", f">>> {self.format_command(args)}\n", "command"))
+
+        def on_line(stream_name, line):
+            msg_type = "output" if stream_name == "stdout" else stderr_type
+            self.console_output.append(("", line, msg_type))
+            if on_output:
+                on_output(msg_type, line)
+
+        result = self._stream_command(args, on_line=on_line, on_progress=on_progress, timeout=timeout, env=env,
+                                      stall_timeout=stall_timeout)
+        self.invalidate_snapshot()
+        return result
+
+    def tool_dir(self):
+        """工具自身的数据目录（位于 .git 内，不会被提交），无法定位时返回 None"""
+        if not self.reader.found:
+            return None
+        path = self.reader.common_dir / 'sync-tool'
+        try:
+            path.mkdir(exist_ok=True)
+        except OSError:
+            return None
+        return path
+
+    def reset_console(self, max_lines=1000):
+        """开始新的命令记录；溢出的旧行写入 .git/sync-tool/console.log"""
+        tool_dir = self.tool_dir()
+        spill_path = tool_dir / 'console.log' if tool_dir else None
+        self.console_output = ConsoleLog(max_lines=max_lines, spill_path=spill_path)
+        return self.console_output
+
+    def is_git_repo(self):
+        """
+        检查是否为 Git 仓库
+        对应命令: git rev-parse --is-inside-work-tree（优先直接读取 .git 目录）
+        """
+        inside = self.reader.is_work_tree()
+        if inside is not None:
+            return inside
+        result = self._run_command(["git", "rev-parse", "--is-inside-work-tree"], read_only=True)
+        return result and result.returncode == 0
+
+    def get_snapshot(self, refresh=False):
+        """
+        获取仓库状态快照（同一实例内只执行一次，修改类操作后自动失效）
+        对应命令: git status --porcelain=v2 --branch -z
+        """
+        if self._snapshot is None or refresh:
+            cached = self.watcher.cached_snapshot() if self.watcher and not refresh else None
+            if cached is not None:
+                self._snapshot = cached
+                return cached
+
+            generation = self.watcher.generation if self.watcher else None
+            result = self._run_command(["git", "status", "--porcelain=v2", "--branch", "-z"], read_only=True)
+            if result and result.returncode == 0:
+                self._snapshot = RepoSnapshot.parse(result.stdout)
+                if self.watcher:
+                    self.watcher.store(self._snapshot, generation)
+            else:
+                self._snapshot = RepoSnapshot()
+        return self._snapshot
+
+    def invalidate_snapshot(self):
+        """使状态快照失效，下次读取时重新构建"""
+        self._snapshot = None
+        if self.watcher:
+            self.watcher.invalidate()
+
+    def get_current_branch(self):
+        """
+        获取当前分支名
+        数据来源: .git/HEAD，无法读取时回退到状态快照 (branch.head)
+        """
+        branch = self.reader.current_branch()
+        if branch is not None:
+            return branch
+        snapshot = self.get_snapshot()
+        return snapshot.branch if snapshot.valid else "未知"
+
+    def get_remote_url(self):
+        """
+        获取远程仓库地址
+        对应命令: git remote get-url origin（优先直接读取 .git/config）
+        """
+        if self._remote_url is None:
+            self._remote_url = self.reader.remote_url("origin")
+        if self._remote_url is None:
+            result = self._run_command(["git", "remote", "get-url", "origin"], read_only=True)
+            if result and result.returncode == 0:
+                self._remote_url = result.stdout.strip()
+        return self._remote_url
+
+    def get_status(self):
+        """
+        获取工作区状态（porcelain v1 格式的行列表）
+        数据来源: 状态快照
+        """
+        return self.get_snapshot().status_lines()
+
+    def get_ahead_behind(self):
+        """
+        获取与远程的领先/落后状态
+        数据来源: 状态快照 (branch.ab)
+        """
+        snapshot = self.get_snapshot()
+        return snapshot.ahead, snapshot.behind
+
+    def fetch(self, background=False, on_output=None, on_progress=None):
+        """
+        获取远程更新信息（不合并）
+        对应命令: git fetch --progress
+        background=True 时禁止终端/SSH 交互式认证，避免后台进程挂起等待输入
+        """
+        if background:
+            # 后台获取由 FetchScheduler 自行退避，这里不重试
+            result = self._run_network(["git", "fetch", "--progress"], env=self._background_env(), retries=0)
+        else:
+            result = self._run_network(["git", "fetch", "--progress"], "output", on_output, on_progress)
+        self.invalidate_snapshot()
+        return result and result.returncode == 0
+
+    def _background_env(self):
+        """后台命令的环境变量：禁止终端/SSH 交互式认证（已自行配置 SSH 命令时保持不变）"""
+        env = {'GIT_TERMINAL_PROMPT': '0'}
+        ssh_configured = (os.environ.get('GIT_SSH_COMMAND') or os.environ.get('GIT_SSH')
+                          or self.reader.config_get('core', None, 'sshCommand'))
+        if not ssh_configured:
+            env['GIT_SSH_COMMAND'] = 'ssh -o BatchMode=yes'
+        return env
+
+    def clone(self, url, target, strategy="blobless", depth=1, branch=None, on_output=None, on_progress=None):
+        """
+        克隆远程仓库到 repo_path 下的 target 目录，部分克隆/浅克隆可在几秒内开始工作
+        对应命令: git clone --progress --filter=blob:none <url> <target>（blobless：文件内容按需下载）
+        对应命令: git clone --progress --depth <N> --no-single-branch <url> <target>（shallow：只取最近 N 个提交）
+        对应命令: git clone --progress <url> <target>（full）
+        """
+        options = {
+            "blobless": ["--filter=blob:none"],
+            "shallow": ["--depth", str(int(depth)), "--no-single-branch"],
+            "full": [],
+        }[strategy]
+        cmd = ["git", "clone", "--progress", *options]
+        if branch:
+            cmd += ["--branch", branch]
+        cmd += ["--", url, str(target)]
+        result = self._run_network(cmd, "output", on_output, on_progress)
+        return result and result.returncode == 0
+
+    def is_shallow(self):
+        """
+        是否为浅克隆
+        对应命令: git rev-parse --is-shallow-repository（优先检查 .git/shallow 文件）
+        """
+        if self.reader.found:
+            return (self.reader.common_dir / 'shallow').is_file()
+        result = self._run_command(["git", "rev-parse", "--is-shallow-repository"], read_only=True)
+        return bool(result) and result.stdout.strip() == "true"
+
+    def partial_clone_filter(self):
+        """部分克隆使用的过滤器（如 blob:none），不是部分克隆时返回 None"""
+        return self.reader.config_get('remote', 'origin', 'partialclonefilter')
+
+    def deepen(self, commits=None, background=False, on_output=None, on_progress=None):
+        """
+        加深浅克隆的历史，commits 为 None 时获取完整历史
+        对应命令: git fetch --progress --deepen=<N>
+        对应命令: git fetch --progress --unshallow
+        """
+        cmd = ["git", "fetch", "--progress", f"--deepen={int(commits)}" if commits else "--unshallow"]
+        result = self._run_network(cmd, "output", on_output, on_progress,
+                                   env=self._background_env() if background else None)
+        return result and result.returncode == 0
+
+    def pull(self, on_output=None, on_progress=None):
+        """
+        拉取远程更新并合并，成功后将带来的依赖清单变更记录到 pulled_manifests
+        对应命令: git pull --progress
+        """
+        before = self.get_head_oid()
+        result = self._run_network(["git", "pull", "--progress"], "error", on_output, on_progress)
+        ok = result and result.returncode == 0
+        self.pulled_manifests = []
+        if ok and before:
+            after = self.get_head_oid()
+            if after and after != before:
+                self.pulled_manifests = self.get_manifest_changes(before, after)
+        return ok
+
+    def get_head_oid(self):
+        """
+        HEAD 指向的提交 SHA，空仓库返回 None
+        对应命令: git rev-parse --verify -q HEAD（优先读取 .git 中的引用）
+        """
+        oid = self.reader.resolve_ref("HEAD")
+        if oid:
+            return oid
+        result = self._run_command(["git", "rev-parse", "--verify", "-q", "HEAD"], read_only=True)
+        if result and result.returncode == 0:
+            return result.stdout.strip() or None
+        return None
+
+    def manifest_patterns(self):
+        """依赖清单模式：.git/sync-tool/manifest-patterns（每行一个 glob），不存在时使用默认列表"""
+        tool_dir = self.tool_dir()
+        if tool_dir:
+            try:
+                lines = (tool_dir / 'manifest-patterns').read_text(encoding='utf-8').splitlines()
+                return [line.strip() for line in lines if line.strip()]
+            except OSError:
+                pass
+        return list(DEFAULT_MANIFEST_PATTERNS)
+
+    def set_manifest_patterns(self, patterns):
+        """保存依赖清单模式；与默认列表相同时删除配置文件"""
+        tool_dir = self.tool_dir()
+        if not tool_dir:
+            return False
+        path = tool_dir / 'manifest-patterns'
+        patterns = [p.strip() for p in patterns if p.strip()]
+        try:
+            if patterns == DEFAULT_MANIFEST_PATTERNS:
+                path.unlink(missing_ok=True)
+            else:
+                path.write_text('\n'.join(patterns) + '\n', encoding='utf-8')
+        except OSError:
+            return False
+        return True
+
+    def get_manifest_changes(self, old, new):
+        """
+        两个提交之间变化的依赖清单，以及每个清单在 old..new 中被哪些提交修改
+        对应命令: git diff --name-only -z <old> <new>
+        对应命令: git log --format=... --name-only <old>..<new> -- <清单路径>
+        """
+        result = self._run_command(["git", "diff", "--name-only", "--no-renames", "-z", old, new], read_only=True)
+        if not result or result.returncode != 0:
+            return []
+        paths = match_manifests([p for p in result.stdout.split('\0') if p], self.manifest_patterns())
+        if not paths:
+            return []
+
+        changes = {path: ManifestChange(path) for path in paths}
+        result = self._run_command(
+            ["git", "-c", "core.quotepath=off", "log", "--format=%x01%h%x09%s", "--name-only",
+             f"{old}..{new}", "--", *paths],
+            env={"GIT_LITERAL_PATHSPECS": "1"}, read_only=True,
+        )
+        if result and result.returncode == 0:
+            commit = None
+            for line in result.stdout.splitlines():
+                if line.startswith('\x01'):
+                    sha, _, subject = line[1:].partition('\t')
+                    commit = (sha, subject)
+                elif line in changes and commit:
+                    changes[line].commits.append(commit)
+        return list(changes.values())
+
+    def has_uncommitted_changes(self):
+        """检查是否有未提交的更改"""
+        return len(self.get_snapshot().entries) > 0
+
+    def has_staged_changes(self):
+        """
+        检查暂存区是否有待提交的改动（git commit 会不会有内容可提交）
+        数据来源: 状态快照（暂存操作后自动失效重建）
+        """
+        return any(entry.xy[0] not in ' ?' for entry in self.get_snapshot().entries)
+
+    def add_all(self):
+        """
+        添加所有更改到暂存区（只暂存状态快照中列出的路径）
+        对应命令: git add -A --pathspec-from-file=- --pathspec-file-nul
+        无法读取状态时退回: git add .
+        """
+        if self.get_snapshot().valid:
+            return self.stage_paths()
+        result = self._run_command(["git", "add", "."])
+        self.invalidate_snapshot()
+        if result:
+            self.console_output.append(("", f">>> git add .\n", "command"))
+        return result and result.returncode == 0
+
+    def stage_paths(self, paths=None, chunk_size=1000, renormalize=False):
+        """
+        将指定路径加入暂存区，paths 为 None 时使用状态快照中工作区有变化的路径
+        （已完整暂存的条目无需再次 add；重命名的原路径已在索引中记录删除）
+        路径通过标准输入以 NUL 分隔传入，每次最多 chunk_size 个，避免命令行过长
+        按字面路径匹配（GIT_LITERAL_PATHSPECS），文件名中的 * ? [ 不会被当作通配符
+        对应命令: git add -A --pathspec-from-file=- --pathspec-file-nul
+        renormalize=True 时重新执行过滤器（文件已在暂存区、刚交给 Git LFS 时需要）: git add --renormalize ...
+        """
+        if paths is None:
+            paths = [entry.path for entry in self.get_snapshot().entries if entry.xy[1] != ' ']
+        paths = list(dict.fromkeys(paths))
+        if not paths:
+            return True
+
+        command = ["git", "add", "--renormalize" if renormalize else "-A", "--pathspec-from-file=-", "--pathspec-file-nul"]
+        ok = True
+        for start in range(0, len(paths), chunk_size):
+            chunk = paths[start:start + chunk_size]
+            result = self._run_command(command, env={"GIT_LITERAL_PATHSPECS": "1"},
+                                       input='\0'.join(chunk) + '\0')
+            self.console_output.append(("", f">>> {self.format_command(command)}  ({len(chunk)} 个文件)\n", "command"))
+            if not result or result.returncode != 0:
+                if result and result.stderr:
+                    self.console_output.append(("", result.stderr, "error"))
+                ok = False
+                break
+        self.invalidate_snapshot()
+        return ok
+
+    # ---------- 大文件检查 ----------
+
+    def artifact_patterns(self):
+        """构建产物模式：.git/sync-tool/artifact-patterns（每行一个 glob），不存在时使用默认列表"""
+        tool_dir = self.tool_dir()
+        if tool_dir:
+            try:
+                lines = (tool_dir / 'artifact-patterns').read_text(encoding='utf-8').splitlines()
+                return [line.strip() for line in lines if line.strip()]
+            except OSError:
+                pass
+        return list(DEFAULT_ARTIFACT_PATTERNS)
+
+    def set_artifact_patterns(self, patterns):
+        """保存构建产物模式；与默认列表相同时删除配置文件"""
+        tool_dir = self.tool_dir()
+        if not tool_dir:
+            return False
+        path = tool_dir / 'artifact-patterns'
+        patterns = [p.strip() for p in patterns if p.strip()]
+        try:
+            if patterns == DEFAULT_ARTIFACT_PATTERNS:
+                path.unlink(missing_ok=True)
+            else:
+                path.write_text('\n'.join(patterns) + '\n', encoding='utf-8')
+        except OSError:
+            return False
+        return True
+
+    def size_index(self):
+        """本仓库的文件大小索引（.git/sync-tool/size-index.json），同一进程内只加载一次"""
+        tool_dir = self.tool_dir()
+        key = str(self.reader.common_dir) if tool_dir else None
+        with self._repo_slots_lock:
+            index = self._size_indexes.get(key) if key else None
+            if index is None:
+                index = FileSizeIndex(tool_dir / 'size-index.json' if tool_dir else None)
+                if key:
+                    self._size_indexes[key] = index
+        return index
+
+    def scan_staging_candidates(self, paths=None, max_size=DEFAULT_LARGE_FILE_LIMIT, patterns=None):
+        """
+        暂存前检查：找出超过 max_size 的文件和匹配构建产物模式的文件/目录
+        paths 为 None 时检查状态快照中的全部变更：工作区有变化的路径（与 add_all 相同）和暂存区中已有的改动
+        大小来自文件大小索引，未变化的文件只需 stat；已由 Git LFS 管理的文件不标记
+        对应命令: git ls-files -o --exclude-standard -z -- <未跟踪目录>（仅在有未跟踪目录时）
+        对应命令: git check-attr -z --stdin filter（仅在有命中时）
+        """
+        snapshot = self.get_snapshot()
+        full_scan = paths is None
+        if full_scan:
+            if not snapshot.valid:
+                return StagingScan()
+            paths = [entry.path for entry in snapshot.entries]
+        matcher = ArtifactMatcher(self.artifact_patterns() if patterns is None else patterns)
+        index = self.size_index()
+        # 文件监听在工作区没有任何变化时返回同一个快照对象，上次的检查结果依然有效
+        key = (max_size, tuple(matcher.patterns))
+        cached = index.last_scan
+        if full_scan and self.watcher is not None and cached and cached[0] is snapshot and cached[1] == key:
+            return cached[2]
+
+        # 工作区有变化的路径需要 git add；暂存区已有的改动（包括事先手动 git add 的大文件）同样要检查
+        entries = {entry.path: entry for entry in snapshot.entries}
+        paths = list(dict.fromkeys(paths))
+        scan = StagingScan(valid=True)
+        scan.candidates = [path for path in paths if path not in entries or entries[path].xy[1] != ' ']
+        scan.indexed = {path: entries[path].orig_path for path in paths
+                        if path in entries and entries[path].xy[0] not in ' ?'}
+        hits = {}
+
+        def add_hit(hit_path, pattern, size=None, binary=False):
+            hit = hits.get(hit_path)
+            if hit is None:
+                hit = hits[hit_path] = StagingHit(hit_path, size=size, pattern=pattern, binary=binary,
+                                                  files=1 if size is not None else 0)
+            elif size is not None:
+                hit.size = (hit.size or 0) + size
+                hit.files += 1
+
+        # 未跟踪目录：整个目录匹配产物模式时直接标记，其余展开为会被 git add 的文件（遵循 .gitignore）
+        files = [path for path in scan.indexed if path not in scan.candidates]
+        collapsed = []
+        for path in scan.candidates:
+            if not path.endswith('/'):
+                files.append(path)
+                continue
+            match = matcher.match(path)
+            if match:
+                add_hit(*match)
+            else:
+                collapsed.append(path)
+        if collapsed:
+            result = self._run_command(["git", "ls-files", "-o", "--exclude-standard", "-z", "--", *collapsed],
+                                       env={"GIT_LITERAL_PATHSPECS": "1"}, read_only=True)
+            if result and result.returncode == 0:
+                listed = [name for name in result.stdout.split('\0') if name]
+                for directory in collapsed:
+                    scan.expanded[directory] = []
+                directory = None
+                for name in listed:
+                    if directory is None or not name.startswith(directory):
+                        directory = next((d for d in collapsed if name.startswith(d)), None)
+                    if directory is not None:
+                        scan.expanded[directory].append(name)
+                files.extend(listed)
+
+        sizes = index.lookup(self.repo_path, files)
+        for path in files:
+            if path not in sizes:
+                # 删除（或符号链接、子模块）：暂存删除正是要清理的情况
+                continue
+            size, binary = sizes[path]
+            match = matcher.match(path)
+            if match:
+                add_hit(match[0], match[1], size, binary)
+            if size > max_size:
+                if not match:
+                    add_hit(path, None, size, binary)
+                hit = hits.get(path)
+                if hit is not None:
+                    hit.oversized = True
+        index.save(keep=set(files) if full_scan else None)
+
+        # 已由 Git LFS 管理的文件在暂存时会被替换为指针，不需要提示
+        file_hits = [path for path in hits if not path.endswith('/')]
+        if file_hits:
+            result = self._run_command(["git", "check-attr", "-z", "--stdin", "filter"],
+                                       input='\0'.join(file_hits) + '\0', read_only=True)
+            if result and result.returncode == 0:
+                fields = result.stdout.split('\0')
+                for i in range(0, len(fields) - 2, 3):
+                    if fields[i + 2] == 'lfs':
+                        hits.pop(fields[i], None)
+
+        scan.hits = sorted(hits.values(), key=lambda hit: (hit.size is None, -(hit.size or 0), hit.path))
+        if full_scan:
+            index.last_scan = (snapshot, key, scan)
+        return scan
+
+    def lfs_available(self):
+        """
+        检查是否安装了 Git LFS
+        对应命令: git lfs version
+        """
+        result = self._run_command(["git", "lfs", "version"], read_only=True)
+        return bool(result and result.returncode == 0)
+
+    def track_with_lfs(self, paths):
+        """
+        用 Git LFS 管理指定文件（按字面文件名写入 .gitattributes，之后 git add 时存为指针）
+        对应命令: git lfs install --local
+        对应命令: git lfs track --filename -- <路径>...
+        """
+        if not paths:
+            return True
+        commands = [["git", "lfs", "install", "--local"], ["git", "lfs", "track", "--filename", "--", *paths]]
+        for command in commands:
+            result = self._run_command(command)
+            self.console_output.append(("", f">>> {self.format_command(command)}\n", "command"))
+            if result and result.stdout:
+                self.console_output.append(("", result.stdout, "output"))
+            if not result or result.returncode != 0:
+                if result and result.stderr:
+                    self.console_output.append(("", result.stderr, "error"))
+                return False
+        return True
+
+    def stage_scanned(self, scan, skip=(), lfs=()):
+        """
+        按暂存前检查的结果暂存：跳过 skip 中的命中项，lfs 中的文件先交给 Git LFS 再暂存
+        对应命令: git lfs track --filename -- <lfs 路径>（有 lfs 时）
+        对应命令: git add -A --pathspec-from-file=- --pathspec-file-nul
+        对应命令: git reset -q --pathspec-from-file=- --pathspec-file-nul（跳过的项已在暂存区时）
+        检查无效（无法读取状态）时退回 add_all
+        """
+        if not scan.valid:
+            return self.add_all()
+        if lfs and not self.track_with_lfs(list(lfs)):
+            return False
+        paths = scan.stage_list(skip)
+        if lfs:
+            paths.append('.gitattributes')
+        if not self.stage_paths(paths):
+            return False
+        renormalize = [path for path in lfs if path in scan.indexed]
+        if renormalize and not self.stage_paths(renormalize, renormalize=True):
+            return False
+        # 事先已暂存的命中项同样跳过：从暂存区撤回（文件保留在工作区）
+        return self.unstage_paths(scan.unstage_list(skip))
+
+    def unstage_paths(self, paths):
+        """
+        将路径从暂存区撤回，工作区文件不变
+        对应命令: git reset -q --pathspec-from-file=- --pathspec-file-nul
+        尚无提交时: git rm --cached -r -q --ignore-unmatch --pathspec-from-file=- --pathspec-file-nul
+        """
+        if not paths:
+            return True
+        if self.get_snapshot().oid:
+            command = ["git", "reset", "-q", "--pathspec-from-file=-", "--pathspec-file-nul"]
+        else:
+            command = ["git", "rm", "--cached", "-r", "-q", "--ignore-unmatch",
+                       "--pathspec-from-file=-", "--pathspec-file-nul"]
+        result = self._run_command(command, env={"GIT_LITERAL_PATHSPECS": "1"}, input='\0'.join(paths) + '\0')
+        self.console_output.append(("", f">>> {self.format_command(command)}  ({len(paths)} 个文件)\n", "command"))
+        self.invalidate_snapshot()
+        if not result or result.returncode != 0:
+            if result and result.stderr:
+                self.console_output.append(("", result.stderr, "error"))
+            return False
+        return True
+
+    def commit(self, message, paths=None):
+        """
+        提交更改，指定 paths 时只提交这些路径（索引中其他已暂存的改动保持不变）
+        对应命令: git commit -m "message"
+        对应命令: git commit -m "message" --pathspec-from-file=- --pathspec-file-nul
+        """
+        # 提交信息作为独立参数传入，无需转义
+        cmd = ["git", "commit", "-m", message]
+        if paths:
+            result = self._run_command(cmd + ["--pathspec-from-file=-", "--pathspec-file-nul"],
+                                       env={"GIT_LITERAL_PATHSPECS": "1"}, input='\0'.join(paths) + '\0')
+        else:
+            result = self._run_command(cmd)
+        self.invalidate_snapshot()
+        if result:
+            self.console_output.append(("", f'>>> {self.format_command(cmd)}\n', "command"))
+            if result.stdout:
+                self.console_output.append(("", result.stdout, "output"))
+            if result.stderr:
+                self.console_output.append(("", result.stderr, "output"))
+        return result and result.returncode == 0
+
+    def push(self, force=False, set_upstream=True, on_output=None, on_progress=None, background=False):
+        """
+        推送到远程仓库
+        对应命令: git push --progress 或 git push --progress --force
+        对应命令: git push --progress -u origin <branch> (新分支设置上游)
+        background=True 时禁止终端/SSH 交互式认证，避免后台进程挂起等待输入
+        """
+        current_branch = self.get_current_branch()
+
+        # 检查是否有 upstream，优先读取 .git/config 与 refs
+        has_upstream = self.reader.has_upstream(current_branch)
+        if has_upstream is None:
+            result = self._run_command(["git", "rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}"],
+                                       read_only=True)
+            has_upstream = bool(result) and result.returncode == 0
+
+        if not has_upstream and set_upstream:
+            # 新分支，使用 -u 设置上游
+            cmd = ["git", "push", "--progress", "-u", "origin", current_branch]
+        else:
+            cmd = ["git", "push", "--progress"]
+        if force:
+            cmd.append("--force")
+
+        env = self._background_env() if background else None
+        result = self._run_network(cmd, "output", on_output, on_progress, env=env)
+        return result and result.returncode == 0
+
+    def get_tracked_branches(self):
+        """
+        列出所有设置了上游的本地分支及其领先/落后数（一次命令完成）
+        只查询 refs/heads，不构建包含全部远程分支的分支索引（索引只供分支选择器使用）
+        对应命令: git for-each-ref --format=... refs/heads
+        """
+        fmt = "%(refname)%00%(upstream:remotename)%00%(upstream:remoteref)%00%(upstream:track,nobracket)"
+        result = self._run_command(["git", "for-each-ref", f"--format={fmt}", "refs/heads"], read_only=True)
+        if not result or result.returncode != 0:
+            return []
+        branches = []
+        for line in result.stdout.splitlines():
+            refname, remote, merge_ref, track = (line.split('\0') + ['', '', ''])[:4]
+            if not remote or not merge_ref or not refname.startswith('refs/heads/'):
+                continue
+            ahead, behind, gone = TrackedBranch.parse_track(track)
+            branches.append(TrackedBranch(refname[len('refs/heads/'):], remote, merge_ref, ahead, behind, gone))
+        return branches
+
+    def get_ahead_branches(self):
+        """
+        可以直接快进推送的分支：领先上游且不落后（已分叉的分支需要先拉取合并）
+        返回 (可推送分支列表, 已分叉分支列表)
+        """
+        pushable, diverged = [], []
+        for branch in self.get_tracked_branches():
+            if branch.gone or branch.ahead == 0:
+                continue
+            (diverged if branch.behind else pushable).append(branch)
+        return pushable, diverged
+
+    def push_ahead_branches(self, branches=None, on_output=None, on_progress=None):
+        """
+        在一次连接中原子地推送所有领先的分支（每个远程一次 push），无需逐个切换分支
+        任一引用被拒绝时该远程上的所有引用都不会更新
+        对应命令: git push --atomic --porcelain --progress <remote> refs/heads/a:<upstream> ...
+        返回 [PushRefResult]
+        """
+        if branches is None:
+            branches, _ = self.get_ahead_branches()
+        by_remote = {}
+        for branch in branches:
+            by_remote.setdefault(branch.remote, []).append(branch)
+
+        results = []
+        for remote, items in by_remote.items():
+            refspecs = [f"refs/heads/{b.name}:{b.merge_ref}" for b in items]
+            result = self._run_network(["git", "push", "--atomic", "--porcelain", "--progress", remote, *refspecs],
+                                       "output", on_output, on_progress)
+            parsed = PushRefResult.parse_porcelain(remote, result.stdout) if result else []
+            reported = {r.branch for r in parsed}
+            for branch in items:
+                if branch.name not in reported:
+                    # 连接失败或服务器不支持 --atomic 时没有逐引用结果
+                    message = (result.stderr.strip().splitlines() or ["推送失败"])[-1] if result else "命令执行超时"
+                    parsed.append(PushRefResult(branch.name, remote, False, '!', message))
+            if result and result.returncode != 0:
+                # 原子推送失败时，未被拒绝的引用实际上也没有更新
+                parsed = [r if not r.ok or r.flag == '=' else PushRefResult(r.branch, remote, False, '!', "atomic push failed")
+                          for r in parsed]
+            results.extend(parsed)
+        return results
+
+    def check_remote_has_updates(self):
+        """
+        检查远程是否有新提交（本地落后远程），复用状态快照，不单独启动进程
+        数据来源: 状态快照中的 branch.ab（git status --porcelain=v2 --branch，基于最近一次获取的远程分支）
+        """
+        ahead, behind = self.get_ahead_behind()
+        return behind > 0
+
+    def get_config_files_status(self):
+        """
+        检查未提交的更改中是否有依赖清单（按 manifest_patterns 的 glob 匹配完整路径）
+        对应文件: package.json, requirements*.txt, .env.example 等
+        """
+        return match_manifests([entry.path for entry in self.get_snapshot().entries], self.manifest_patterns())
+
+    def set_remote_url(self, url, remote_name="origin"):
+        """
+        设置远程仓库地址
+        对应命令: git remote set-url origin <url>
+        """
+        cmd = ["git", "remote", "set-url", remote_name, url]
+        result = self._run_command(cmd)
+        if result:
+            self.console_output.append(("", f'>>> {self.format_command(cmd)}\n', "command"))
+            if result.stdout:
+                self.console_output.append(("", result.stdout, "output"))
+            if result.stderr:
+                self.console_output.append(("", result.stderr, "output"))
+        return result and result.returncode == 0
+
+    def get_branch_index(self, refresh=False):
+        """
+        获取分支索引，引用未变化时直接使用缓存（不启动进程）
+        对应命令: git for-each-ref --format=... refs/heads refs/remotes
+        """
+        key = str(self.reader.common_dir) if self.reader.found else None
+        signature = self.reader.refs_signature()
+        cached = self.branch_index_cache.get(key) if key else None
+        if not refresh and signature is not None and cached and cached[0] == signature:
+            return cached[1]
+
+        result = self._run_command(["git", "for-each-ref", f"--format={BranchIndex.FORMAT}", "refs/heads", "refs/remotes"],
+                                   read_only=True)
+        if not result or result.returncode != 0:
+            return BranchIndex()
+        index = BranchIndex.parse(result.stdout)
+        if key and signature is not None:
+            self.branch_index_cache[key] = (signature, index)
+        return index
+
+    def get_all_branches(self):
+        """
+        获取所有分支（本地和 origin 上的远程分支）
+        对应命令: git for-each-ref refs/heads refs/remotes（分支索引）
+        """
+        index = self.get_branch_index()
+        branches = [{'name': b.name, 'current': b.current, 'is_remote': False} for b in index.local.values()]
+        branches += [{'name': name, 'current': False, 'is_remote': True} for name in index.remote_branch_names()]
+        return branches
+
+    def get_local_branches(self):
+        """
+        获取本地分支列表
+        对应命令: git for-each-ref refs/heads（分支索引）
+        """
+        return [{'name': b.name, 'current': b.current} for b in self.get_branch_index().local.values()]
+
+    def get_remote_branches(self):
+        """
+        获取 origin 上的远程分支名列表（不含 origin/ 前缀）
+        对应命令: git for-each-ref refs/remotes（分支索引）
+        """
+        return self.get_branch_index().remote_branch_names()
+
+    def create_branch(self, branch_name):
+        """
+        创建新分支
+        对应命令: git checkout -b <branch_name>
+        """
+        cmd = ["git", "checkout", "-b", branch_name]
+        result = self._run_command(cmd)
+        self.invalidate_snapshot()
+        if result:
+            self.console_output.append(("", f'>>> {self.format_command(cmd)}\n', "command"))
+            if result.stdout:
+                self.console_output.append(("", result.stdout, "output"))
+            if result.stderr:
+                self.console_output.append(("", result.stderr, "output"))
+        return result and result.returncode == 0
+
+    def switch_branch(self, branch_name):
+        """
+        切换分支
+        对应命令: git checkout <branch_name>
+        """
+        cmd = ["git", "checkout", branch_name]
+        result = self._run_command(cmd)
+        self.invalidate_snapshot()
+        if result:
+            self.console_output.append(("", f'>>> {self.format_command(cmd)}\n', "command"))
+            if result.stdout:
+                self.console_output.append(("", result.stdout, "output"))
+            if result.stderr:
+                self.console_output.append(("", result.stderr, "output"))
+        return result and result.returncode == 0
+
+    def delete_branch(self, branch_name, force=False):
+        """
+        删除本地分支
+        对应命令: git branch -d/-D <branch_name>
+        """
+        flag = '-D' if force else '-d'
+        cmd = ["git", "branch", flag, branch_name]
+        result = self._run_command(cmd)
+        self.invalidate_snapshot()
+        if result:
+            self.console_output.append(("", f'>>> {self.format_command(cmd)}\n', "command"))
+            if result.stdout:
+                self.console_output.append(("", result.stdout, "output"))
+            if result.stderr:
+                self.console_output.append(("", result.stderr, "output"))
+        return result and result.returncode == 0
+
+    def create_and_checkout_branch(self, branch_name, start_point=None):
+        """
+        创建并切换到新分支
+        对应命令: git checkout -b <branch_name> [start_point]
+        """
+        cmd = ["git", "checkout", "-b", branch_name]
+        if start_point:
+            cmd.append(start_point)
+        result = self._run_command(cmd)
+        self.invalidate_snapshot()
+        if result:
+            self.console_output.append(("", f'>>> {self.format_command(cmd)}\n', "command"))
+            if result.stdout:
+                self.console_output.append(("", result.stdout, "output"))
+            if result.stderr:
+                self.console_output.append(("", result.stderr, "output"))
+        return result and result.returncode == 0
+
+
+# ==================== 异步查询 ====================
+
+class AsyncGitOperations:
+    """
+    GitOperations 的 asyncio 版本 - 相互独立的只读查询并发执行
+    基于 asyncio.create_subprocess_exec（参数列表，不经过 shell），同时运行的进程数由信号量限制，
+    并与同步调用共用本仓库的进程名额（GitOperations.MAX_PROCESSES_PER_REPO）
+    结果写回所包装的 GitOperations（状态快照、分支索引缓存），之后的同步调用直接命中缓存
+    """
+
+    # 待执行的查询少于此数时逐条同步执行：单条查询不值得创建事件循环
+    MIN_CONCURRENT_READS = 2
+
+    def __init__(self, git_ops=None, repo_path=".", max_concurrency=4):
+        self.git_ops = git_ops or GitOperations(repo_path)
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def _limit(self):
+        """当前事件循环的信号量（Python 3.8/3.9 的信号量绑定创建时的事件循环）"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run(self, *args, timeout=None):
+        """
+        执行 git 子命令，返回 CompletedProcess；超时或异常时返回 None
+        对应底层: asyncio.create_subprocess_exec("git", *args)
+        timeout 默认取只读查询的总时限（GitOperations.TIMEOUT_POLICIES["read"]）
+        """
+        import asyncio
+        git_ops = self.git_ops
+        if timeout is None:
+            timeout = git_ops.TIMEOUT_POLICIES["read"][0]
+        command = git_ops.format_command(["git", *args])
+        slots = git_ops.repo_slots()
+        async with self._limit():
+            start = time.monotonic()
+            # 与同步调用共用本仓库的进程名额；名额已满时在线程中等待，不阻塞事件循环
+            if not slots.acquire(blocking=False) and not await self._acquire_slot(slots, timeout):
+                git_ops._record(command, start, outcome="timeout")
+                return None
+            try:
+                try:
+                    process = await asyncio.create_subprocess_exec(
+                        "git", *args,
+                        cwd=str(git_ops.repo_path),
+                        env=git_ops._command_env(read_only=True),
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.PIPE,
+                    )
+                except OSError:
+                    git_ops._record(command, start, outcome="exception")
+                    return None
+                try:
+                    stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    git_ops._record(command, start, outcome="timeout")
+                    return None
+                except asyncio.CancelledError:
+                    # 回收进程后再归还名额，避免名额已释放而进程仍在运行（或成为僵尸进程）
+                    process.kill()
+                    await process.wait()
+                    git_ops._record(command, start, outcome="cancelled")
+                    raise
+            finally:
+                slots.release()
+        result = subprocess.CompletedProcess(
+            command, process.returncode,
+            stdout.decode('utf-8', errors='replace'), stderr.decode('utf-8', errors='replace'),
+        )
+        self.git_ops._record(command, start, result)
+        return result
+
+    @staticmethod
+    async def _acquire_slot(slots, timeout):
+        """
+        在线程中等待进程名额，返回是否拿到
+        等待期间任务被取消时，线程里的 acquire 仍会完成：由取消方或线程（谁后到谁负责）归还名额
+        """
+        import asyncio
+        lock = threading.Lock()
+        state = {"acquired": False, "abandoned": False}
+
+        def acquire():
+            ok = slots.acquire(True, timeout)
+            with lock:
+                if ok and state["abandoned"]:
+                    slots.release()
+                    return False
+                state["acquired"] = ok
+            return ok
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, acquire)
+        except asyncio.CancelledError:
+            with lock:
+                state["abandoned"] = True
+                if state["acquired"]:
+                    slots.release()
+            raise
+
+    async def gather(self, *aws, return_exceptions=False):
+        """并发等待多个查询，按传入顺序返回结果（进程数受 max_concurrency 限制）"""
+        import asyncio
+        return await asyncio.gather(*aws, return_exceptions=return_exceptions)
+
+    # ---------- 查询 ----------
+
+    async def get_snapshot(self, refresh=False):
+        """
+        获取仓库状态快照（与 GitOperations.get_snapshot 共用缓存）
+        对应命令: git status --porcelain=v2 --branch -z
+        """
+        git_ops = self.git_ops
+        if git_ops._snapshot is not None and not refresh:
+            return git_ops._snapshot
+        cached = git_ops.watcher.cached_snapshot() if git_ops.watcher and not refresh else None
+        if cached is not None:
+            git_ops._snapshot = cached
+            return cached
+
+        generation = git_ops.watcher.generation if git_ops.watcher else None
+        result = await self._run("status", "--porcelain=v2", "--branch", "-z")
+        if result and result.returncode == 0:
+            git_ops._snapshot = RepoSnapshot.parse(result.stdout)
+            if git_ops.watcher:
+                git_ops.watcher.store(git_ops._snapshot, generation)
+        else:
+            git_ops._snapshot = RepoSnapshot()
+        return git_ops._snapshot
+
+    async def get_branch_index(self, refresh=False):
+        """
+        获取分支索引（与 GitOperations.get_branch_index 共用缓存）
+        对应命令: git for-each-ref --format=... refs/heads refs/remotes
+        """
+        git_ops = self.git_ops
+        key = str(git_ops.reader.common_dir) if git_ops.reader.found else None
+        signature = git_ops.reader.refs_signature()
+        cached = git_ops.branch_index_cache.get(key) if key else None
+        if not refresh and signature is not None and cached and cached[0] == signature:
+            return cached[1]
+
+        result = await self._run("for-each-ref", f"--format={BranchIndex.FORMAT}", "refs/heads", "refs/remotes")
+        if not result or result.returncode != 0:
+            return BranchIndex()
+        index = BranchIndex.parse(result.stdout)
+        if key and signature is not None:
+            git_ops.branch_index_cache[key] = (signature, index)
+        return index
+
+    async def get_current_branch(self):
+        """获取当前分支名（.git/HEAD，无法读取时使用状态快照）"""
+        branch = self.git_ops.reader.current_branch()
+        if branch is not None:
+            return branch
+        snapshot = await self.get_snapshot()
+        return snapshot.branch if snapshot.valid else "未知"
+
+    async def get_remote_url(self):
+        """
+        获取远程仓库地址
+        对应命令: git remote get-url origin（优先直接读取 .git/config）
+        """
+        git_ops = self.git_ops
+        if git_ops._remote_url is None:
+            git_ops._remote_url = git_ops.reader.remote_url("origin")
+        if git_ops._remote_url is None:
+            result = await self._run("remote", "get-url", "origin")
+            if result and result.returncode == 0:
+                git_ops._remote_url = result.stdout.strip()
+        return git_ops._remote_url
+
+    async def get_status(self):
+        """工作区状态（porcelain v1 格式的行列表）"""
+        return (await self.get_snapshot()).status_lines()
+
+    async def get_ahead_behind(self):
+        """与上游的领先/落后数"""
+        snapshot = await self.get_snapshot()
+        return snapshot.ahead, snapshot.behind
+
+    async def get_local_branches(self):
+        """本地分支列表（分支索引）"""
+        await self.get_branch_index()
+        return self.git_ops.get_local_branches()
+
+    async def get_remote_branches(self):
+        """origin 上的远程分支列表（分支索引）"""
+        await self.get_branch_index()
+        return self.git_ops.get_remote_branches()
+
+    # ---------- 页面读取阶段 ----------
+
+    def _pending_reads(self, refresh):
+        """
+        尚未命中缓存、需要启动进程的查询，返回 [(异步版本, 同步版本)]
+        返回函数而不是协程对象：走同步路径时不会留下未等待的协程
+        """
+        git_ops = self.git_ops
+        pending = []
+        if refresh or (git_ops._snapshot is None
+                       and not (git_ops.watcher and git_ops.watcher.cached_snapshot() is not None)):
+            pending.append((lambda: self.get_snapshot(refresh), lambda: git_ops.get_snapshot(refresh)))
+        if git_ops._remote_url is None and git_ops.reader.remote_url("origin") is None:
+            pending.append((self.get_remote_url, git_ops.get_remote_url))
+        return pending
+
+    def prefetch(self, refresh=False):
+        """
+        执行页面读取阶段的查询（状态快照、远程地址）
+        至少 MIN_CONCURRENT_READS 条需要启动进程时并发执行，耗时约等于最慢的一条；
+        否则逐条同步执行（远程地址通常可直接读取 .git/config，只剩状态快照一条，创建事件循环反而更慢）
+        不包括分支索引：它只在打开分支选择器时按需加载，不随每次页面刷新重建
+        返回需要执行的查询数
+        """
+        pending = self._pending_reads(refresh)
+        if len(pending) < self.MIN_CONCURRENT_READS:
+            for _, read in pending:
+                read()
+            return len(pending)
+        import asyncio
+        asyncio.run(self.gather(*(read() for read, _ in pending)))
+        return len(pending)
+
+
+# ==================== 后台任务 ====================
+
+class FetchScheduler:
+    """
+    后台定时执行 git fetch，使领先/落后状态保持最新而不阻塞页面
+    每次间隔带随机抖动，失败时按指数退避
+    """
+
+    MAX_BACKOFF_EXPONENT = 6
+
+    def __init__(self, repo_path=".", interval=300, jitter=0.1, max_backoff=3600):
+        self.git_ops = GitOperations(repo_path)
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.last_fetch_time = None     # 最近一次成功获取的时间戳
+        self.last_error_time = None
+        self.failures = 0
+        self.lock = threading.Lock()    # 与前台的拉取/推送互斥，避免争抢引用锁
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._force = False
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动后台线程（已运行时忽略）"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="git-fetch-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程（中止正在进行的获取）"""
+        self._stop.set()
+        self._wake.set()
+        if self.running:
+            self.git_ops.cancel()
+
+    def set_interval(self, seconds):
+        """修改获取间隔，立即按新间隔重新计时"""
+        if seconds != self.interval:
+            self.interval = seconds
+            self._wake.set()
+
+    def trigger(self):
+        """立即执行一次获取"""
+        self._force = True
+        self._wake.set()
+
+    def next_delay(self):
+        """计算下一次获取前的等待秒数（退避 + 抖动）"""
+        exponent = min(self.failures, self.MAX_BACKOFF_EXPONENT)
+        delay = min(self.interval * (2 ** exponent), max(self.max_backoff, self.interval))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def seconds_since_fetch(self):
+        """距离上次成功获取的秒数，从未成功返回 None"""
+        if self.last_fetch_time is None:
+            return None
+        return time.time() - self.last_fetch_time
+
+    def fetch_now(self):
+        """
+        执行一次获取并记录结果（失败不在此重试，由调度循环退避）
+        对应命令: git fetch --progress（GIT_TERMINAL_PROMPT=0、ssh BatchMode，禁止交互式认证，避免后台挂起）
+        """
+        with self.lock:
+            ok = self.git_ops.fetch(background=True)
+        if ok:
+            self.last_fetch_time = time.time()
+            self.failures = 0
+        else:
+            self.last_error_time = time.time()
+            self.failures += 1
+        return ok
+
+    def _loop(self):
+        delay = 0
+        while not self._stop.is_set():
+            woken = self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            # 仅修改间隔时不立即获取，按新间隔重新计时
+            since = self.seconds_since_fetch()
+            if woken and not self._force and since is not None and since < self.interval:
+                delay = self.interval - since
+                continue
+            self._force = False
+            self.fetch_now()
+            delay = self.next_delay()
+
+
+class HistoryDeepener:
+    """
+    在后台加深浅克隆的历史，页面刷新时读取 progress / ok 显示进度与结果
+    与前台的拉取/推送共用同一把锁
+    """
+
+    def __init__(self, repo_path=".", lock=None):
+        self.git_ops = GitOperations(repo_path)
+        self.lock = lock or threading.Lock()
+        self.commits = None             # 本次加深的提交数，None 表示获取完整历史
+        self.progress = None            # 最近一次解析到的 GitProgress
+        self.ok = None                  # 最近一次结果，运行中为 None
+        self.failure = None             # 最近一次失败的原因（GitFailure）
+        self.finished_time = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, commits=None):
+        """开始加深（已在运行时返回 False）"""
+        if self.running:
+            return False
+        self.commits, self.progress, self.ok = commits, None, None
+        self._thread = threading.Thread(target=self._run, name="git-deepen", daemon=True)
+        self._thread.start()
+        return True
+
+    def cancel(self):
+        """中止正在进行的加深（已获取的部分不会保留）"""
+        self.git_ops.cancel()
+
+    def _run(self):
+        def on_progress(progress):
+            self.progress = progress
+
+        self.git_ops.reset_console()
+        with self.lock:
+            ok = self.git_ops.deepen(self.commits, background=True, on_progress=on_progress)
+        self.ok = bool(ok)
+        self.failure = self.git_ops.last_failure
+        self.finished_time = time.time()
+
+
+# ==================== 依赖安装 ====================
+
+# (生态, 标志文件, 参与哈希的文件, 安装命令)；同一目录同一生态只取第一条匹配的规则
+DEPENDENCY_INSTALLERS = [
+    ("node", "pnpm-lock.yaml", ["package.json", "pnpm-lock.yaml"], "pnpm install --frozen-lockfile"),
+    ("node", "yarn.lock", ["package.json", "yarn.lock"], "yarn install --frozen-lockfile"),
+    ("node", "package-lock.json", ["package.json", "package-lock.json"], "npm ci"),
+    ("node", "package.json", ["package.json"], "npm install"),
+    ("python", "poetry.lock", ["pyproject.toml", "poetry.lock"], "poetry install --no-root"),
+    ("python", "Pipfile.lock", ["Pipfile", "Pipfile.lock"], "pipenv sync"),
+    ("python", "requirements.txt", ["requirements.txt"], "{python} -m pip install -r requirements.txt"),
+    ("maven", "pom.xml", ["pom.xml"], "mvn -q dependency:resolve"),
+    ("gradle", "build.gradle.kts", ["build.gradle.kts", "settings.gradle.kts"], "{gradle} --quiet dependencies"),
+    ("gradle", "build.gradle", ["build.gradle", "settings.gradle"], "{gradle} --quiet dependencies"),
+    ("go", "go.mod", ["go.mod", "go.sum"], "go mod download"),
+    ("rust", "Cargo.toml", ["Cargo.toml", "Cargo.lock"], "cargo fetch"),
+    ("ruby", "Gemfile", ["Gemfile", "Gemfile.lock"], "bundle install"),
+    ("php", "composer.json", ["composer.json", "composer.lock"], "composer install"),
+]
+
+
+@dataclass
+class InstallTask:
+    """某个目录下一个生态的依赖安装"""
+    directory: str          # 相对仓库根目录，根目录为 ""
+    ecosystem: str
+    command: str
+    digest: str             # 依赖文件当前内容的哈希
+    cached_digest: str = None
+    status: str = "pending"     # pending / running / ok / failed / missing（未安装对应工具）
+
+    @property
+    def key(self):
+        return f"{self.directory or '.'}::{self.ecosystem}"
+
+    @property
+    def changed(self):
+        return self.digest != self.cached_digest
+
+
+class DependencyInstaller:
+    """
+    依赖安装缓存 - 对依赖清单/锁文件内容做哈希，与上次成功安装时的哈希比较，只在变化时安装
+    缓存按仓库（.git/sync-tool/install-cache.json）和位置（Office/Home/...）分别保存
+    安装在后台线程中依次执行（不占用 git 操作的锁），输出写入 console_output
+    """
+
+    def __init__(self, repo_path="."):
+        self.git_ops = GitOperations(repo_path)
+        self.tasks = []
+        self.location = None
+        self.finished_time = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def console_output(self):
+        return self.git_ops.console_output
+
+    def _cache_path(self):
+        tool_dir = self.git_ops.tool_dir()
+        return tool_dir / 'install-cache.json' if tool_dir else None
+
+    def load_cache(self):
+        """{位置: {目录::生态: 哈希}}"""
+        path = self._cache_path()
+        if not path:
+            return {}
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_digest(self, task):
+        path = self._cache_path()
+        if not path:
+            return
+        cache = self.load_cache()
+        cache.setdefault(self.location, {})[task.key] = task.digest
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            tmp_path.write_text(json.dumps(cache, ensure_ascii=False, indent=1), encoding='utf-8')
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def find_manifests(self):
+        """
+        列出仓库中跟踪的标志文件所在目录
+        对应命令: git ls-files -z -- ':(glob)**/package.json' ...
+        返回 {目录: {文件名}}
+        """
+        markers = sorted({marker for _, marker, _, _ in DEPENDENCY_INSTALLERS})
+        pathspecs = [f":(glob)**/{marker}" for marker in markers]
+        result = self.git_ops._run_command(["git", "ls-files", "-z", "--", *pathspecs], read_only=True)
+        found = {}
+        if result and result.returncode == 0:
+            for path in result.stdout.split('\0'):
+                if path:
+                    directory, _, name = path.rpartition('/')
+                    found.setdefault(directory, set()).add(name)
+        return found
+
+    @staticmethod
+    def _digest(directory, files):
+        """按文件名顺序对存在的文件内容做 SHA-256"""
+        import hashlib
+        digest = hashlib.sha256()
+        for name in files:
+            try:
+                with open(directory / name, 'rb') as f:
+                    digest.update(name.encode('utf-8') + b'\0')
+                    for chunk in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(chunk)
+            except OSError:
+                continue
+        return digest.hexdigest()
+
+    def plan(self, location):
+        """计算每个目录/生态的哈希，返回全部任务（changed 为 True 的需要安装）"""
+        cached = self.load_cache().get(location, {})
+        root = self.git_ops.repo_path
+        tasks = []
+        for directory, names in sorted(self.find_manifests().items()):
+            seen = set()
+            for ecosystem, marker, files, command in DEPENDENCY_INSTALLERS:
+                if ecosystem in seen or marker not in names:
+                    continue
+                seen.add(ecosystem)
+                path = root / directory
+                if '{gradle}' in command:
+                    command = command.format(gradle="./gradlew" if (path / 'gradlew').is_file() else "gradle")
+                command = command.replace('{python}', shlex.quote(sys.executable))
+                task = InstallTask(directory, ecosystem, command, self._digest(path, files))
+                task.cached_digest = cached.get(task.key)
+                tasks.append(task)
+        return tasks
+
+    def start(self, location, tasks=None):
+        """在后台依次执行有变化的安装任务（已在运行时返回 False）"""
+        if self.running:
+            return False
+        self.location = location
+        self.tasks = [task for task in (tasks if tasks is not None else self.plan(location)) if task.changed]
+        self.git_ops.reset_console()
+        self._thread = threading.Thread(target=self._run, name="dependency-install", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self):
+        for task in self.tasks:
+            executable = shlex.split(task.command)[0]
+            if not (shutil.which(executable) or os.path.isfile(self.git_ops.repo_path / task.directory / executable)):
+                task.status = "missing"
+                self.console_output.append(("", f"未找到 {executable}，跳过 {task.directory or '.'}\n", "error"))
+                continue
+            task.status = "running"
+            self.console_output.append(("", f">>> ({task.directory or '.'}) {task.command}\n", "command"))
+
+            def on_line(stream_name, line):
+                self.console_output.append(("", line, "output"))
+
+            # 不经过 shell；按 PATH 解析可执行文件（Windows 上可找到 npm.cmd 等）
+            args = shlex.split(task.command)
+            if '/' not in args[0]:
+                args[0] = shutil.which(args[0]) or args[0]
+            result = self.git_ops._stream_command(args, on_line=on_line, timeout=1800,
+                                                  cwd=self.git_ops.repo_path / task.directory)
+            if result and result.returncode == 0:
+                task.status = "ok"
+                self._save_digest(task)
+            else:
+                task.status = "failed"
+        self.finished_time = time.time()
+
+
+# ==================== 文件监听 ====================
+
+class TreeWatcher:
+    """
+    监听工作区与 .git（index、HEAD、refs）的变化，只在相关事件发生时使缓存的状态快照失效
+    Linux 上通过 ctypes 调用 inotify，其他平台或 inotify 不可用时退回到定期轮询文件元数据
+    """
+
+    # .git 目录下会影响 git status 结果的文件
+    GIT_FILES = {'index', 'HEAD', 'packed-refs', 'MERGE_HEAD', 'CHERRY_PICK_HEAD', 'REVERT_HEAD', 'REBASE_HEAD'}
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                  | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+    def __init__(self, repo_path=".", poll_interval=2.0):
+        self.reader = GitDirReader(repo_path)
+        self.poll_interval = poll_interval
+        self.backend = None             # "inotify" / "polling"
+        self.generation = 0             # 每次相关变化加一
+        self.tree_generation = 0        # 只计工作区文件的变化（不含 .git 内部、引用更新与本工具的暂存/提交）
+        self.ready = False
+        self._lock = threading.Lock()
+        self._cached = None             # (generation, RepoSnapshot)
+        self._stop = threading.Event()
+        self._thread = None
+        self._watches = {}              # wd -> (目录, 类型)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动监听线程（已运行时忽略）"""
+        if self.running or not self.reader.found:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="git-tree-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监听，并丢弃缓存"""
+        self._stop.set()
+        self.ready = False
+        self.invalidate()
+
+    # ---------- 缓存 ----------
+
+    def invalidate(self, tree=False):
+        """标记状态已过期；tree=True 表示工作区文件发生了变化"""
+        with self._lock:
+            self.generation += 1
+            if tree:
+                self.tree_generation += 1
+            self._cached = None
+
+    def cached_snapshot(self):
+        """自上次构建以来没有相关变化时返回缓存的快照，否则返回 None"""
+        with self._lock:
+            if self.ready and self._cached and self._cached[0] == self.generation:
+                return self._cached[1]
+        return None
+
+    def store(self, snapshot, generation):
+        """保存快照；generation 为执行 git status 之前读取的值，期间发生变化则不缓存"""
+        with self._lock:
+            if generation == self.generation:
+                self._cached = (generation, snapshot)
+
+    # ---------- 监听实现 ----------
+
+    def _run(self):
+        try:
+            if sys.platform.startswith('linux') and self._run_inotify():
+                return
+        except OSError:
+            pass
+        self._run_polling()
+
+    def _iter_tree_dirs(self, root):
+        """遍历工作区目录（跳过 .git 及嵌套仓库的 .git）"""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            yield directory
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name != '.git' and entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _run_inotify(self):
+        """inotify 监听；初始化失败返回 False 以退回轮询"""
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            return False
+
+        def add_watch(directory, kind):
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), self.WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch 失败: {directory}")
+            self._watches[wd] = (directory, kind)
+
+        try:
+            for directory in self._iter_tree_dirs(str(self.reader.work_tree)):
+                add_watch(directory, "tree")
+            add_watch(str(self.reader.git_dir), "git")
+            if self.reader.common_dir != self.reader.git_dir:
+                add_watch(str(self.reader.common_dir), "git")
+            for directory in self._iter_tree_dirs(str(self.reader.common_dir / 'refs')):
+                add_watch(directory, "refs")
+        except OSError:
+            # 超出 fs.inotify.max_user_watches 等情况
+            os.close(fd)
+            self._watches.clear()
+            return False
+
+        self.backend = "inotify"
+        self.invalidate()
+        self.ready = True
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd], [], [], 1.0)
+                if not readable:
+                    continue
+                try:
+                    data = os.read(fd, 65536)
+                except BlockingIOError:
+                    continue
+                changed, tree_changed = self._handle_inotify_events(data, add_watch)
+                if changed:
+                    self.invalidate(tree=tree_changed)
+        finally:
+            os.close(fd)
+            self._watches.clear()
+        return True
+
+    def _handle_inotify_events(self, data, add_watch):
+        """处理一批 inotify 事件，返回 (是否存在相关变化, 其中是否有工作区文件的变化)"""
+        changed = tree_changed = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = struct.unpack_from('iIII', data, offset)
+            offset += 16
+            name = data[offset:offset + name_len].rstrip(b'\0').decode('utf-8', errors='replace')
+            offset += name_len
+
+            if mask & self.IN_Q_OVERFLOW:
+                changed = tree_changed = True
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory, kind = self._watches.get(wd, (None, None))
+            if directory is None:
+                continue
+
+            if kind == "git":
+                changed = changed or name in self.GIT_FILES
+                continue
+            if name.endswith('.lock') or (kind == "tree" and name == '.git'):
+                continue
+            changed = True
+            tree_changed = tree_changed or kind == "tree"
+            # 新建目录需要补充监听
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                try:
+                    for sub in self._iter_tree_dirs(os.path.join(directory, name)):
+                        add_watch(sub, kind)
+                except OSError:
+                    # 监听数量达到上限时不再信任缓存
+                    self.ready = False
+        return changed, tree_changed
+
+    def _scan_signature(self, root):
+        """目录树下所有条目的元数据签名（跳过 .git）"""
+        signature = []
+        for directory in self._iter_tree_dirs(root):
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.name == '.git':
+                            continue
+                        st_ = entry.stat(follow_symlinks=False)
+                        signature.append((entry.path, st_.st_mtime_ns, st_.st_size))
+            except OSError:
+                continue
+        return hash(tuple(signature))
+
+    def _poll_signature(self):
+        """计算 (工作区, .git 相关文件与引用) 的元数据签名"""
+        signature = []
+        paths = [self.reader.git_dir / name for name in self.GIT_FILES]
+        paths.append(self.reader.common_dir / 'packed-refs')
+        for path in paths:
+            try:
+                st_ = os.stat(path)
+                signature.append((str(path), st_.st_mtime_ns, st_.st_size))
+            except OSError:
+                pass
+        signature.append(self._scan_signature(str(self.reader.common_dir / 'refs')))
+        return self._scan_signature(str(self.reader.work_tree)), hash(tuple(signature))
+
+    def _run_polling(self):
+        """轮询监听：定期比较文件元数据签名"""
+        self.backend = "polling"
+        signature = self._poll_signature()
+        self.invalidate()
+        self.ready = True
+        while not self._stop.wait(self.poll_interval):
+            current = self._poll_signature()
+            if current != signature:
+                tree_changed = current[0] != signature[0]
+                signature = current
+                self.invalidate(tree=tree_changed)
+
+
+# ==================== 自动同步 ====================
+
+class AutoSyncer:
+    """
+    自动同步 - 监听工作区变化，把一段时间内的改动合并为一个 WIP 提交并在后台推送
+    规则:
+      - 最后一次变化后安静 quiet_period 秒才提交；持续修改时最多等待 max_wait 秒
+      - 两次自动提交至少间隔 min_interval 秒
+      - 合并/变基进行中、存在冲突或分离头指针时不提交
+      - 推送失败（如远程不可达）时按指数退避重试，提交照常在本地进行
+    有 TreeWatcher 时只比较其 tree_generation（不启动进程），否则每 poll_interval 秒执行一次 git status
+    与前台的拉取/推送共用同一把锁，但从不等待：锁被占用时顺延到下个周期
+    """
+
+    MAX_BACKOFF_EXPONENT = 6
+    CONFLICT_CODES = {'DD', 'AU', 'UD', 'UA', 'DU', 'AA', 'UU'}
+    IN_PROGRESS = ('MERGE_HEAD', 'CHERRY_PICK_HEAD', 'REVERT_HEAD', 'rebase-merge', 'rebase-apply')
+
+    def __init__(self, repo_path=".", watcher=None, lock=None, location="Office",
+                 quiet_period=120, min_interval=600, max_wait=1800,
+                 poll_interval=30, tick=5, retry_interval=60, max_backoff=3600, jitter=0.1,
+                 on_event=None):
+        self.git_ops = GitOperations(repo_path)
+        self.watcher = watcher
+        self.lock = lock or threading.Lock()
+        self.location = location
+        self.quiet_period = quiet_period
+        self.min_interval = min_interval
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.tick = tick
+        self.retry_interval = retry_interval
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.on_event = on_event        # on_event(text)，命令行模式用于实时输出
+        self.state = "idle"             # idle / pending / blocked / error / push_failed
+        self.pending_since = None       # 第一次未提交变化的时间
+        self.last_change_time = None
+        self.last_commit_time = None
+        self.last_push_time = None
+        self.next_push_time = None      # None 表示没有待推送的提交
+        self.failures = 0               # 连续推送失败次数
+        self.commits = 0                # 本次运行的自动提交数
+        self.flagged = []               # 最近一次提交时跳过的大文件/构建产物
+        self.events = deque(maxlen=50)  # (时间戳, 描述)
+        self._token = None
+        self._next_poll = 0
+        self._force = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动后台线程（已运行时忽略）"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="git-auto-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程（已生成的提交保留在本地，正在进行的推送被中止）"""
+        self._stop.set()
+        self._wake.set()
+        if self.running:
+            self.git_ops.cancel()
+
+    def trigger(self):
+        """立即提交并推送，忽略安静期与最小间隔"""
+        self._force = True
+        self._wake.set()
+
+    def _log(self, text):
+        self.events.append((time.time(), text))
+        if self.on_event:
+            self.on_event(text)
+
+    # ---------- 判断 ----------
+
+    def _change_token(self, now):
+        """
+        代表工作区当前状态的标记，变化即视为有新的修改
+        监听可用时使用其 tree_generation（.git 内部变化，如自己的提交、后台获取更新引用，不计入），
+        否则按 poll_interval 执行 git status
+        """
+        watcher = self.watcher
+        if watcher is not None and watcher.running and watcher.ready:
+            return ("watch", watcher.tree_generation)
+        if now < self._next_poll and self._token is not None and self._token[0] == "status":
+            return self._token
+        self._next_poll = now + self.poll_interval
+        return ("status", tuple(self.git_ops.get_snapshot(refresh=True).status_lines()))
+
+    def blocked_reason(self, snapshot):
+        """不能自动提交的原因，可以提交时返回 None"""
+        if not snapshot.valid:
+            return "无法读取仓库状态"
+        if not snapshot.branch:
+            return "处于分离头指针状态"
+        git_dir = self.git_ops.reader.git_dir
+        if git_dir is not None and any((git_dir / name).exists() for name in self.IN_PROGRESS):
+            return "合并/变基正在进行"
+        if any(entry.xy in self.CONFLICT_CODES for entry in snapshot.entries):
+            return "存在未解决的冲突"
+        return None
+
+    def backoff_delay(self):
+        """推送失败后下一次重试前的等待秒数（退避 + 抖动）"""
+        exponent = min(max(self.failures - 1, 0), self.MAX_BACKOFF_EXPONENT)
+        delay = min(self.retry_interval * (2 ** exponent), max(self.max_backoff, self.retry_interval))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def step(self, now=None):
+        """执行一次检查，返回下一次检查前的等待秒数"""
+        now = time.time() if now is None else now
+        token = self._change_token(now)
+        if token != self._token:
+            self._token = token
+            self.last_change_time = now
+            if self.pending_since is None:
+                self.pending_since = now
+                if self.state == "idle":
+                    self.state = "pending"
+
+        force, self._force = self._force, False
+        if self.pending_since is not None:
+            quiet = now - self.last_change_time >= self.quiet_period
+            overdue = now - self.pending_since >= self.max_wait
+            spaced = self.last_commit_time is None or now - self.last_commit_time >= self.min_interval
+            if force or ((quiet or overdue) and spaced):
+                if self._commit(now) is False:
+                    # 锁被占用，保持待提交状态，下个周期再试
+                    self._force = self._force or force
+
+        if self.next_push_time is not None and (force or now >= self.next_push_time):
+            self._push(now)
+
+        delay = self.tick
+        if self.next_push_time is not None:
+            delay = min(delay, max(self.next_push_time - now, 0))
+        return delay
+
+    # ---------- 提交与推送 ----------
+
+    def _commit(self, now):
+        """
+        提交所有改动（大文件和构建产物不会被自动提交，事先已暂存的也会撤回，留给用户在页面上处理）
+        对应命令: git add -A --pathspec-from-file=- --pathspec-file-nul
+        对应命令: git commit -m "WIP: Auto-sync from <位置> - <时间>"
+        前台正在拉取/推送或后台正在获取时不等待，返回 False
+        """
+        if not self.lock.acquire(blocking=False):
+            return False
+        try:
+            snapshot = self.git_ops.get_snapshot(refresh=True)
+            reason = self.blocked_reason(snapshot)
+            if reason:
+                # 保留待提交状态，再安静一个周期后重试
+                if self.state != "blocked":
+                    self._log(f"暂不提交: {reason}")
+                self.state = "blocked"
+                self.last_change_time = now
+                return
+            self.pending_since = None
+            scan = self.git_ops.scan_staging_candidates()
+            skip = [hit.path for hit in scan.hits]
+            if skip and skip != self.flagged:
+                self._log(f"跳过 {len(skip)} 个大文件/构建产物: {'、'.join(skip[:3])}{' 等' if len(skip) > 3 else ''}")
+            self.flagged = skip
+            self.git_ops.reset_console()
+            staged = self.git_ops.stage_scanned(scan, skip=skip)
+            if staged and not self.git_ops.has_staged_changes():
+                # 变化已被手动提交或撤销（或只剩被跳过的文件）；有未推送的提交时一并推送
+                self._settle()
+                if (snapshot.ahead or not snapshot.has_upstream) and self.next_push_time is None and snapshot.oid:
+                    self.next_push_time = now
+                return
+
+            message = f"WIP: Auto-sync from {self.location} - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+            if staged and self.git_ops.commit(message):
+                self.commits += 1
+                self.last_commit_time = now
+                if self._token is not None and self._token[0] == "status":
+                    # 以提交后的状态为基准，提交本身不算新的修改（剩下的只有被跳过的文件）
+                    self._token = ("status", tuple(self.git_ops.get_snapshot().status_lines()))
+                self._settle()
+                self._log(f"已提交: {message}")
+                if self.next_push_time is None or not self.failures:
+                    self.next_push_time = now
+            else:
+                self.state = "error"
+                self.pending_since = now
+                self.last_change_time = now
+                self._log(f"提交失败: {self._last_output()}")
+        finally:
+            self.lock.release()
+
+    def _settle(self):
+        """提交相关的状态恢复为空闲（推送失败/远程领先的状态保留到推送成功）"""
+        if self.state in ("pending", "blocked", "error"):
+            self.state = "idle"
+
+    def _push(self, now):
+        """
+        推送当前分支（禁止交互式认证）
+        对应命令: git push --progress
+        """
+        if not self.lock.acquire(blocking=False):
+            # 前台正在拉取/推送或后台正在获取，稍后再试
+            self.next_push_time = now + self.tick
+            return
+        try:
+            snapshot = self.git_ops.get_snapshot(refresh=True)
+            if snapshot.has_upstream and snapshot.ahead == 0:
+                self.next_push_time = None
+                return
+            if snapshot.behind:
+                # 不自动合并，等待手动拉取
+                if self.state != "diverged":
+                    self._log("远程有新提交，暂停推送，请先拉取")
+                self.state = "diverged"
+                self.next_push_time = now + self.retry_interval
+                return
+            self.git_ops.reset_console()
+            ok = self.git_ops.push(background=True)
+        finally:
+            self.lock.release()
+        if ok:
+            self.failures = 0
+            self.last_push_time = now
+            self.next_push_time = None
+            if self.state in ("push_failed", "diverged"):
+                self.state = "idle"
+            self._log(f"已推送 {snapshot.ahead} 个提交" if snapshot.ahead else "已推送新分支")
+        else:
+            failure = self.git_ops.last_failure
+            if failure and failure.kind == "conflict":
+                # 远程已有新提交（获取后才发现），等待手动拉取
+                self._log(f"推送被拒绝，请先拉取: {failure.message}")
+                self.state = "diverged"
+                self.next_push_time = now + self.retry_interval
+                return
+            self.failures += 1
+            delay = self.backoff_delay()
+            self.next_push_time = now + delay
+            self.state = "push_failed"
+            reason = f"{failure.label}: {failure.message}" if failure else self._last_output()
+            self._log(f"推送失败（第 {self.failures} 次），{int(delay)} 秒后重试 - {reason}")
+
+    def _last_output(self):
+        """最近一条命令的错误信息（优先取 fatal:/error: 行）"""
+        lines = [line.strip() for msg_type, line in self.git_ops.console_output if msg_type != "command"]
+        errors = [line for line in lines if line.startswith(("fatal:", "error:"))]
+        return (errors or lines or ["未知错误"])[0]
+
+    def _loop(self):
+        delay = 0
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            delay = self.step()
+
+
+# ==================== 大仓库模式 ====================
+
+class LargeRepoTuner:
+    """
+    大仓库模式 - 检测仓库规模，启用 git 自带的性能特性，并在空闲时执行增量维护
+    维护前后分别计时 git status 与 rev-list，便于对比效果
+    """
+
+    # (配置键, 期望值, 说明)
+    SETTINGS = [
+        ("core.untrackedCache", "true", "未跟踪文件缓存"),
+        ("core.fsmonitor", "true", "文件系统监视器"),
+        ("feature.manyFiles", "true", "大量文件优化"),
+        ("core.commitGraph", "true", "读取 commit-graph"),
+        ("fetch.writeCommitGraph", "true", "获取后写入 commit-graph"),
+    ]
+    MAINTENANCE_TASKS = ["commit-graph", "loose-objects", "incremental-repack"]
+    LARGE_REPO_FILES = 20000
+    LARGE_REPO_PACK_BYTES = 1 << 30
+
+    def __init__(self, repo_path=".", idle_after=120, maintenance_interval=3600):
+        self.git_ops = GitOperations(repo_path)
+        self.idle_after = idle_after
+        self.maintenance_interval = maintenance_interval
+        self.last_activity = time.monotonic()
+        self.last_maintenance = None
+        self.history = []               # 每次调整/维护的前后耗时记录
+        # 配置写入与维护互斥；不与前台拉取/推送共用（git 的维护任务可与其他命令同时运行），
+        # 长时间的 commit-graph 写入不会阻塞页面按钮
+        self.lock = threading.Lock()
+        self._fsmonitor_supported = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- 检测 ----------
+
+    def detect(self):
+        """
+        估算仓库规模（不启动进程）
+        文件数来自 .git/index 头部，体积为 objects/pack 下 .pack 文件之和
+        """
+        reader = self.git_ops.reader
+        files = reader.index_entry_count() or 0
+        pack_bytes = 0
+        if reader.found:
+            try:
+                with os.scandir(reader.common_dir / 'objects' / 'pack') as it:
+                    pack_bytes = sum(entry.stat().st_size for entry in it if entry.name.endswith('.pack'))
+            except OSError:
+                pass
+        return {
+            "files": files,
+            "pack_bytes": pack_bytes,
+            "is_large": files >= self.LARGE_REPO_FILES or pack_bytes >= self.LARGE_REPO_PACK_BYTES,
+        }
+
+    def fsmonitor_supported(self):
+        """内置 fsmonitor 仅支持 macOS / Windows（git 2.37+）"""
+        if self._fsmonitor_supported is None:
+            result = self.git_ops._run_command(["git", "fsmonitor--daemon", "status"], read_only=True)
+            output = (result.stdout + result.stderr).lower() if result else ""
+            self._fsmonitor_supported = bool(result) and "not supported" not in output and "not a git command" not in output
+        return self._fsmonitor_supported
+
+    def active_settings(self):
+        """
+        查询各项性能配置的当前值（含全局配置）
+        对应命令: git config -z --get-regexp <keys>
+        返回 [(key, desired, current, label)]
+        """
+        pattern = '|'.join(re.escape(key.lower()) for key, _, _ in self.SETTINGS)
+        result = self.git_ops._run_command(["git", "config", "-z", "--get-regexp", f"^({pattern})$"], read_only=True)
+        current = {}
+        if result and result.returncode == 0:
+            for record in result.stdout.split('\0'):
+                key, _, value = record.partition('\n')
+                if key:
+                    current[key.lower()] = value
+        return [(key, desired, current.get(key.lower()), label) for key, desired, label in self.SETTINGS]
+
+    # ---------- 计时 ----------
+
+    def measure(self):
+        """对 git status 与 rev-list 计时（秒）"""
+        timings = {}
+        for name, command in (
+            ("status", ["git", "status", "--porcelain=v2", "--branch", "-z"]),
+            ("rev-list", ["git", "rev-list", "--count", "--left-right", "@{upstream}...HEAD"]),
+        ):
+            start = time.monotonic()
+            result = self.git_ops._run_command(command, read_only=True)
+            timings[name] = time.monotonic() - start if result and result.returncode == 0 else None
+        return timings
+
+    def _timed(self, action, func):
+        before = self.measure()
+        ok = func()
+        after = self.measure()
+        self.history.append({"time": datetime.now(), "action": action, "ok": ok, "before": before, "after": after})
+        return ok
+
+    # ---------- 操作 ----------
+
+    def enable_recommended(self):
+        """
+        启用推荐配置并写入一次 commit-graph；维护正在进行时不等待，直接返回 None
+        对应命令: git config <key> true / git commit-graph write --reachable --changed-paths
+        """
+        def apply():
+            ok = True
+            for key, desired, _ in self.SETTINGS:
+                if key == "core.fsmonitor" and not self.fsmonitor_supported():
+                    continue
+                result = self.git_ops._run_command(["git", "config", key, desired])
+                ok = ok and bool(result) and result.returncode == 0
+            result = self.git_ops._run_command(["git", "commit-graph", "write", "--reachable", "--changed-paths"],
+                                               timeout=3600)
+            return ok and bool(result) and result.returncode == 0
+
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            return self._timed("启用推荐配置", apply)
+        finally:
+            self.lock.release()
+
+    def run_maintenance(self, blocking=True):
+        """
+        执行增量维护（与启用推荐配置互斥）
+        对应命令: git maintenance run --task=commit-graph --task=loose-objects --task=incremental-repack
+        blocking=False 时若另一项维护正在进行则直接返回 None
+        """
+        task_names = self.MAINTENANCE_TASKS
+        if self.detect()["pack_bytes"] == 0:
+            # 还没有 pack 文件时 multi-pack-index 无从写入，下一轮由 loose-objects 打包后再执行
+            task_names = [task for task in task_names if task != "incremental-repack"]
+        tasks = [f"--task={task}" for task in task_names]
+
+        def run():
+            result = self.git_ops._run_command(["git", "maintenance", "run", *tasks], timeout=3600)
+            return bool(result) and result.returncode == 0
+
+        if not self.lock.acquire(blocking=blocking):
+            return None
+        try:
+            ok = self._timed("增量维护", run)
+        finally:
+            self.lock.release()
+        self.last_maintenance = time.monotonic()
+        return ok
+
+    # ---------- 空闲时后台维护 ----------
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def touch(self):
+        """记录一次页面活动，维护只在空闲时进行"""
+        self.last_activity = time.monotonic()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="git-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def maintenance_due(self):
+        now = time.monotonic()
+        idle = now - self.last_activity >= self.idle_after
+        due = self.last_maintenance is None or now - self.last_maintenance >= self.maintenance_interval
+        return idle and due
+
+    def _loop(self):
+        while not self._stop.wait(30):
+            # 维护已在进行（页面上手动触发）时跳过本轮
+            if self.maintenance_due():
+                self.run_maintenance(blocking=False)
+
+
+# ==================== 多仓库工作区 ====================
+
+@dataclass
+class RepoResult:
+    """工作区中单个仓库的操作结果"""
+    path: str
+    ok: bool
+    message: str = ""
+    elapsed: float = 0.0
+    snapshot: RepoSnapshot = None
+    remote_url: str = None
+
+
+class Workspace:
+    """
+    多仓库工作区 - 在有界线程池中并发查询状态、拉取和推送
+    总耗时接近最慢的单个仓库，而不是所有仓库之和
+    """
+
+    def __init__(self, repo_paths, max_workers=8):
+        self.repo_paths = [str(Path(p).resolve()) for p in repo_paths]
+        self.max_workers = max_workers
+
+    @staticmethod
+    def _is_repo_root(path):
+        return (path / '.git').exists()
+
+    @classmethod
+    def from_spec(cls, spec, max_workers=8):
+        """
+        根据输入构建工作区：每行一个路径
+        路径本身是仓库则直接加入，否则加入其下一级子目录中的仓库
+        """
+        repo_paths = []
+        for line in spec.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            path = Path(line).expanduser()
+            if cls._is_repo_root(path):
+                repo_paths.append(path)
+            elif path.is_dir():
+                repo_paths.extend(sorted(child for child in path.iterdir()
+                                         if child.is_dir() and cls._is_repo_root(child)))
+        # 去重并保持顺序
+        unique = list(dict.fromkeys(str(p.resolve()) for p in repo_paths))
+        return cls(unique, max_workers=max_workers)
+
+    def _map(self, func):
+        """在线程池中对每个仓库执行 func(repo_path)，按仓库顺序返回 RepoResult"""
+        def timed(repo_path):
+            start = time.monotonic()
+            try:
+                result = func(repo_path)
+            except Exception as e:
+                result = RepoResult(repo_path, False, f"异常: {e}")
+            result.elapsed = time.monotonic() - start
+            return result
+
+        if not self.repo_paths:
+            return []
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.repo_paths))) as pool:
+            return list(pool.map(timed, self.repo_paths))
+
+    @staticmethod
+    def _tail(git_ops, lines=3):
+        return ' | '.join(line for _, line in list(git_ops.console_output)[-lines:])
+
+    def collect_status(self):
+        """并发获取所有仓库的状态快照"""
+        def status(repo_path):
+            git_ops = GitOperations(repo_path)
+            snapshot = git_ops.get_snapshot()
+            return RepoResult(repo_path, snapshot.valid, "" if snapshot.valid else "无法读取仓库状态",
+                              snapshot=snapshot, remote_url=git_ops.get_remote_url())
+
+        return self._map(status)
+
+    def pull_all(self):
+        """并发拉取所有仓库"""
+        def pull(repo_path):
+            git_ops = GitOperations(repo_path)
+            ok = git_ops.pull()
+            return RepoResult(repo_path, bool(ok), self._tail(git_ops))
+
+        return self._map(pull)
+
+    def push_all(self, commit_message):
+        """
+        并发推送所有仓库：有未提交更改时先提交，远程有新提交的仓库跳过
+        对应流程: git add（仅变更路径，跳过大文件与构建产物）→ git commit -m <message> → git push
+        """
+        def push(repo_path):
+            git_ops = GitOperations(repo_path)
+            snapshot = git_ops.get_snapshot()
+            if not snapshot.valid:
+                return RepoResult(repo_path, False, "无法读取仓库状态")
+            if snapshot.behind > 0:
+                return RepoResult(repo_path, False, f"远程有 {snapshot.behind} 个新提交，请先拉取")
+            if not snapshot.entries and snapshot.ahead == 0 and snapshot.has_upstream:
+                return RepoResult(repo_path, True, "已是最新，无需推送")
+            skipped = []
+            if snapshot.entries:
+                scan = git_ops.scan_staging_candidates()
+                skipped = [hit.path for hit in scan.hits]
+                if not git_ops.stage_scanned(scan, skip=skipped):
+                    return RepoResult(repo_path, False, "添加文件失败")
+                # 只剩被跳过的文件时没有可提交的内容；提交失败（钩子拒绝、缺少身份信息、索引被锁）时不推送
+                if git_ops.has_staged_changes() and not git_ops.commit(commit_message):
+                    return RepoResult(repo_path, False, f"提交失败\n{self._tail(git_ops)}")
+            ok = git_ops.push()
+            message = self._tail(git_ops)
+            if skipped:
+                message = f"已跳过 {len(skipped)} 个大文件/构建产物\n{message}"
+            return RepoResult(repo_path, bool(ok), message)
+
+        return self._map(push)
@@ -0,0 +1,1622 @@
+"""
+Git 同步工具 - 页面
+Streamlit 界面组件与主程序；只在页面运行时导入（python sync.py / streamlit run sync.py）
+"""
+
+import html
+import re
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import streamlit as st
+
+from sync_core import (
+    DEFAULT_ARTIFACT_PATTERNS,
+    DEFAULT_LARGE_FILE_LIMIT,
+    DEFAULT_MANIFEST_PATTERNS,
+    GITHUB_FILE_LIMIT,
+    AsyncGitOperations,
+    AutoSyncer,
+    CommandMetrics,
+    DependencyInstaller,
+    FetchScheduler,
+    GitOperations,
+    HistoryDeepener,
+    LargeRepoTuner,
+    TreeWatcher,
+    Workspace,
+)
+
+# 自定义 CSS - Tailwind 风格 + 深色模式
+PAGE_CSS = """
+<style>
+    /* 全局样式 - 深色主题 */
+    .main {
+        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
+        color: #eaeaea;
+        min-height: 100vh;
+    }
+
+    /* 标题样式 */
+    .title-container {
+        text-align: center;
+        padding: 2rem 0;
+        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        font-size: 2.5rem;
+        font-weight: bold;
+        margin-bottom: 1rem;
+    }
+
+    .subtitle {
+        text-align: center;
+        color: #a0aec0;
+        font-size: 1rem;
+        margin-bottom: 2rem;
+    }
+
+    /* 卡片容器 */
+    .status-card {
+        background: rgba(255, 255, 255, 0.05);
+        border-radius: 12px;
+        padding: 1.5rem;
+        margin: 0.5rem 0;
+        border: 1px solid rgba(255, 255, 255, 0.1);
+        backdrop-filter: blur(10px);
+        transition: all 0.3s ease;
+    }
+
+    .status-card:hover {
+        border-color: rgba(102, 126, 234, 0.5);
+        transform: translateY(-2px);
+    }
+
+    /* 状态指示器 */
+    .status-badge {
+        display: inline-block;
+        padding: 0.5rem 1rem;
+        border-radius: 20px;
+        font-weight: 600;
+        font-size: 0.9rem;
+        margin: 0.25rem;
+    }
+
+    .status-success {
+        background: linear-gradient(135deg, #48bb78 0%, #38a169 100%);
+        color: white;
+    }
+
+    .status-warning {
+        background: linear-gradient(135deg, #ed8936 0%, #dd6b20 100%);
+        color: white;
+    }
+
+    .status-danger {
+        background: linear-gradient(135deg, #f56565 0%, #e53e3e 100%);
+        color: white;
+    }
+
+    .status-info {
+        background: linear-gradient(135deg, #4299e1 0%, #3182ce 100%);
+        color: white;
+    }
+
+    /* 按钮样式 */
+    .stButton > button {
+        width: 100%;
+        padding: 0.75rem 1.5rem;
+        border-radius: 8px;
+        font-weight: 600;
+        font-size: 1rem;
+        transition: all 0.3s ease;
+        margin: 0.25rem 0;
+    }
+
+    .stButton > button[kind="primary"] {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        border: none;
+    }
+
+    .stButton > button[kind="primary"]:hover {
+        transform: scale(1.02);
+        box-shadow: 0 10px 20px rgba(102, 126, 234, 0.3);
+    }
+
+    .stButton > button[kind="secondary"] {
+        background: linear-gradient(135deg, #48bb78 0%, #38a169 100%);
+        color: white;
+        border: none;
+    }
+
+    /* 控制台输出区域 */
+    .console-container {
+        background: #0d1117;
+        border-radius: 8px;
+        padding: 1rem;
+        margin-top: 1rem;
+        font-family: 'Courier New', monospace;
+        font-size: 0.85rem;
+        max-height: 400px;
+        overflow-y: auto;
+        border: 1px solid #30363d;
+    }
+
+    .console-line {
+        padding: 0.25rem 0;
+        border-bottom: 1px solid #21262d;
+    }
+
+    .console-command {
+        color: #58a6ff;
+    }
+
+    .console-output {
+        color: #8b949e;
+    }
+
+    .console-error {
+        color: #f85149;
+    }
+
+    .console-success {
+        color: #3fb950;
+    }
+
+    /* 提示框 */
+    .info-box {
+        background: rgba(66, 153, 225, 0.1);
+        border-left: 4px solid #4299e1;
+        padding: 1rem;
+        border-radius: 4px;
+        margin: 1rem 0;
+    }
+
+    .warning-box {
+        background: rgba(237, 137, 54, 0.1);
+        border-left: 4px solid #ed8936;
+        padding: 1rem;
+        border-radius: 4px;
+        margin: 1rem 0;
+    }
+
+    .error-box {
+        background: rgba(245, 101, 101, 0.1);
+        border-left: 4px solid #f56565;
+        padding: 1rem;
+        border-radius: 4px;
+        margin: 1rem 0;
+    }
+
+    /* 文件列表 */
+    .file-list {
+        background: rgba(0, 0, 0, 0.2);
+        border-radius: 8px;
+        padding: 1rem;
+        margin-top: 0.5rem;
+    }
+
+    .file-item {
+        padding: 0.5rem;
+        margin: 0.25rem 0;
+        background: rgba(255, 255, 255, 0.03);
+        border-radius: 4px;
+        font-family: 'Courier New', monospace;
+        font-size: 0.85rem;
+    }
+
+    /* 侧边栏 */
+    .css-1d391kg {
+        background: rgba(26, 26, 46, 0.95);
+    }
+
+    /* 滚动条样式 */
+    ::-webkit-scrollbar {
+        width: 8px;
+    }
+
+    ::-webkit-scrollbar-track {
+        background: #1a1a2e;
+    }
+
+    ::-webkit-scrollbar-thumb {
+        background: #4a5568;
+        border-radius: 4px;
+    }
+
+    ::-webkit-scrollbar-thumb:hover {
+        background: #667eea;
+    }
+
+    /* 帮助文本 */
+    .help-text {
+        font-size: 0.85rem;
+        color: #a0aec0;
+        font-style: italic;
+    }
+</style>
+"""
+
+
+@lru_cache(maxsize=1)
+def _minified_css():
+    """去掉注释与多余空白后的 CSS（每个进程只处理一次）"""
+    css = re.sub(r'/\*.*?\*/', '', PAGE_CSS, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};])\s*', r'\1', css).strip()
+
+
+def setup_page():
+    """
+    页面配置与样式，在 main() 开头调用
+    set_page_config 必须是第一个 st 命令；样式每次刷新都要输出（未输出的元素会在刷新后被移除），
+    内容在进程内只生成一次
+    """
+    st.set_page_config(
+        page_title="Git 同步工具",
+        page_icon="",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(_minified_css(), unsafe_allow_html=True)
+
+
+# ==================== UI 组件函数 ====================
+
+def _format_age(seconds):
+    """将秒数格式化为“N 秒前 / N 分钟前 / N 小时前”"""
+    if seconds < 5:
+        return "刚刚"
+    if seconds < 60:
+        return f"{int(seconds)} 秒前"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} 分钟前"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} 小时前"
+    return f"{int(seconds // 86400)} 天前"
+
+
+@st.cache_resource
+def get_command_metrics():
+    """进程内共享的命令耗时统计"""
+    return CommandMetrics()
+
+
+@st.cache_resource
+def get_branch_index_cache():
+    """进程内共享的分支索引缓存"""
+    return {}
+
+
+@st.cache_resource
+def get_history_deepener(repo_path):
+    """每个仓库一个后台历史加深任务（与后台获取共用锁）"""
+    return HistoryDeepener(repo_path, lock=get_fetch_scheduler(repo_path).lock)
+
+
+@st.cache_resource
+def get_dependency_installer(repo_path):
+    """每个仓库一个后台依赖安装任务"""
+    return DependencyInstaller(repo_path)
+
+
+@st.cache_resource
+def get_tree_watcher(repo_path):
+    """每个仓库只创建一个文件监听线程，所有浏览器会话共享"""
+    return TreeWatcher(repo_path)
+
+
+@st.cache_resource
+def get_fetch_scheduler(repo_path):
+    """每个仓库只创建一个后台获取线程，所有浏览器会话共享"""
+    return FetchScheduler(repo_path)
+
+
+@st.cache_resource
+def get_auto_syncer(repo_path):
+    """每个仓库只创建一个自动同步线程（与后台获取共用锁，与页面共用文件监听）"""
+    return AutoSyncer(repo_path, watcher=get_tree_watcher(repo_path), lock=get_fetch_scheduler(repo_path).lock)
+
+
+@st.cache_resource
+def get_large_repo_tuner(repo_path):
+    """每个仓库只创建一个维护线程，所有浏览器会话共享"""
+    return LargeRepoTuner(repo_path)
+
+
+def _format_size(num_bytes):
+    """字节数格式化为 KB / MB / GB"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def _format_seconds(value):
+    return "-" if value is None else f"{value * 1000:.0f} ms"
+
+
+def render_metrics_panel(metrics):
+    """命令耗时面板：各类 git 命令的 p50/p95 与失败次数，以及导出设置"""
+    rows = metrics.summary()
+    if rows:
+        st.dataframe([{
+            "命令": row["command"],
+            "次数": row["count"],
+            "p50": _format_seconds(row["p50"]),
+            "p95": _format_seconds(row["p95"]),
+            "最大": _format_seconds(row["max"]),
+            "失败": row["errors"],
+            "超时": row["timeouts"] + row["exceptions"],
+        } for row in rows], hide_index=True)
+    else:
+        st.caption("暂无记录")
+
+    jsonl_path = st.text_input("JSONL 导出路径", value=metrics.jsonl_path or "", key="metrics_jsonl_path",
+                               placeholder="/var/log/git-sync/commands.jsonl")
+    textfile_path = st.text_input("Prometheus textfile 路径", value=metrics.textfile_path or "",
+                                  key="metrics_textfile_path",
+                                  placeholder="/var/lib/node_exporter/textfile/git_sync.prom")
+    metrics.jsonl_path = jsonl_path or None
+    metrics.textfile_path = textfile_path or None
+
+
+def _repo_name_from_url(url):
+    """从远程地址推断目录名，如 git@github.com:user/repo.git → repo"""
+    name = re.split(r'[/:]', url.rstrip('/'))[-1]
+    return name[:-len('.git')] if name.endswith('.git') else name
+
+
+def _suggest_clone_target():
+    st.session_state.clone_target = _repo_name_from_url(st.session_state.clone_url)
+
+
+def render_bootstrap_page(git_ops):
+    """当前目录不是仓库时：克隆远程仓库（可选部分克隆/浅克隆），完成后切换到新仓库"""
+    st.markdown("""
+    <div class="error-box">
+        <strong>❌ 当前目录不是 Git 仓库!</strong><br><br>
+        可以在下方克隆远程仓库，或先初始化 Git 仓库:<br>
+        <code>git init</code><br><br>
+        或连接到远程仓库:<br>
+        <code>git remote add origin &lt;your-repo-url&gt;</code>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("### ⚡ 快速开始：克隆仓库")
+    url = st.text_input("远程仓库地址", placeholder="git@github.com:user/repo.git", key="clone_url",
+                        on_change=_suggest_clone_target)
+    target = st.text_input("克隆到目录", help=f"相对于 {git_ops.repo_path}", key="clone_target")
+    strategies = {
+        "blobless": "部分克隆（推荐）：完整提交历史，文件内容按需下载",
+        "shallow": "浅克隆：只下载最近的提交，之后可在后台补全历史",
+        "full": "完整克隆",
+    }
+    strategy = st.radio("克隆方式", list(strategies), format_func=strategies.get, key="clone_strategy")
+    depth = 1
+    if strategy == "shallow":
+        depth = st.number_input("提交深度", min_value=1, value=1, step=1, key="clone_depth")
+    branch = st.text_input("分支（可选）", placeholder="默认分支", key="clone_branch")
+
+    if st.button("⚡ 开始克隆", type="primary", use_container_width=True, disabled=not (url and target)):
+        git_ops.reset_console()
+        on_output, on_progress = render_live_progress(git_ops)
+        if git_ops.clone(url, target, strategy, depth, branch or None, on_output=on_output, on_progress=on_progress):
+            st.session_state.repo_path = str(git_ops.repo_path / target)
+            st.session_state.last_action = "clone_success"
+            st.session_state.console_output = git_ops.console_output
+            st.rerun()
+        else:
+            render_failure_box("克隆失败", git_ops.last_failure,
+                               "请检查仓库地址、网络连接与访问权限，目标目录必须不存在或为空。")
+            render_console_output(git_ops.console_output)
+
+
+def render_history_panel(git_ops, deepener):
+    """浅克隆/部分克隆的状态与后台加深历史"""
+    clone_filter = git_ops.partial_clone_filter()
+    if clone_filter:
+        st.caption(f"部分克隆（{clone_filter}）：文件内容在需要时自动下载")
+    if not git_ops.is_shallow():
+        if deepener.ok:
+            st.caption("✅ 已获取完整历史")
+        return
+
+    if deepener.running:
+        progress = deepener.progress
+        if progress:
+            st.progress(min(progress.percent, 100) / 100, text=progress.describe())
+        else:
+            st.caption("正在后台获取历史...")
+        col_a, col_b = st.columns(2)
+        with col_a:
+            if st.button("刷新进度", use_container_width=True, key="deepen_refresh_btn"):
+                st.rerun()
+        with col_b:
+            if st.button("取消", use_container_width=True, key="deepen_cancel_btn"):
+                deepener.cancel()
+                st.rerun()
+        return
+
+    st.caption("浅克隆：只包含最近的提交")
+    if deepener.ok is False:
+        reason = f"：{deepener.failure.label}" if deepener.failure else ""
+        st.caption(f"⚠️ 上次获取历史失败{reason}")
+    commits = st.number_input("加深提交数", min_value=1, value=100, step=100, key="deepen_commits")
+    col_a, col_b = st.columns(2)
+    with col_a:
+        if st.button("加深", use_container_width=True, key="deepen_btn"):
+            deepener.start(int(commits))
+            st.rerun()
+    with col_b:
+        if st.button("完整历史", use_container_width=True, key="unshallow_btn"):
+            deepener.start()
+            st.rerun()
+
+
+def render_auto_sync_panel(syncer):
+    """自动同步状态：待提交的改动、最近的提交/推送与退避重试"""
+    if not syncer.running:
+        st.caption("开启后，改动会在安静一段时间后自动提交为 WIP 并推送")
+        return
+
+    now = time.time()
+    states = {
+        "pending": "✏️ 有未提交的改动，等待安静期结束",
+        "blocked": "⏸️ 暂不提交（合并/变基进行中、存在冲突或分离头指针）",
+        "error": "⚠️ 上次提交失败，稍后重试",
+        "push_failed": "📡 推送失败（远程不可达或被拒绝），已退避重试",
+        "diverged": "⚠️ 远程有新提交，请先拉取",
+    }
+    st.caption(states.get(syncer.state, "✅ 没有待同步的改动"))
+    lines = []
+    if syncer.last_commit_time:
+        lines.append(f"上次自动提交: {_format_age(now - syncer.last_commit_time)}")
+    if syncer.last_push_time:
+        lines.append(f"上次推送: {_format_age(now - syncer.last_push_time)}")
+    if syncer.failures:
+        lines.append(f"推送连续失败 {syncer.failures} 次")
+    if syncer.next_push_time and syncer.next_push_time > now:
+        lines.append(f"下次推送: {int(syncer.next_push_time - now)} 秒后")
+    if lines:
+        st.caption(" · ".join(lines))
+    for timestamp, text in list(syncer.events)[-5:][::-1]:
+        st.caption(f"{datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')} {text}")
+    if st.button("立即同步", use_container_width=True, key="auto_sync_now_btn"):
+        syncer.trigger()
+
+
+def render_large_repo_panel(tuner):
+    """大仓库模式面板：规模检测、性能配置状态、维护记录"""
+    info = tuner.detect()
+    verdict = "大仓库" if info["is_large"] else "普通仓库"
+    st.markdown(f"""
+    <div style="font-size: 0.75rem; color: #a0aec0;">
+    跟踪文件: {info['files']} · 对象包: {_format_size(info['pack_bytes'])} · 判定: <strong>{verdict}</strong>
+    </div>
+    """, unsafe_allow_html=True)
+
+    lines = []
+    for key, desired, current, label in tuner.active_settings():
+        if key == "core.fsmonitor" and not tuner.fsmonitor_supported():
+            lines.append(f"➖ {label} <code>{key}</code>（当前平台不支持）")
+            continue
+        icon = "✅" if (current or "").lower() == desired else "⬜"
+        lines.append(f"{icon} {label} <code>{key}</code>")
+    st.markdown('<div style="font-size: 0.75rem;">' + '<br>'.join(lines) + '</div>', unsafe_allow_html=True)
+
+    col_a, col_b = st.columns(2)
+    with col_a:
+        if st.button("启用推荐配置", use_container_width=True, key="large_repo_enable_btn"):
+            with st.spinner("正在应用配置并写入 commit-graph..."):
+                if tuner.enable_recommended() is None:
+                    st.info("增量维护正在进行，请稍后再试")
+    with col_b:
+        if st.button("立即维护", use_container_width=True, key="large_repo_maintain_btn"):
+            with st.spinner("正在执行增量维护..."):
+                if tuner.run_maintenance(blocking=False) is None:
+                    st.info("维护正在进行，请稍后再试")
+
+    st.caption(f"空闲 {tuner.idle_after} 秒后在后台执行增量维护（commit-graph、松散对象打包、multi-pack-index）")
+    if tuner.history:
+        st.dataframe([{
+            "时间": record["time"].strftime("%H:%M:%S"),
+            "操作": record["action"] + ("" if record["ok"] else "（失败）"),
+            "status 前": _format_seconds(record["before"]["status"]),
+            "status 后": _format_seconds(record["after"]["status"]),
+            "rev-list 前": _format_seconds(record["before"]["rev-list"]),
+            "rev-list 后": _format_seconds(record["after"]["rev-list"]),
+        } for record in reversed(tuner.history[-5:])], hide_index=True)
+
+
+def render_status_card(git_ops, fetch_scheduler=None):
+    """渲染状态卡片"""
+    st.markdown('<div class="title-container">Git 同步工具</div>', unsafe_allow_html=True)
+    st.markdown('<p class="subtitle">跨端代码同步利器 | 公司与家之间无缝切换</p>', unsafe_allow_html=True)
+
+    snapshot = git_ops.get_snapshot()
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        branch = snapshot.branch if snapshot.valid else "未知"
+        st.markdown(f"""
+        <div class="status-card">
+            <div style="font-size: 0.8rem; color: #a0aec0;">当前分支</div>
+            <div style="font-size: 1.5rem; font-weight: bold; color: #667eea;">
+                <span class="status-badge status-info">{branch}</span>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col2:
+        uncommitted_count = len(snapshot.entries)
+        color = "status-success" if uncommitted_count == 0 else "status-warning"
+        st.markdown(f"""
+        <div class="status-card">
+            <div style="font-size: 0.8rem; color: #a0aec0;">未提交文件</div>
+            <div style="font-size: 1.5rem; font-weight: bold;">
+                <span class="status-badge {color}">{uncommitted_count}</span>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    with col3, col4:
+        ahead, behind = snapshot.ahead, snapshot.behind
+        with col3:
+            st.markdown(f"""
+            <div class="status-card">
+                <div style="font-size: 0.8rem; color: #a0aec0;">领先远程</div>
+                <div style="font-size: 1.5rem; font-weight: bold;">
+                    <span class="status-badge status-success">{ahead} 提交</span>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+        with col4:
+            color = "status-success" if behind == 0 else "status-danger"
+            st.markdown(f"""
+            <div class="status-card">
+                <div style="font-size: 0.8rem; color: #a0aec0;">落后远程</div>
+                <div style="font-size: 1.5rem; font-weight: bold;">
+                    <span class="status-badge {color}">{behind} 提交</span>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+    # 远程仓库地址
+    remote_url = git_ops.get_remote_url()
+    if remote_url:
+        fetch_info = ""
+        if fetch_scheduler is not None and fetch_scheduler.running:
+            age = fetch_scheduler.seconds_since_fetch()
+            fetch_info = f"上次获取: {_format_age(age)}" if age is not None else "正在获取远程信息..."
+            if fetch_scheduler.failures:
+                fetch_info += f' <span style="color: #f56565;">（最近 {fetch_scheduler.failures} 次获取失败，已退避重试）</span>'
+            fetch_info = f'<br><span style="font-size: 0.8rem; color: #a0aec0;">{fetch_info}</span>'
+        st.markdown(f"""
+        <div class="info-box">
+            <strong>远程仓库:</strong> <code style="background: rgba(0,0,0,0.3); padding: 2px 8px; border-radius: 4px;">{remote_url}</code>
+            {fetch_info}
+        </div>
+        """, unsafe_allow_html=True)
+
+
+def _describe_status(status_code):
+    """状态码 → (图标, 说明)"""
+    if status_code[0] == '?':
+        return "⚪", "未跟踪"
+    elif status_code[0] == 'A':
+        return "🟡", "已添加"
+    elif status_code[0] == 'D':
+        return "🔴", "已删除"
+    elif status_code[0] == 'R':
+        return "🔵", "已重命名"
+    elif status_code[0] == 'M':
+        return "🟠", "已修改(暂存)"
+    return "🟢", "已修改"
+
+
+def group_status_entries(entries):
+    """
+    按 (状态, 顶层目录) 分组
+    返回 [(icon, status_text, directory, [entries])]，按文件数从多到少排序
+    """
+    groups = {}
+    for entry in entries:
+        icon, status_text = _describe_status(entry.xy)
+        directory = entry.path.split('/', 1)[0] + '/' if '/' in entry.path else "(根目录)"
+        groups.setdefault((icon, status_text, directory), []).append(entry)
+    return sorted(
+        ((icon, text, directory, items) for (icon, text, directory), items in groups.items()),
+        key=lambda group: -len(group[3])
+    )
+
+
+def _reset_file_page():
+    st.session_state.file_page = 1
+
+
+def render_file_changes(git_ops, page_size=100):
+    """
+    渲染文件变更列表
+    先展示分组统计，只渲染当前分组、当前页的文件（一个元素），大量变更时也能快速显示
+    """
+    entries = git_ops.get_snapshot().entries
+    if not entries:
+        return
+
+    st.markdown(f"### 📝 未提交的文件变更（{len(entries)}）")
+    groups = group_status_entries(entries)
+
+    # 选项用分组键 (图标, 状态, 目录) 而不是位置：变更后分组重新排序时仍指向同一分组，
+    # 已消失的分组回到“全部”
+    by_key = {(icon, text, directory): items for icon, text, directory, items in groups}
+    if st.session_state.get('file_group_select') not in by_key.keys() | {None}:
+        st.session_state.file_group_select = None
+
+    col_group, col_filter = st.columns([2, 1])
+    with col_group:
+        selected = st.selectbox(
+            "分组",
+            [None] + list(by_key),
+            format_func=lambda key: f"全部 ({len(entries)})" if key is None
+            else f"{key[0]} {key[1]} · {key[2]} ({len(by_key[key])})",
+            key="file_group_select",
+            on_change=_reset_file_page,
+        )
+    with col_filter:
+        keyword = st.text_input("筛选", placeholder="路径关键字", key="file_filter", on_change=_reset_file_page)
+
+    rows = entries if selected is None else by_key[selected]
+    if keyword:
+        keyword_lower = keyword.lower()
+        rows = [entry for entry in rows if keyword_lower in entry.path.lower()]
+
+    pages = max(1, (len(rows) + page_size - 1) // page_size)
+    if st.session_state.get('file_page', 1) > pages:
+        st.session_state.file_page = 1
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"页码（共 {pages} 页，{len(rows)} 个文件）", min_value=1, max_value=pages,
+                               value=1, step=1, key="file_page")
+
+    page_rows = rows[(page - 1) * page_size:page * page_size]
+    items = []
+    for entry in page_rows:
+        status_icon, status_text = _describe_status(entry.xy)
+        file_path = f"{entry.orig_path} -> {entry.path}" if entry.orig_path else entry.path
+        items.append(
+            f'<div class="file-item">{status_icon} <strong>{status_text}</strong> - '
+            f'<code>{html.escape(file_path)}</code></div>'
+        )
+    if items:
+        st.markdown('<div class="file-list">\n' + '\n'.join(items) + '\n</div>', unsafe_allow_html=True)
+    else:
+        st.info("没有匹配的文件")
+
+    # 只推送部分文件：候选项为当前页（不把整个分组的上万个路径发给浏览器），已选的文件翻页或切换筛选后依然保留
+    if st.toggle("只推送选中的文件", key="select_files_mode"):
+        changed = {entry.path for entry in entries}
+        selected_paths = [path for path in st.session_state.get('selected_paths', []) if path in changed]
+        options = list(dict.fromkeys(selected_paths + [entry.path for entry in page_rows]))
+        st.session_state.selected_paths = selected_paths
+        label = f"要推送的文件（候选为当前页 {len(page_rows)} 个，可翻页或筛选后继续选择）" if pages > 1 \
+            else f"要推送的文件（候选 {len(page_rows)} 个）"
+        st.multiselect(label, options, key="selected_paths", placeholder="选择要提交的文件")
+
+
+def get_selected_paths(git_ops):
+    """
+    返回用户在文件列表中选中的路径（未开启“只推送选中的文件”时返回 None，即全部变更）
+    已不在变更列表中的路径会被忽略
+    """
+    if not st.session_state.get('select_files_mode'):
+        return None
+    selected = set(st.session_state.get('selected_paths', []))
+    return [entry.path for entry in git_ops.get_snapshot().entries if entry.path in selected]
+
+
+def render_console_output(console_output):
+    """渲染控制台输出（整个缓冲区作为一个元素输出）"""
+    if not console_output:
+        return
+
+    st.markdown("### 💻 命令执行记录")
+    if console_output.dropped:
+        notice = f"已省略较早的 {console_output.dropped} 行输出"
+        if console_output.spill_path:
+            notice += f"，完整内容见 <code>{html.escape(str(console_output.spill_path))}</code>"
+        st.markdown(f'<p class="help-text">{notice}</p>', unsafe_allow_html=True)
+    st.markdown(f'<div class="console-container">\n{console_output.to_html()}\n</div>', unsafe_allow_html=True)
+
+
+def _mark_cancelled():
+    """取消按钮回调：在下一次执行开始前记录结果"""
+    st.session_state.last_action = "cancelled"
+    st.session_state.last_failure = None
+
+
+def render_live_progress(git_ops, refresh_interval=0.2):
+    """
+    创建实时进度条、已用时间、取消按钮与控制台区域，返回 (on_output, on_progress) 回调
+    控制台按固定间隔批量刷新，避免每行输出都重绘
+    执行期间每 0.5 秒更新一次已用时间：点击“取消”后页面会在下一次更新时中断执行，git 进程随之结束
+    """
+    progress_bar = st.progress(0.0, text="正在连接远程仓库...")
+    col_status, col_cancel = st.columns([3, 1])
+    with col_status:
+        elapsed_line = st.empty()
+    with col_cancel:
+        st.button("⏹️ 取消", use_container_width=True, key="cancel_operation_btn", on_click=_mark_cancelled)
+    console_area = st.empty()
+    last_render = [0.0]
+
+    def on_tick(elapsed):
+        elapsed_line.caption("等待重试..." if elapsed is None else f"已用时 {int(elapsed)} 秒")
+
+    git_ops.on_tick = on_tick
+
+    def on_progress(progress):
+        progress_bar.progress(min(progress.percent, 100) / 100, text=progress.describe())
+
+    def on_output(msg_type, line):
+        now = time.monotonic()
+        if now - last_render[0] >= refresh_interval:
+            last_render[0] = now
+            with console_area.container():
+                render_console_output(git_ops.console_output)
+
+    return on_output, on_progress
+
+
+def render_branch_picker(git_ops, label, key, remote=None, exclude=(), page_size=50):
+    """
+    可搜索、分页的分支选择器：只渲染当前页的分支，默认按最近提交排序
+    remote 为 None 时列出本地分支，否则列出该远程上的分支；返回选中的分支名（无匹配时为 None）
+    """
+    index = git_ops.get_branch_index()
+    query = st.text_input("搜索分支", placeholder="名称前缀或关键字", key=f"{key}_query")
+    _, total = index.search(query, remote=remote, page_size=1, exclude=exclude)
+    if total == 0:
+        st.caption("没有匹配的分支")
+        return None
+
+    pages = (total + page_size - 1) // page_size
+    page = 1
+    if pages > 1:
+        if st.session_state.get(f"{key}_page", 1) > pages:
+            st.session_state[f"{key}_page"] = 1
+        page = st.number_input(f"页码（共 {pages} 页，{total} 个分支）", min_value=1, max_value=pages,
+                               value=1, step=1, key=f"{key}_page")
+    items, _ = index.search(query, remote=remote, page=page, page_size=page_size, exclude=exclude)
+    branches = dict(items)
+    now = time.time()
+
+    def describe(name):
+        branch = branches[name]
+        parts = [name]
+        if branch.commit_time:
+            parts.append(_format_age(now - branch.commit_time))
+        if branch.ahead or branch.behind:
+            parts.append(f"↑{branch.ahead} ↓{branch.behind}")
+        return " · ".join(parts)
+
+    return st.selectbox(label, list(branches), format_func=describe, key=f"{key}_select")
+
+
+def render_workspace_page():
+    """工作区模式：多个仓库的状态汇总与批量拉取/推送"""
+    with st.sidebar:
+        st.session_state.location = st.selectbox(
+            "📍 当前位置",
+            ['Office', 'Home', 'Other'],
+            key="workspace_location"
+        )
+        spec = st.text_area(
+            "仓库列表",
+            value=st.session_state.get('workspace_spec', str(Path.cwd())),
+            help="每行一个路径：可以是仓库本身，也可以是包含多个仓库的父目录",
+            height=150,
+        )
+        st.session_state.workspace_spec = spec
+        max_workers = st.slider("并发数", min_value=1, max_value=32, value=8, key="workspace_workers")
+
+    workspace = Workspace.from_spec(spec, max_workers=max_workers)
+    st.markdown('<div class="title-container">Git 工作区</div>', unsafe_allow_html=True)
+    st.markdown(f'<p class="subtitle">共 {len(workspace.repo_paths)} 个仓库 | 并发查询与同步</p>',
+                unsafe_allow_html=True)
+
+    if not workspace.repo_paths:
+        render_error_box("未找到仓库", "请在侧边栏填写仓库路径或包含仓库的父目录。")
+        return
+
+    start = time.monotonic()
+    statuses = workspace.collect_status()
+    wall_time = time.monotonic() - start
+
+    rows = []
+    for result in statuses:
+        snapshot = result.snapshot
+        rows.append({
+            "仓库": Path(result.path).name,
+            "分支": snapshot.branch if snapshot.valid else "未知",
+            "未提交": len(snapshot.entries),
+            "领先": snapshot.ahead,
+            "落后": snapshot.behind,
+            "远程": result.remote_url or "",
+            "耗时(秒)": round(result.elapsed, 2),
+            "路径": result.path,
+        })
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    st.caption(f"状态查询总耗时 {wall_time:.2f} 秒（各仓库耗时之和 {sum(r.elapsed for r in statuses):.2f} 秒）")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("📥 全部拉取", type="secondary", use_container_width=True):
+            with st.spinner("正在并发拉取所有仓库..."):
+                start = time.monotonic()
+                st.session_state.workspace_results = ("拉取", workspace.pull_all(), time.monotonic() - start)
+            st.rerun()
+    with col2:
+        if st.button("📤 全部推送", type="primary", use_container_width=True):
+            now = datetime.now().strftime("%Y-%m-%d %H:%M")
+            commit_msg = f"Sync from {st.session_state.location} - {now}"
+            with st.spinner("正在并发推送所有仓库..."):
+                start = time.monotonic()
+                st.session_state.workspace_results = ("推送", workspace.push_all(commit_msg), time.monotonic() - start)
+            st.rerun()
+
+    if st.session_state.get('workspace_results'):
+        action, results, elapsed = st.session_state.workspace_results
+        failed = [r for r in results if not r.ok]
+        if failed:
+            render_error_box(f"{action}完成，{len(failed)} 个仓库失败", "请查看下表中的失败原因。")
+        else:
+            render_success_box(f"{action}完成", f"{len(results)} 个仓库全部成功。")
+        st.dataframe([{
+            "仓库": Path(r.path).name,
+            "结果": "✅" if r.ok else "❌",
+            "耗时(秒)": round(r.elapsed, 2),
+            "输出": r.message,
+        } for r in results], use_container_width=True, hide_index=True)
+        st.caption(f"总耗时 {elapsed:.2f} 秒（各仓库耗时之和 {sum(r.elapsed for r in results):.2f} 秒）")
+
+
+def render_config_warning(changed_configs):
+    """渲染配置文件变更警告"""
+    if changed_configs:
+        st.markdown(f"""
+        <div class="warning-box">
+            <strong>⚠️ 依赖配置已变更!</strong><br>
+            以下配置文件有变化，请执行依赖安装:<br>
+            {'<br>'.join([f'• <code>{f}</code>' for f in changed_configs])}
+        </div>
+        """, unsafe_allow_html=True)
+
+
+def render_pulled_manifests(changes):
+    """渲染拉取带来的依赖清单变更（含修改这些文件的提交）"""
+    if not changes:
+        return
+    items = []
+    for change in changes:
+        commits = ''.join(
+            f'<br>&nbsp;&nbsp;&nbsp;&nbsp;<code>{sha}</code> {html.escape(subject)}' for sha, subject in change.commits[:5]
+        )
+        if len(change.commits) > 5:
+            commits += f'<br>&nbsp;&nbsp;&nbsp;&nbsp;… 另有 {len(change.commits) - 5} 个提交'
+        items.append(f'• <code>{html.escape(change.path)}</code>{commits}')
+    st.markdown(f"""
+    <div class="warning-box">
+        <strong>⚠️ 拉取的代码修改了依赖配置!</strong><br>
+        请执行依赖安装:<br>
+        {'<br>'.join(items)}
+    </div>
+    """, unsafe_allow_html=True)
+
+
+def render_manifest_settings(git_ops):
+    """编辑依赖清单的 glob 模式（每行一个）"""
+    text = st.text_area("依赖清单模式（每行一个 glob）", value='\n'.join(git_ops.manifest_patterns()),
+                        height=160, key="manifest_patterns_input",
+                        help="不含 / 的模式匹配任意目录下的同名文件；含 / 的从仓库根目录匹配，** 匹配多级目录")
+    col_a, col_b = st.columns(2)
+    with col_a:
+        if st.button("保存", use_container_width=True, key="save_manifest_patterns"):
+            git_ops.set_manifest_patterns(text.splitlines())
+            st.rerun()
+    with col_b:
+        if st.button("恢复默认", use_container_width=True, key="reset_manifest_patterns"):
+            git_ops.set_manifest_patterns(DEFAULT_MANIFEST_PATTERNS)
+            del st.session_state.manifest_patterns_input
+            st.rerun()
+
+
+def render_artifact_settings(git_ops):
+    """大文件阈值与构建产物的 glob 模式（每行一个）"""
+    st.number_input("大文件阈值 (MB)", min_value=1, max_value=2048, value=DEFAULT_LARGE_FILE_LIMIT // (1024 * 1024),
+                    step=10, key="large_file_limit_mb", help="GitHub 对 50 MB 以上的文件给出警告，拒绝超过 100 MB 的文件")
+    text = st.text_area("构建产物模式（每行一个 glob）", value='\n'.join(git_ops.artifact_patterns()),
+                        height=160, key="artifact_patterns_input",
+                        help="语法同依赖清单模式；以 /** 结尾的模式匹配整个目录")
+    col_a, col_b = st.columns(2)
+    with col_a:
+        if st.button("保存", use_container_width=True, key="save_artifact_patterns"):
+            git_ops.set_artifact_patterns(text.splitlines())
+            st.rerun()
+    with col_b:
+        if st.button("恢复默认", use_container_width=True, key="reset_artifact_patterns"):
+            git_ops.set_artifact_patterns(DEFAULT_ARTIFACT_PATTERNS)
+            del st.session_state.artifact_patterns_input
+            st.rerun()
+
+
+_LARGE_FILE_ACTIONS = {
+    "skip": "推送时跳过（文件保留在本地）",
+    "lfs": "大文件改用 Git LFS，其余跳过",
+    "include": "仍然全部提交",
+}
+
+
+def render_staging_guard(git_ops, scan, max_items=20):
+    """
+    暂存前检查结果：列出大文件与构建产物，选择跳过 / 改用 Git LFS / 仍然提交
+    返回 (要跳过的命中路径, 交给 Git LFS 的文件)
+    """
+    if not scan.hits:
+        return [], []
+
+    items = []
+    for hit in scan.hits[:max_items]:
+        if hit.is_directory:
+            detail = f"{hit.files} 个文件，{_format_size(hit.size)}" if hit.size is not None else "目录"
+        else:
+            detail = _format_size(hit.size) + ("，二进制" if hit.binary else "")
+        if hit.pattern:
+            detail += f"，匹配 <code>{html.escape(hit.pattern)}</code>"
+        icon = "🚫" if hit.rejected else "📁" if hit.is_directory else "⚠️"
+        items.append(f'{icon} <code>{html.escape(hit.path)}</code>（{detail}）')
+    if len(scan.hits) > max_items:
+        items.append(f"… 另有 {len(scan.hits) - max_items} 项")
+    st.markdown(f"""
+    <div class="warning-box">
+        <strong>⚠️ 发现 {len(scan.hits)} 个大文件或构建产物</strong><br>
+        这些文件会让推送和克隆变慢，超过 {GITHUB_FILE_LIMIT // (1024 * 1024)} MB 的文件（🚫）会被 GitHub 拒绝:<br>
+        {'<br>'.join(items)}
+    </div>
+    """, unsafe_allow_html=True)
+
+    actions = ["skip", "include"]
+    if any(hit.oversized and not hit.is_directory for hit in scan.hits):
+        # 是否安装 Git LFS 在会话内只检查一次
+        if 'lfs_available' not in st.session_state:
+            st.session_state.lfs_available = git_ops.lfs_available()
+        if st.session_state.lfs_available:
+            actions.insert(1, "lfs")
+        else:
+            st.caption("安装 Git LFS 后可将大文件改用 LFS 管理")
+    if st.session_state.get('large_file_action') not in actions:
+        st.session_state.large_file_action = "skip"
+    action = st.radio("处理方式", actions, format_func=_LARGE_FILE_ACTIONS.get, key="large_file_action")
+
+    keep = []
+    if action != "include":
+        paths = [hit.path for hit in scan.hits]
+        st.session_state.large_file_keep = [path for path in st.session_state.get('large_file_keep', [])
+                                            if path in set(paths)]
+        keep = st.multiselect("以下项目仍然照常提交", paths, key="large_file_keep", placeholder="选择例外的文件")
+    elif any(hit.rejected for hit in scan.hits):
+        st.caption("🚫 标记的文件超过 GitHub 的大小限制，推送会失败")
+    return scan.plan(action, keep)
+
+
+_INSTALL_STATUS = {"pending": "⏳ 等待", "running": "🔄 安装中", "ok": "✅ 完成", "failed": "❌ 失败",
+                   "missing": "⚠️ 未安装工具"}
+
+
+def render_install_panel(installer, location):
+    """侧边栏：检查依赖文件哈希，手动触发安装"""
+    st.toggle("拉取后自动安装依赖（仅在依赖文件变化时）", key="auto_install_deps")
+    st.caption(f"安装记录按位置保存，当前位置: {location}")
+    if st.button("检查依赖", use_container_width=True, key="check_deps_btn"):
+        st.session_state.install_plan = installer.plan(location)
+    plan = st.session_state.get('install_plan')
+    if plan is None:
+        return
+    if not plan:
+        st.caption("未找到依赖清单")
+        return
+    st.dataframe([{
+        "目录": task.directory or ".",
+        "生态": task.ecosystem,
+        "状态": "需要安装" if task.changed else "无变化",
+    } for task in plan], hide_index=True)
+    changed = [task for task in plan if task.changed]
+    if st.button(f"安装有变化的依赖（{len(changed)}）", use_container_width=True, key="install_deps_btn",
+                 disabled=not changed or installer.running):
+        installer.start(location, changed)
+        st.session_state.install_plan = None
+        st.rerun()
+
+
+def render_install_progress(installer):
+    """主区域：后台依赖安装的状态与输出"""
+    if not installer.tasks:
+        return
+    st.markdown("### 🧩 依赖安装")
+    st.dataframe([{
+        "目录": task.directory or ".",
+        "命令": task.command,
+        "状态": _INSTALL_STATUS.get(task.status, task.status),
+    } for task in installer.tasks], hide_index=True, use_container_width=True)
+    if installer.running:
+        if st.button("刷新安装进度", key="install_refresh_btn"):
+            st.rerun()
+    if installer.console_output:
+        st.markdown(f'<div class="console-container">\n{installer.console_output.to_html()}\n</div>',
+                    unsafe_allow_html=True)
+
+
+def hold_foreground_lock(lock):
+    """
+    前台拉取/推送与后台任务（定时获取、自动同步、补全历史）互斥，但不等待后台任务（获取可能持续很久）：
+    拿到锁时返回退出后释放锁的上下文；锁被占用时提示稍后再试，返回 None
+    """
+    if not lock.acquire(blocking=False):
+        st.markdown("""
+        <div class="info-box">
+            ⏳ 后台任务（定时获取、自动同步或补全历史）正在访问仓库，请稍后再试。<br>
+            如需立即操作，可在侧边栏暂停定时获取或自动同步。
+        </div>
+        """, unsafe_allow_html=True)
+        return None
+    held = ExitStack()
+    held.callback(lock.release)
+    return held
+
+
+def render_error_box(title, message):
+    """渲染错误提示框"""
+    st.markdown(f"""
+    <div class="error-box">
+        <strong>❌ {title}</strong><br>
+        {message}
+    </div>
+    """, unsafe_allow_html=True)
+
+
+FAILURE_HINTS = {
+    "timeout": "长时间没有收到远程仓库的数据，已中止。请检查网络或 VPN 后重试。",
+    "auth": "认证失败：请检查账号凭据、SSH 密钥或仓库访问权限。",
+    "network": "无法连接远程仓库，请检查网络连接。",
+    "cancelled": "操作已取消。",
+}
+
+
+def render_failure_box(title, failure, default_message, conflict_message=None):
+    """按失败类别（超时 / 认证 / 冲突 / 网络）渲染错误提示，附带 git 输出中最相关的一行"""
+    if failure is None:
+        render_error_box(title, default_message)
+        return
+    message = FAILURE_HINTS.get(failure.kind)
+    if failure.kind == "conflict" and conflict_message:
+        message = conflict_message
+    message = message or default_message
+    if failure.attempts > 1:
+        message += f"（已自动重试 {failure.attempts - 1} 次）"
+    if failure.message and failure.kind != "cancelled":
+        message += f"<br><code>{html.escape(failure.message)}</code>"
+    render_error_box(f"{title}：{failure.label}", message)
+
+
+def render_success_box(title, message):
+    """渲染成功提示框"""
+    st.markdown(f"""
+    <div class="info-box" style="border-left-color: #48bb78; background: rgba(72, 187, 120, 0.1);">
+        <strong>✅ {title}</strong><br>
+        {message}
+    </div>
+    """, unsafe_allow_html=True)
+
+
+# ==================== 主程序 ====================
+
+def main():
+    setup_page()
+
+    # 初始化 session state
+    if 'console_output' not in st.session_state:
+        st.session_state.console_output = []
+    if 'last_action' not in st.session_state:
+        st.session_state.last_action = None
+    if 'location' not in st.session_state:
+        st.session_state.location = 'Office'
+
+    # 模式选择：单仓库 / 多仓库工作区
+    with st.sidebar:
+        mode = st.radio("模式", ["单仓库", "工作区"], horizontal=True, key="app_mode")
+    if mode == "工作区":
+        render_workspace_page()
+        return
+
+    # 初始化 Git 操作类
+    GitOperations.metrics = get_command_metrics()
+    GitOperations.branch_index_cache = get_branch_index_cache()
+    git_ops = GitOperations(st.session_state.get('repo_path', '.'))
+    fetch_scheduler = get_fetch_scheduler(str(git_ops.repo_path))
+    tree_watcher = get_tree_watcher(str(git_ops.repo_path))
+    installer = get_dependency_installer(str(git_ops.repo_path))
+    if st.session_state.get('watch_enabled', True):
+        tree_watcher.start()
+        git_ops.watcher = tree_watcher
+    else:
+        tree_watcher.stop()
+
+    # 检查是否为 Git 仓库
+    if not git_ops.is_git_repo():
+        render_bootstrap_page(git_ops)
+        st.stop()
+
+    # 页面读取阶段：状态快照、远程地址等相互独立的查询并发执行，之后的读取直接命中缓存
+    # （分支索引只在打开分支相关开关后加载）
+    AsyncGitOperations(git_ops).prefetch()
+
+    # 侧边栏配置
+    with st.sidebar:
+        st.markdown("""
+        <h2 style="color: #667eea; text-align: center;">⚙️ 设置</h2>
+        """, unsafe_allow_html=True)
+
+        st.session_state.location = st.selectbox(
+            "📍 当前位置",
+            ['Office', 'Home', 'Other'],
+            label_visibility="collapsed"
+        )
+
+        st.markdown("---")
+
+        # 远程仓库管理
+        st.markdown("### 🔗 远程仓库")
+        remote_url = git_ops.get_remote_url()
+        if remote_url:
+            st.markdown(f"""
+            <div style="font-size: 0.75rem; color: #a0aec0; margin-bottom: 0.5rem;">
+            当前远程:<br>
+            <code style="word-break: break-all;">{remote_url}</code>
+            </div>
+            """, unsafe_allow_html=True)
+
+        with st.expander("修改远程仓库地址"):
+            new_remote_url = st.text_input(
+                "新仓库地址",
+                placeholder="https://github.com/用户名/仓库名.git",
+                value=remote_url or "",
+                key="remote_url_input"
+            )
+            col_a, col_b = st.columns(2)
+            with col_a:
+                if st.button("应用", use_container_width=True, key="apply_remote"):
+                    if new_remote_url and new_remote_url != remote_url:
+                        git_ops.reset_console()
+                        if git_ops.set_remote_url(new_remote_url):
+                            st.session_state.console_output = git_ops.console_output
+                            st.session_state.last_action = "remote_updated"
+                            st.rerun()
+                        else:
+                            st.session_state.console_output = git_ops.console_output
+                            st.session_state.last_action = "remote_error"
+                            st.rerun()
+            with col_b:
+                if st.button("重置", use_container_width=True, key="reset_remote"):
+                    st.rerun()
+
+        st.markdown("---")
+
+        # 分支管理
+        st.markdown("### 🌿 分支管理")
+
+        # 分支列表只在打开对应开关时加载
+        current_branch = git_ops.get_current_branch()
+
+        # 显示当前分支
+        st.markdown(f"""
+        <div style="font-size: 0.75rem; color: #a0aec0; margin-bottom: 0.5rem;">
+        当前分支: <span style="color: #667eea; font-weight: bold;">{current_branch}</span>
+        </div>
+        """, unsafe_allow_html=True)
+
+        # 切换分支
+        if st.toggle("切换分支", key="show_switch_branch"):
+            switch_to = render_branch_picker(git_ops, "选择要切换的分支", "switch_branch",
+                                             exclude=(current_branch,))
+            if st.button("切换", use_container_width=True, key="switch_branch_btn", disabled=switch_to is None):
+                if switch_to != current_branch:
+                    git_ops.reset_console()
+                    if git_ops.switch_branch(switch_to):
+                        st.session_state.console_output = git_ops.console_output
+                        st.session_state.last_action = "branch_switched"
+                        st.rerun()
+                    else:
+                        st.session_state.console_output = git_ops.console_output
+                        st.session_state.last_action = "branch_switch_error"
+                        st.rerun()
+
+        # 创建新分支
+        with st.expander("创建新分支"):
+            new_branch_name = st.text_input(
+                "新分支名称",
+                placeholder="feature/new-feature",
+                key="new_branch_input"
+            )
+            if st.button("创建分支", use_container_width=True, key="create_branch_btn"):
+                if new_branch_name:
+                    git_ops.reset_console()
+                    if git_ops.create_branch(new_branch_name):
+                        st.session_state.console_output = git_ops.console_output
+                        st.session_state.last_action = "branch_created"
+                        st.rerun()
+                    else:
+                        st.session_state.console_output = git_ops.console_output
+                        st.session_state.last_action = "branch_create_error"
+                        st.rerun()
+
+        # 从远程创建本地分支
+        if st.toggle("从远程创建分支", key="show_checkout_remote"):
+            checkout_remote = render_branch_picker(git_ops, "选择远程分支", "checkout_remote", remote="origin",
+                                                   exclude=(current_branch,))
+            if st.button("检出并创建", use_container_width=True, key="checkout_remote_btn",
+                         disabled=checkout_remote is None):
+                git_ops.reset_console()
+                if git_ops.create_and_checkout_branch(checkout_remote, f"origin/{checkout_remote}"):
+                    st.session_state.console_output = git_ops.console_output
+                    st.session_state.last_action = "branch_created_from_remote"
+                    st.rerun()
+                else:
+                    st.session_state.console_output = git_ops.console_output
+                    st.session_state.last_action = "branch_create_error"
+                    st.rerun()
+
+        # 删除分支
+        if st.toggle("删除分支", key="show_delete_branch"):
+            delete_branch = render_branch_picker(git_ops, "选择要删除的分支", "delete_branch",
+                                                 exclude=(current_branch,))
+            if delete_branch is None:
+                st.info("没有可删除的分支")
+            else:
+                col_d1, col_d2 = st.columns(2)
+                with col_d1:
+                    if st.button("删除", use_container_width=True, key="delete_branch_btn"):
+                        git_ops.reset_console()
+                        if git_ops.delete_branch(delete_branch):
+                            st.session_state.console_output = git_ops.console_output
+                            st.session_state.last_action = "branch_deleted"
+                            st.rerun()
+                        else:
+                            st.session_state.console_output = git_ops.console_output
+                            st.session_state.last_action = "branch_delete_error"
+                            st.rerun()
+                with col_d2:
+                    if st.button("强制删除", use_container_width=True, key="force_delete_branch_btn"):
+                        git_ops.reset_console()
+                        if git_ops.delete_branch(delete_branch, force=True):
+                            st.session_state.console_output = git_ops.console_output
+                            st.session_state.last_action = "branch_deleted"
+                            st.rerun()
+                        else:
+                            st.session_state.console_output = git_ops.console_output
+                            st.session_state.last_action = "branch_delete_error"
+                            st.rerun()
+
+        st.markdown("---")
+
+        st.markdown("""
+        <div class="help-text">
+            <p><strong>使用说明:</strong></p>
+            <ul>
+                <li><strong>上班准备</strong> = 从 GitHub 拉取最新代码</li>
+                <li><strong>下班交接</strong> = 把今天的改动推送到 GitHub</li>
+            </ul>
+        </div>
+        """, unsafe_allow_html=True)
+
+        st.markdown("---")
+
+        # 后台获取
+        with st.expander("🔁 后台获取远程信息"):
+            auto_fetch = st.checkbox("定时执行 git fetch", value=True, key="auto_fetch_enabled")
+            fetch_interval = st.number_input(
+                "间隔（秒）", min_value=30, max_value=3600, value=300, step=30, key="auto_fetch_interval"
+            )
+            if st.button("立即获取", use_container_width=True, key="fetch_now_btn"):
+                fetch_scheduler.trigger()
+
+        if auto_fetch:
+            fetch_scheduler.set_interval(fetch_interval)
+            fetch_scheduler.start()
+        else:
+            fetch_scheduler.stop()
+
+        # 自动同步
+        auto_syncer = get_auto_syncer(str(git_ops.repo_path))
+        with st.expander("🔄 自动同步"):
+            auto_sync = st.checkbox("自动提交并推送（WIP）", value=False, key="auto_sync_enabled")
+            quiet_period = st.number_input(
+                "安静期（秒）", min_value=10, max_value=3600, value=120, step=10, key="auto_sync_quiet"
+            )
+            min_interval = st.number_input(
+                "最小提交间隔（秒）", min_value=60, max_value=7200, value=600, step=60, key="auto_sync_interval"
+            )
+            max_wait = st.number_input(
+                "持续修改时最多等待（秒）", min_value=60, max_value=14400, value=1800, step=60, key="auto_sync_max_wait"
+            )
+            auto_syncer.location = st.session_state.location
+            auto_syncer.quiet_period = quiet_period
+            auto_syncer.min_interval = min_interval
+            auto_syncer.max_wait = max_wait
+            if auto_sync:
+                auto_syncer.start()
+            else:
+                auto_syncer.stop()
+            render_auto_sync_panel(auto_syncer)
+
+        # 大仓库模式
+        large_repo_tuner = get_large_repo_tuner(str(git_ops.repo_path))
+        large_repo_tuner.touch()
+        with st.expander("🐘 大仓库模式"):
+            if st.checkbox("启用大仓库模式", value=False, key="large_repo_mode"):
+                large_repo_tuner.start()
+                render_large_repo_panel(large_repo_tuner)
+            else:
+                large_repo_tuner.stop()
+
+        # 浅克隆 / 部分克隆
+        if git_ops.is_shallow() or git_ops.partial_clone_filter():
+            with st.expander("🌱 克隆历史", expanded=git_ops.is_shallow()):
+                render_history_panel(git_ops, get_history_deepener(str(git_ops.repo_path)))
+
+        # 依赖清单
+        with st.expander("📦 依赖清单"):
+            render_manifest_settings(git_ops)
+
+        # 大文件检查
+        with st.expander("🧱 大文件检查"):
+            render_artifact_settings(git_ops)
+
+        # 依赖安装
+        with st.expander("🧩 依赖安装"):
+            render_install_panel(installer, st.session_state.location)
+
+        # 命令耗时
+        with st.expander("⏱️ 命令耗时"):
+            render_metrics_panel(GitOperations.metrics)
+
+        # 文件监听
+        with st.expander("👀 文件监听"):
+            st.checkbox("仅在文件变化时重新计算状态", value=True, key="watch_enabled")
+            if tree_watcher.running:
+                backend = {"inotify": "inotify", "polling": "轮询"}.get(tree_watcher.backend, "初始化中")
+                st.caption(f"监听方式: {backend}")
+
+        st.markdown("---")
+
+        if st.button("🔄 刷新状态", use_container_width=True):
+            st.rerun()
+
+    # 主界面
+    render_status_card(git_ops, fetch_scheduler)
+
+    st.markdown("---")
+
+    # 文件变更展示
+    render_file_changes(git_ops)
+
+    # 配置文件变更警告
+    changed_configs = git_ops.get_config_files_status()
+    if changed_configs:
+        render_config_warning(changed_configs)
+
+    st.markdown("---")
+
+    # 操作按钮区域
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("### 🌅 上班准备")
+        st.markdown('<p class="help-text">从 GitHub 拉取最新代码到本地</p>', unsafe_allow_html=True)
+
+        held = st.button("📥 一键拉取", type="secondary", use_container_width=True) and \
+            hold_foreground_lock(fetch_scheduler.lock)
+        if held:
+            with st.spinner("正在从远程拉取代码..."), held:
+                git_ops.reset_console()
+                on_output, on_progress = render_live_progress(git_ops)
+
+                if git_ops.pull(on_output=on_output, on_progress=on_progress):
+                    st.session_state.console_output = git_ops.console_output
+                    st.session_state.pulled_manifests = git_ops.pulled_manifests
+                    if st.session_state.get('auto_install_deps'):
+                        installer.start(st.session_state.location)
+                    st.session_state.last_action = "pull_success"
+                    st.rerun()
+                else:
+                    st.session_state.console_output = git_ops.console_output
+                    st.session_state.last_failure = git_ops.last_failure
+                    st.session_state.last_action = "pull_error"
+                    st.rerun()
+
+    with col2:
+        st.markdown("### 🌙 下班交接")
+        st.markdown('<p class="help-text">把今天的改动推送到 GitHub 保管</p>', unsafe_allow_html=True)
+
+        # 推送前检查
+        selected_paths = get_selected_paths(git_ops)
+        has_changes = git_ops.has_uncommitted_changes() if selected_paths is None else bool(selected_paths)
+        remote_has_updates = git_ops.check_remote_has_updates()
+
+        if remote_has_updates:
+            st.markdown("""
+            <div class="warning-box">
+                <strong>⚠️ 远程有新内容!</strong><br>
+                请先执行"一键拉取"，避免代码冲突。
+            </div>
+            """, unsafe_allow_html=True)
+
+        # 暂存前检查：大文件与构建产物（文件没有变化时直接使用上次的结果）
+        scan, skip, lfs = None, [], []
+        if has_changes:
+            max_size = int(st.session_state.get('large_file_limit_mb', DEFAULT_LARGE_FILE_LIMIT // (1024 * 1024)))
+            scan = git_ops.scan_staging_candidates(selected_paths, max_size=max_size * 1024 * 1024)
+            skip, lfs = render_staging_guard(git_ops, scan)
+
+        if st.button("📤 一键推送", type="primary", use_container_width=True, disabled=remote_has_updates):
+            held = None
+            if not has_changes:
+                st.markdown("""
+                <div class="info-box">
+                    没有需要提交的更改，所有内容已是最新。
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                held = hold_foreground_lock(fetch_scheduler.lock)
+            if held:
+                with st.spinner("正在推送到远程仓库..."), held:
+                    git_ops.reset_console()
+
+                    # 生成提交信息
+                    now = datetime.now().strftime("%Y-%m-%d %H:%M")
+                    location = st.session_state.location
+                    commit_msg = f"Sync from {location} - {now}"
+
+                    # 暂存变更（全部或选中的文件），跳过标记的大文件，需要时先交给 Git LFS
+                    if not git_ops.stage_scanned(scan, skip=skip, lfs=lfs):
+                        st.session_state.last_action = "add_error"
+                        st.session_state.console_output = git_ops.console_output
+                        st.rerun()
+                    st.session_state.skipped_files = skip
+
+                    # 执行 git commit
+                    commit_paths = None
+                    if selected_paths is not None:
+                        commit_paths = scan.commit_list(skip) + (['.gitattributes'] if lfs else [])
+                    if not git_ops.commit(commit_msg, paths=commit_paths):
+                        # 可能没有可提交的内容
+                        pass
+
+                    # 执行 git push
+                    on_output, on_progress = render_live_progress(git_ops)
+                    if git_ops.push(on_output=on_output, on_progress=on_progress):
+                        st.session_state.console_output = git_ops.console_output
+                        st.session_state.last_action = "push_success"
+                        st.rerun()
+                    else:
+                        st.session_state.console_output = git_ops.console_output
+                        st.session_state.last_failure = git_ops.last_failure
+                        st.session_state.last_action = "push_error"
+                        st.rerun()
+
+        # 推送所有领先的分支（不切换分支，一次原子推送）；打开开关后才查询分支
+        if st.toggle("推送全部领先的分支", key="show_push_branches"):
+            ahead_branches, diverged_branches = git_ops.get_ahead_branches()
+            names = "、".join(f"{b.name} (+{b.ahead})" for b in ahead_branches) or "无"
+            st.markdown(f'<p class="help-text">领先远程的分支: {html.escape(names)}</p>', unsafe_allow_html=True)
+            if diverged_branches:
+                st.markdown(f'<p class="help-text">已分叉需先合并: '
+                            f'{html.escape("、".join(b.name for b in diverged_branches))}</p>', unsafe_allow_html=True)
+            held = ahead_branches and st.button(f"📤 推送全部领先分支（{len(ahead_branches)}）",
+                                                use_container_width=True, key="push_all_branches_btn") and \
+                hold_foreground_lock(fetch_scheduler.lock)
+            if held:
+                with st.spinner("正在推送分支..."), held:
+                    git_ops.reset_console()
+                    on_output, on_progress = render_live_progress(git_ops)
+                    report = git_ops.push_ahead_branches(ahead_branches, on_output=on_output, on_progress=on_progress)
+                    st.session_state.push_report = report
+                    st.session_state.last_failure = git_ops.last_failure
+                    st.session_state.console_output = git_ops.console_output
+                    st.session_state.last_action = ("push_all_success" if report and all(r.ok for r in report)
+                                                    else "push_all_error")
+                    st.rerun()
+
+    st.markdown("---")
+
+    # 操作结果反馈
+    if st.session_state.last_action:
+        if st.session_state.last_action == "pull_success":
+            render_success_box("拉取成功", "已从远程获取最新代码并自动合并。")
+            render_pulled_manifests(st.session_state.get('pulled_manifests', []))
+        elif st.session_state.last_action == "push_success":
+            message = f"已将代码推送到 GitHub，提交信息包含位置标记: {st.session_state.location}"
+            skipped = st.session_state.get('skipped_files')
+            if skipped:
+                message += f"<br>已跳过 {len(skipped)} 个大文件或构建产物，它们仍保留在本地"
+            render_success_box("推送成功", message)
+        elif st.session_state.last_action == "pull_error":
+            render_failure_box("拉取失败", st.session_state.get('last_failure'),
+                               "请检查网络连接或 Git 配置。如有冲突，请手动解决。",
+                               conflict_message="存在冲突或本地改动会被覆盖，请手动解决后再拉取。")
+        elif st.session_state.last_action == "push_error":
+            render_failure_box("推送失败", st.session_state.get('last_failure'),
+                               "请检查网络连接、仓库权限或是否有冲突需要解决。",
+                               conflict_message="远程有新的提交，请先拉取合并后再推送。")
+        elif st.session_state.last_action == "cancelled":
+            st.markdown("""
+            <div class="info-box">
+                ⏹️ 操作已取消，git 进程已结束。
+            </div>
+            """, unsafe_allow_html=True)
+        elif st.session_state.last_action in ("push_all_success", "push_all_error"):
+            report = st.session_state.get('push_report', [])
+            if st.session_state.last_action == "push_all_success":
+                render_success_box("分支推送成功", f"已在一次原子推送中更新 {len(report)} 个分支。")
+            else:
+                render_failure_box("分支推送失败", st.session_state.get('last_failure'),
+                                   "原子推送未完成，所有分支均未更新。请查看下方各分支的结果。",
+                                   conflict_message="有分支被远程拒绝，原子推送未更新任何分支。请查看下方各分支的结果。")
+            if report:
+                st.dataframe([{
+                    "分支": r.branch,
+                    "远程": r.remote,
+                    "结果": "✅" if r.ok else "❌",
+                    "说明": r.summary,
+                } for r in report], hide_index=True, use_container_width=True)
+        elif st.session_state.last_action == "clone_success":
+            render_success_box("克隆成功", f"已克隆到 {html.escape(str(git_ops.repo_path))}，可以开始工作了。")
+        elif st.session_state.last_action == "add_error":
+            render_error_box("添加文件失败", "请检查文件权限或 Git 仓库状态。")
+        elif st.session_state.last_action == "remote_updated":
+            render_success_box("远程仓库已更新", "远程仓库地址已成功修改。")
+        elif st.session_state.last_action == "remote_error":
+            render_error_box("修改失败", "远程仓库地址修改失败，请检查地址格式是否正确。")
+        elif st.session_state.last_action == "branch_switched":
+            render_success_box("分支切换成功", f"已切换到新分支，请继续工作。")
+        elif st.session_state.last_action == "branch_switch_error":
+            render_error_box("切换失败", "分支切换失败，请检查是否有未提交的更改。")
+        elif st.session_state.last_action == "branch_created":
+            render_success_box("分支创建成功", "新分支已创建并自动切换。")
+        elif st.session_state.last_action == "branch_created_from_remote":
+            render_success_box("分支检出成功", "已从远程创建并切换到新分支。")
+        elif st.session_state.last_action == "branch_create_error":
+            render_error_box("创建失败", "分支创建失败，请检查分支名称是否合法。")
+        elif st.session_state.last_action == "branch_deleted":
+            render_success_box("分支删除成功", "分支已成功删除。")
+        elif st.session_state.last_action == "branch_delete_error":
+            render_error_box("删除失败", "分支删除失败，可能存在未合并的更改。")
+
+    # 控制台输出
+    if st.session_state.console_output:
+        render_console_output(st.session_state.console_output)
+
+    # 后台依赖安装
+    render_install_progress(installer)
+
+    # 页脚
+    st.markdown("---")
+    st.markdown("""
+    <div style="text-align: center; color: #718096; font-size: 0.8rem; padding: 1rem;">
+        Git 同步工具 v1.1 | 基于 Streamlit 构建 | 跨端同步无忧
+    </div>
+    """, unsafe_allow_html=True)
@@ -0,0 +1,39 @@
+"""测试公共夹具：临时 Git 仓库"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sync_core import GitOperations  # noqa: E402
+
+
+def git(repo, *args, input=None):
+    """在 repo 中执行 git 命令，失败时抛出异常，返回标准输出"""
+    return subprocess.run(["git", *args], cwd=repo, input=input, capture_output=True, text=True,
+                          check=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """带一个初始提交的临时仓库（不读取用户的全局配置）"""
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", str(tmp_path / "gitconfig"))
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    for key in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{key}_NAME", "Test")
+        monkeypatch.setenv(f"GIT_{key}_EMAIL", "test@example.com")
+    path = tmp_path / "work"
+    path.mkdir()
+    git(path, "init", "-q", "-b", "main")
+    (path / "README.md").write_text("readme\n")
+    git(path, "add", "README.md")
+    git(path, "commit", "-q", "-m", "init")
+    return path
+
+
+@pytest.fixture
+def git_ops(repo):
+    return GitOperations(repo)
@@ -0,0 +1,57 @@
+"""AsyncGitOperations：取消时回收进程并归还名额，单条查询走同步路径"""
+
+import asyncio
+
+import pytest
+
+from conftest import git
+from sync_core import AsyncGitOperations, GitOperations
+
+
+def free_slots(git_ops):
+    slots = git_ops.repo_slots()
+    count = 0
+    while slots.acquire(blocking=False):
+        count += 1
+    for _ in range(count):
+        slots.release()
+    return count
+
+
+def test_cancel_releases_slot(git_ops):
+    aio = AsyncGitOperations(git_ops)
+
+    async def cancel_mid_run():
+        task = asyncio.ensure_future(aio._run("-c", "alias.slow=!sleep 1", "slow"))
+        await asyncio.sleep(0.3)
+        assert free_slots(git_ops) == GitOperations.MAX_PROCESSES_PER_REPO - 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_mid_run())
+    assert git_ops.last_outcome == "cancelled"
+    assert free_slots(git_ops) == GitOperations.MAX_PROCESSES_PER_REPO
+
+
+def test_prefetch_single_read_is_serial(repo, monkeypatch):
+    git(repo, "remote", "add", "origin", "https://example.com/repo.git")
+    git_ops = GitOperations(repo)
+
+    def no_event_loop(*args, **kwargs):
+        raise AssertionError("单条查询不应创建事件循环")
+
+    monkeypatch.setattr(asyncio, "run", no_event_loop)
+    assert AsyncGitOperations(git_ops).prefetch(refresh=True) == 1
+    assert git_ops._snapshot.valid
+    assert AsyncGitOperations(git_ops).prefetch() == 0
+
+
+def test_prefetch_runs_several_reads_concurrently(git_ops, monkeypatch):
+    # 没有 origin 时远程地址也需要启动进程
+    runs = []
+    run = asyncio.run
+    monkeypatch.setattr(asyncio, "run", lambda main: runs.append(1) or run(main))
+    assert AsyncGitOperations(git_ops).prefetch(refresh=True) == 2
+    assert runs == [1]
+    assert git_ops._snapshot.valid
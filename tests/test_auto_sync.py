@@ -0,0 +1,79 @@
+"""自动同步与大仓库维护：锁被占用时不等待，自己的提交不算新的修改"""
+
+import threading
+
+from conftest import git
+from sync_core import AutoSyncer, LargeRepoTuner, TreeWatcher
+
+
+def make_syncer(repo):
+    # 本地裸仓库作为远程，推送立即完成
+    remote = repo.parent / "origin.git"
+    git(repo.parent, "init", "-q", "--bare", str(remote))
+    git(repo, "remote", "add", "origin", str(remote))
+    git(repo, "push", "-q", "-u", "origin", "main")
+    syncer = AutoSyncer(repo, quiet_period=0, min_interval=0, poll_interval=0)
+    scans = []
+    scan = syncer.git_ops.scan_staging_candidates
+
+    def counting_scan(*args, **kwargs):
+        scans.append(1)
+        return scan(*args, **kwargs)
+
+    syncer.git_ops.scan_staging_candidates = counting_scan
+    return syncer, scans
+
+
+def test_own_commit_is_not_a_new_change(repo):
+    syncer, scans = make_syncer(repo)
+    syncer.step(now=0)
+    (repo / "README.md").write_text("changed\n")
+    syncer.step(now=1)
+    assert syncer.commits == 1
+    count = len(scans)
+    syncer.step(now=2)
+    syncer.step(now=3)
+    assert len(scans) == count
+    assert syncer.pending_since is None
+
+
+def test_commit_waits_for_lock_without_blocking(repo):
+    syncer, _ = make_syncer(repo)
+    syncer.step(now=0)
+    (repo / "README.md").write_text("changed\n")
+    with syncer.lock:
+        syncer.trigger()
+        syncer.step(now=1)
+    assert syncer.commits == 0
+    assert syncer.pending_since is not None
+    syncer.step(now=2)
+    assert syncer.commits == 1
+
+
+def test_watcher_tree_generation_ignores_internal_invalidation(repo):
+    watcher = TreeWatcher(repo)
+    watcher.invalidate()
+    assert (watcher.generation, watcher.tree_generation) == (1, 0)
+    watcher.invalidate(tree=True)
+    assert (watcher.generation, watcher.tree_generation) == (2, 1)
+
+
+def test_tuner_reports_busy_instead_of_waiting(repo):
+    tuner = LargeRepoTuner(repo)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with tuner.lock:
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(5)
+    try:
+        assert tuner.enable_recommended() is None
+        assert tuner.run_maintenance(blocking=False) is None
+    finally:
+        release.set()
+        thread.join()
@@ -0,0 +1,128 @@
+"""分支索引解析与多分支原子推送"""
+
+from conftest import git
+from sync_core import BranchIndex, PushRefResult, TrackedBranch
+
+
+def ref_line(refname, head=" ", upstream="", remote="", merge_ref="", track="", date="1700000000"):
+    """按 BranchIndex.FORMAT 拼出 git for-each-ref 的一行输出"""
+    return '\0'.join([refname, head, upstream, remote, merge_ref, track, date])
+
+
+FOR_EACH_REF = '\n'.join([
+    ref_line("refs/heads/main", "*", "origin/main", "origin", "refs/heads/main", "ahead 2", "1700000300"),
+    ref_line("refs/heads/feature/login", " ", "origin/feature/login", "origin", "refs/heads/feature/login",
+             "ahead 1, behind 3", "1700000200"),
+    ref_line("refs/heads/old", " ", "origin/old", "origin", "refs/heads/old", "gone", "1700000100"),
+    ref_line("refs/heads/local-only", date=""),
+    ref_line("refs/remotes/origin/HEAD"),
+    ref_line("refs/remotes/origin/main", date="1700000250"),
+    ref_line("refs/remotes/origin/feature/login"),
+    ref_line("refs/remotes/upstream/main"),
+    ref_line("refs/tags/v1.0"),
+    "malformed",
+]) + '\n'
+
+# git push --atomic --porcelain 的标准输出
+PUSH_PORCELAIN = '\n'.join([
+    "To /srv/git/project.git",
+    "=\trefs/heads/main:refs/heads/main\t[up to date]",
+    " \trefs/heads/feature:refs/heads/feature\t1a2b3c4..5d6e7f8",
+    "*\trefs/heads/new:refs/heads/new\t[new branch]",
+    "+\trefs/heads/rewrite:refs/heads/rewrite\t1a2b3c4...5d6e7f8 (forced update)",
+    "!\trefs/heads/stale:refs/heads/stale\t[rejected] (fetch first)",
+    "Done",
+]) + '\n'
+
+
+def test_parse_track():
+    assert TrackedBranch.parse_track("") == (0, 0, False)
+    assert TrackedBranch.parse_track("ahead 2") == (2, 0, False)
+    assert TrackedBranch.parse_track("ahead 1, behind 3") == (1, 3, False)
+    assert TrackedBranch.parse_track("gone") == (0, 0, True)
+
+
+def test_branch_index_parse():
+    index = BranchIndex.parse(FOR_EACH_REF)
+    assert list(index.local) == ["main", "feature/login", "old", "local-only"]
+    assert list(index.remote) == ["origin/main", "origin/feature/login", "upstream/main"]
+    assert index.current == "main"
+
+    login = index.local["feature/login"]
+    assert (login.upstream, login.remote, login.merge_ref) == ("origin/feature/login", "origin",
+                                                               "refs/heads/feature/login")
+    assert (login.ahead, login.behind, login.gone) == (1, 3, False)
+    assert index.local["old"].gone
+    assert index.local["local-only"].commit_time == 0
+    assert index.remote["upstream/main"].remote == "upstream"
+    assert index.remote_branch_names("origin") == ["main", "feature/login"]
+
+
+def test_branch_index_search():
+    index = BranchIndex.parse(FOR_EACH_REF)
+    assert [name for name, _ in index.search()[0]] == ["main", "feature/login", "old", "local-only"]
+    # 前缀匹配排在子串匹配前面
+    assert [name for name, _ in index.search("lo")[0]] == ["local-only", "feature/login"]
+    page, total = index.search("", page=2, page_size=3)
+    assert ([name for name, _ in page], total) == (["local-only"], 4)
+    assert [name for name, _ in index.search("main", remote="origin")[0]] == ["main"]
+    assert index.search("main", exclude={"main"}) == ([], 0)
+
+
+def test_push_porcelain():
+    results = PushRefResult.parse_porcelain("origin", PUSH_PORCELAIN)
+    assert [(r.branch, r.ok, r.flag) for r in results] == [
+        ("main", True, "="),
+        ("feature", True, " "),
+        ("new", True, "*"),
+        ("rewrite", True, "+"),
+        ("stale", False, "!"),
+    ]
+    assert results[-1].summary == "[rejected] (fetch first)"
+    assert all(r.remote == "origin" for r in results)
+
+
+def test_push_ahead_branches(tmp_path, repo, git_ops):
+    origin = tmp_path / "origin.git"
+    git(tmp_path, "init", "-q", "--bare", str(origin))
+    git(repo, "remote", "add", "origin", str(origin))
+    git(repo, "branch", "feature")
+    git(repo, "push", "-q", "-u", "origin", "main", "feature")
+    for branch in ("main", "feature"):
+        git(repo, "checkout", "-q", branch)
+        (repo / f"{branch}.txt").write_text(branch)
+        git(repo, "add", f"{branch}.txt")
+        git(repo, "commit", "-q", "-m", branch)
+
+    pushable, diverged = git_ops.get_ahead_branches()
+    assert sorted(b.name for b in pushable) == ["feature", "main"] and diverged == []
+    results = git_ops.push_ahead_branches()
+    assert sorted((r.branch, r.ok) for r in results) == [("feature", True), ("main", True)]
+    for branch in ("main", "feature"):
+        assert git(origin, "rev-parse", branch) == git(repo, "rev-parse", branch)
+
+
+def test_tracked_branches_query_only_local_heads(tmp_path, repo, git_ops):
+    origin = tmp_path / "origin.git"
+    git(tmp_path, "init", "-q", "--bare", str(origin))
+    git(repo, "remote", "add", "origin", str(origin))
+    git(repo, "branch", "old")
+    git(repo, "push", "-q", "-u", "origin", "main", "old")
+    git(repo, "branch", "local-only")
+    git(repo, "commit", "-q", "--allow-empty", "-m", "ahead")
+    git(repo, "push", "-q", "origin", "--delete", "old")
+    git(repo, "fetch", "-q", "--prune")
+
+    commands = []
+    run_command = git_ops._run_command
+
+    def recording(args, **kwargs):
+        commands.append(args)
+        return run_command(args, **kwargs)
+
+    git_ops._run_command = recording
+    tracked = {b.name: (b.remote, b.merge_ref, b.ahead, b.behind, b.gone) for b in git_ops.get_tracked_branches()}
+    assert tracked == {"main": ("origin", "refs/heads/main", 1, 0, False),
+                       "old": ("origin", "refs/heads/old", 0, 0, True)}
+    assert [args[-1] for args in commands] == ["refs/heads"]
+    assert [b.name for b in git_ops.get_ahead_branches()[0]] == ["main"]
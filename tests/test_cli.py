@@ -0,0 +1,77 @@
+"""命令行模式：sync_cli.main 的退出码与输出"""
+
+import json
+
+import pytest
+
+from conftest import git
+from sync_cli import main
+
+
+@pytest.fixture
+def remote(repo):
+    """本地裸仓库作为 origin，main 已设置上游"""
+    path = repo.parent / "origin.git"
+    git(repo.parent, "init", "-q", "--bare", str(path))
+    git(repo, "remote", "add", "origin", str(path))
+    git(repo, "push", "-q", "-u", "origin", "main")
+    return path
+
+
+def run_json(capsys, *argv):
+    code = main(list(argv) + ["--json"])
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_status_json(repo, capsys):
+    (repo / "README.md").write_text("changed\n")
+    (repo / "new.txt").write_text("new\n")
+    code, data = run_json(capsys, "status", "-C", str(repo))
+    assert code == 0
+    assert data["ok"] is True
+    assert data["branch"] == "main"
+    assert data["upstream"] is None
+    assert {(c["status"], c["path"]) for c in data["changes"]} == {(" M", "README.md"), ("??", "new.txt")}
+
+
+def test_status_text(repo, capsys):
+    assert main(["status", "-C", str(repo)]) == 0
+    out = capsys.readouterr().out
+    assert "分支: main  (未设置上游)" in out
+    assert "未提交文件: 0" in out
+
+
+def test_not_a_repo(tmp_path, capsys):
+    plain = tmp_path / "plain"
+    plain.mkdir()
+    code, data = run_json(capsys, "status", "-C", str(plain))
+    assert code == 1
+    assert data == {"ok": False, "error": "not_a_git_repo"}
+
+
+def test_bad_arguments_exit_2(repo, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["status", "--no-such-option"])
+    assert excinfo.value.code == 2
+
+
+def test_push_commits_and_pushes(repo, remote, capsys):
+    (repo / "README.md").write_text("changed\n")
+    code, data = run_json(capsys, "push", "-C", str(repo), "-m", "from cli")
+    assert code == 0
+    assert (data["committed"], data["pushed"], data["failure"]) == (True, True, None)
+    assert git(remote, "log", "-1", "--format=%s", "main").strip() == "from cli"
+
+    code, data = run_json(capsys, "push", "-C", str(repo))
+    assert code == 0
+    assert data == {"ok": True, "committed": False, "pushed": False}
+
+
+def test_pull_and_branches(repo, remote, capsys):
+    code, data = run_json(capsys, "pull", "-C", str(repo))
+    assert code == 0
+    assert data["failure"] is None
+    git(repo, "branch", "feature")
+    code, data = run_json(capsys, "branches", "-C", str(repo))
+    assert code == 0
+    assert {(b["name"], b["current"]) for b in data["branches"]} == {("main", True), ("feature", False)}
@@ -0,0 +1,81 @@
+"""失败分类、自动重试与停滞检测"""
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+from sync_core import GitFailure
+
+
+def failed(stderr, stdout=""):
+    return subprocess.CompletedProcess(["git"], 1, stdout, stderr)
+
+
+@pytest.mark.parametrize("stderr, kind, retryable", [
+    ("fatal: Authentication failed for 'https://example.com/repo.git/'", "auth", False),
+    ("git@github.com: Permission denied (publickey).\n"
+     "fatal: Could not read from remote repository.", "auth", False),
+    ("fatal: could not read Username for 'https://github.com': terminal prompts disabled", "auth", False),
+    ("remote: Repository not found.", "auth", False),
+    (" ! [rejected]        main -> main (fetch first)\nerror: failed to push some refs", "conflict", False),
+    ("hint: Updates were rejected because the tip of your current branch is behind (non-fast-forward)",
+     "conflict", False),
+    ("CONFLICT (content): Merge conflict in a.txt\nAutomatic merge failed; fix conflicts", "conflict", False),
+    ("error: Your local changes to the following files would be overwritten by merge:", "conflict", False),
+    ("fatal: Not possible to fast-forward, aborting.", "conflict", False),
+    ("ssh: connect to host example.com port 22: Connection timed out", "timeout", True),
+    ("fatal: unable to access 'https://example.com/': Could not resolve host: example.com", "network", True),
+    ("error: RPC failed; curl 56 GnuTLS recv error (-9)\nfatal: early EOF", "network", True),
+    ("fatal: the remote end hung up unexpectedly", "network", True),
+    ("ssh: connect to host example.com port 22: Connection refused", "network", True),
+    ("fatal: not a git repository (or any of the parent directories): .git", "error", False),
+    ("", "error", False),
+])
+def test_classify_stderr(stderr, kind, retryable):
+    failure = GitFailure.classify(failed(stderr))
+    assert failure.kind == kind
+    assert failure.retryable is retryable
+    if stderr:
+        assert failure.message in stderr
+
+
+@pytest.mark.parametrize("outcome, kind, retryable", [
+    ("stall", "timeout", True),
+    ("timeout", "timeout", True),
+    ("cancelled", "cancelled", False),
+])
+def test_classify_outcome_overrides_output(outcome, kind, retryable):
+    failure = GitFailure.classify(failed("fatal: Authentication failed"), outcome)
+    assert (failure.kind, failure.retryable) == (kind, retryable)
+
+
+@pytest.mark.parametrize("stderr, attempts", [
+    ("fatal: the remote end hung up unexpectedly", 3),
+    ("fatal: Authentication failed", 1),
+    (" ! [rejected]        main -> main (non-fast-forward)", 1),
+])
+def test_network_retries_only_transient_failures(git_ops, stderr, attempts):
+    calls = []
+
+    def fake_streaming(*args, **kwargs):
+        calls.append(args)
+        return failed(stderr)
+
+    git_ops.RETRY_BASE_DELAY = 0
+    git_ops._run_streaming = fake_streaming
+    git_ops._run_network(["git", "fetch"])
+    assert len(calls) == attempts == git_ops.last_failure.attempts
+
+
+def test_stalled_command_is_stopped(git_ops):
+    git_ops.TIMEOUT_POLICIES = {**git_ops.TIMEOUT_POLICIES, "network": (60, 0.5)}
+    git_ops.RETRY_BASE_DELAY = 0
+    start = time.monotonic()
+    result = git_ops._run_network([sys.executable, "-c", "import time; time.sleep(5)"])
+    assert result is None
+    assert time.monotonic() - start < 4
+    assert git_ops.last_outcome == "stall"
+    assert git_ops.last_failure.kind == "timeout"
+    assert git_ops.last_failure.attempts == git_ops.RETRY_ATTEMPTS
@@ -0,0 +1,84 @@
+"""GitDirReader：不启动 git 直接读取 .git 的结果须与 git 命令一致"""
+
+from conftest import git
+from sync_core import GitDirReader
+
+
+def rev_parse(repo, name):
+    return git(repo, "rev-parse", name).strip()
+
+
+def test_symbolic_head(repo):
+    reader = GitDirReader(repo)
+    assert reader.read_symbolic_ref("HEAD") == "refs/heads/main"
+    assert reader.current_branch() == "main"
+    assert reader.resolve_ref("HEAD") == rev_parse(repo, "HEAD")
+
+
+def test_detached_head(repo):
+    git(repo, "checkout", "-q", "--detach")
+    reader = GitDirReader(repo)
+    assert reader.read_symbolic_ref("HEAD") == ""
+    assert reader.current_branch() == ""
+    assert reader.resolve_ref("HEAD") == rev_parse(repo, "HEAD")
+
+
+def test_packed_refs_only(repo):
+    git(repo, "branch", "feature")
+    git(repo, "pack-refs", "--all")
+    assert not (repo / ".git" / "refs" / "heads" / "main").exists()
+    reader = GitDirReader(repo)
+    assert reader.resolve_ref("refs/heads/feature") == rev_parse(repo, "feature")
+    assert reader.resolve_ref("HEAD") == rev_parse(repo, "HEAD")
+    assert reader.resolve_ref("refs/heads/missing") is None
+
+
+def test_linked_worktree(repo):
+    worktree = repo.parent / "linked"
+    git(repo, "worktree", "add", "-q", "-b", "feature", str(worktree))
+    (worktree / "new.txt").write_text("x\n")
+    git(worktree, "add", "new.txt")
+    git(worktree, "commit", "-q", "-m", "on feature")
+
+    reader = GitDirReader(worktree)
+    assert (worktree / ".git").is_file()
+    assert reader.work_tree == worktree.resolve()
+    assert reader.git_dir == (repo / ".git" / "worktrees" / "linked").resolve()
+    assert reader.common_dir == (repo / ".git").resolve()
+    assert reader.current_branch() == "feature"
+    assert reader.resolve_ref("HEAD") == rev_parse(worktree, "HEAD")
+    # 主工作区的 HEAD 不受影响
+    assert GitDirReader(repo).current_branch() == "main"
+
+
+def test_upstream_ref(repo):
+    assert GitDirReader(repo).upstream_ref("main") == ""
+    remote = repo.parent / "origin.git"
+    git(repo.parent, "init", "-q", "--bare", str(remote))
+    git(repo, "remote", "add", "origin", str(remote))
+    git(repo, "push", "-q", "-u", "origin", "main")
+    reader = GitDirReader(repo)
+    assert reader.upstream_ref("main") == "refs/remotes/origin/main"
+    assert reader.has_upstream("main") is True
+    git(repo, "config", "branch.main.merge", "refs/heads/other")
+    assert GitDirReader(repo).has_upstream("main") is False
+
+
+def test_remote_url_respects_global_config(repo, tmp_path, monkeypatch):
+    git(repo, "remote", "add", "origin", "https://example.com/repo.git")
+    assert GitDirReader(repo).remote_url() == "https://example.com/repo.git"
+
+    # conftest 已将 GIT_CONFIG_GLOBAL 指向该文件
+    global_config = tmp_path / "gitconfig"
+    global_config.write_text('[url "git@example.com:"]\n\tinsteadOf = https://example.com/\n')
+    assert GitDirReader(repo).remote_url() is None
+
+    included = tmp_path / "included"
+    included.write_text('[url "git@example.com:"]\n\tinsteadOf = https://example.com/\n')
+    global_config.write_text(f"[include]\n\tpath = {included}\n")
+    assert GitDirReader(repo).remote_url() is None
+
+    global_config.write_text("[user]\n\tname = Test\n")
+    assert GitDirReader(repo).remote_url() == "https://example.com/repo.git"
+    monkeypatch.setenv("GIT_CONFIG_COUNT", "1")
+    assert GitDirReader(repo).remote_url() is None
@@ -0,0 +1,43 @@
+"""导入 sync / sync_core / sync_cli 与命令行模式不加载 Streamlit"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def blocked_streamlit(tmp_path):
+    """PYTHONPATH 最前面放一个导入即失败的 streamlit 包，任何导入尝试都会暴露出来"""
+    package = tmp_path / "blocked" / "streamlit"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text('raise ImportError("streamlit must not be imported")\n')
+    return f"{package.parent}{os.pathsep}{ROOT}"
+
+
+def run_python(pythonpath, *args, cwd=ROOT):
+    env = {**os.environ, "PYTHONPATH": pythonpath}
+    return subprocess.run([sys.executable, *args], cwd=cwd, env=env, capture_output=True, text=True, timeout=60)
+
+
+def test_import_without_streamlit(blocked_streamlit):
+    code = (
+        "import sys\n"
+        "import sync, sync_core, sync_cli\n"
+        "assert sync.GitOperations is sync_core.GitOperations\n"
+        "assert not hasattr(sync, 'no_such_name')\n"
+        "assert 'streamlit' not in sys.modules, 'streamlit imported'\n"
+        "assert 'sync_ui' not in sys.modules, 'sync_ui imported'\n"
+    )
+    result = run_python(blocked_streamlit, "-c", code)
+    assert result.returncode == 0, result.stderr
+
+
+def test_cli_entry_without_streamlit(blocked_streamlit, repo):
+    result = run_python(blocked_streamlit, str(ROOT / "sync.py"), "status", "-C", str(repo), "--json")
+    assert result.returncode == 0, result.stderr
+    assert '"branch": "main"' in result.stdout
@@ -0,0 +1,60 @@
+"""依赖清单模式匹配与拉取带来的清单变更"""
+
+from conftest import git
+from sync_core import compile_globs, match_manifests
+
+
+def test_default_patterns_match_in_any_directory():
+    paths = ["package.json", "web/package.json", "requirements.txt", "requirements-dev.txt",
+             "services/api/go.mod", "package.json.bak", "src/main.py", "docs/requirements/index.md"]
+    assert match_manifests(paths) == ["package.json", "web/package.json", "requirements.txt",
+                                      "requirements-dev.txt", "services/api/go.mod"]
+
+
+def test_pattern_with_slash_is_anchored():
+    patterns = ["config/app.yaml"]
+    assert match_manifests(["config/app.yaml", "sub/config/app.yaml"], patterns) == ["config/app.yaml"]
+    assert match_manifests(["config/app.yaml"], ["/config/app.yaml"]) == ["config/app.yaml"]
+
+
+def test_wildcards_do_not_cross_directories():
+    assert match_manifests(["a.lock", "dir/a.lock"], ["/*.lock"]) == ["a.lock"]
+    assert match_manifests(["tools/x/setup.cfg", "setup.cfg", "tools/setup.cfg"],
+                           ["tools/**/setup.cfg"]) == ["tools/x/setup.cfg", "tools/setup.cfg"]
+    assert match_manifests(["env/a.txt", "env/b/c.txt"], ["env/**"]) == ["env/a.txt", "env/b/c.txt"]
+
+
+def test_character_classes_and_question_mark():
+    patterns = ["req[0-9].txt", "lock[!a-z].json", "v?.toml"]
+    paths = ["req1.txt", "reqa.txt", "lock1.json", "lockb.json", "v2.toml", "v10.toml"]
+    assert match_manifests(paths, patterns) == ["req1.txt", "lock1.json", "v2.toml"]
+
+
+def test_literal_characters_are_escaped():
+    assert match_manifests(["a+b.json", "aab.json"], ["a+b.json"]) == ["a+b.json"]
+
+
+def test_comments_and_blank_patterns_are_ignored():
+    assert compile_globs(("# comment", "  ")) is None
+    assert match_manifests(["package.json"], ["# package.json", ""]) == []
+
+
+def test_manifest_changes_between_commits(repo, git_ops):
+    old = git_ops.get_head_oid()
+    (repo / "web").mkdir()
+    (repo / "web" / "package.json").write_text("{}")
+    (repo / "main.py").write_text("print()")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "add web app")
+    (repo / "requirements.txt").write_text("streamlit\n")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "add requirements")
+    (repo / "web" / "package.json").write_text('{"name": "web"}')
+    git(repo, "commit", "-q", "-am", "name web app")
+    new = git_ops.get_head_oid()
+
+    changes = {change.path: [subject for _, subject in change.commits]
+               for change in git_ops.get_manifest_changes(old, new)}
+    assert changes == {"web/package.json": ["name web app", "add web app"],
+                       "requirements.txt": ["add requirements"]}
+    assert git_ops.get_manifest_changes(new, new) == []
@@ -0,0 +1,71 @@
+"""命令耗时统计：百分位数与 Prometheus 文本格式"""
+
+import pytest
+
+from sync_core import CommandMetrics
+
+
+def make_metrics(durations, command="git status --porcelain=v2"):
+    metrics = CommandMetrics()
+    for wall_s in durations:
+        metrics.record(command, wall_s, returncode=0)
+    return metrics
+
+
+@pytest.mark.parametrize("count, p50, p95", [
+    (1, 1, 1),
+    (2, 1, 2),
+    (10, 5, 10),
+    (20, 10, 19),
+    (60, 30, 57),
+    (100, 50, 95),
+])
+def test_percentiles_nearest_rank(count, p50, p95):
+    # 乱序写入 1..count 秒
+    durations = [float(i) for i in range(count, 0, -1)]
+    row, = make_metrics(durations).summary()
+    assert (row["p50"], row["p95"], row["max"], row["count"]) == (p50, p95, count, count)
+
+
+def test_summary_counts_outcomes_and_sorts_by_p95():
+    metrics = make_metrics([0.1, 0.2])
+    metrics.record(["git", "-C", "repo", "fetch", "origin"], 3.0, returncode=128)
+    metrics.record("git fetch", 5.0, outcome="timeout")
+    rows = metrics.summary()
+    assert [row["command"] for row in rows] == ["fetch", "status"]
+    assert (rows[0]["errors"], rows[0]["timeouts"], rows[0]["count"]) == (1, 1, 2)
+
+
+def test_prometheus_exposition():
+    metrics = make_metrics([0.5, 1.5, 1.0])
+    metrics.record("git push", 2.0, returncode=1)
+    assert metrics.to_prometheus() == "\n".join([
+        "# HELP git_sync_command_duration_seconds Wall time of git commands run by the sync tool.",
+        "# TYPE git_sync_command_duration_seconds summary",
+        'git_sync_command_duration_seconds{command="push",quantile="0.5"} 2.000000',
+        'git_sync_command_duration_seconds{command="push",quantile="0.95"} 2.000000',
+        'git_sync_command_duration_seconds_sum{command="push"} 2.000000',
+        'git_sync_command_duration_seconds_count{command="push"} 1',
+        'git_sync_command_duration_seconds{command="status",quantile="0.5"} 1.000000',
+        'git_sync_command_duration_seconds{command="status",quantile="0.95"} 1.500000',
+        'git_sync_command_duration_seconds_sum{command="status"} 3.000000',
+        'git_sync_command_duration_seconds_count{command="status"} 3',
+        "# HELP git_sync_command_failures_total Failed git commands by outcome.",
+        "# TYPE git_sync_command_failures_total counter",
+        'git_sync_command_failures_total{command="push",outcome="error"} 1',
+        'git_sync_command_failures_total{command="push",outcome="timeout"} 0',
+        'git_sync_command_failures_total{command="push",outcome="exception"} 0',
+        'git_sync_command_failures_total{command="push",outcome="cancelled"} 0',
+        'git_sync_command_failures_total{command="status",outcome="error"} 0',
+        'git_sync_command_failures_total{command="status",outcome="timeout"} 0',
+        'git_sync_command_failures_total{command="status",outcome="exception"} 0',
+        'git_sync_command_failures_total{command="status",outcome="cancelled"} 0',
+    ]) + "\n"
+
+
+def test_textfile_written_atomically(tmp_path):
+    path = tmp_path / "git_sync.prom"
+    metrics = make_metrics([0.25])
+    metrics.write_textfile(str(path))
+    assert path.read_text(encoding="utf-8") == metrics.to_prometheus()
+    assert [p.name for p in tmp_path.iterdir()] == ["git_sync.prom"]
@@ -0,0 +1,77 @@
+"""git --progress 的解析与 \r / \n 混合输出的切分"""
+
+import sys
+
+import pytest
+
+from sync_core import GitProgress
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("remote: Counting objects: 100% (10/10), done.", ("Counting objects", 100, 10, 10, None, None)),
+    ("remote: Compressing objects:  50% (3/6)", ("Compressing objects", 50, 3, 6, None, None)),
+    ("Receiving objects:  42% (420/1000), 1.20 MiB | 2.00 MiB/s",
+     ("Receiving objects", 42, 420, 1000, "1.20 MiB", "2.00 MiB/s")),
+    ("Writing objects: 100% (3/3), 280 bytes | 280.00 KiB/s, done.",
+     ("Writing objects", 100, 3, 3, "280 bytes", "280.00 KiB/s")),
+    ("Resolving deltas: 100% (7/7), done.", ("Resolving deltas", 100, 7, 7, None, None)),
+    ("Receiving objects:  99% (99/100), 3.00 KiB", ("Receiving objects", 99, 99, 100, "3.00 KiB", None)),
+])
+def test_parse_progress(line, expected):
+    progress = GitProgress.parse(line)
+    assert (progress.phase, progress.percent, progress.current, progress.total,
+            progress.transferred, progress.rate) == expected
+
+
+@pytest.mark.parametrize("line", [
+    "remote: Enumerating objects: 5, done.",
+    "From https://example.com/repo",
+    "Already up to date.",
+    "",
+])
+def test_parse_non_progress(line):
+    assert GitProgress.parse(line) is None
+
+
+def test_describe():
+    progress = GitProgress.parse("Receiving objects:  42% (420/1000), 1.20 MiB | 2.00 MiB/s")
+    assert progress.describe() == "Receiving objects 420/1000 · 1.20 MiB · 2.00 MiB/s"
+
+
+# 分块写入：进度行以 \r 覆盖、普通行以 \n 结束，块边界落在行中间和多字节字符中间
+CHUNKS = [
+    b"remote: Enumerating objects: 5, done.\n",
+    b"Receiving objects:  50% (1/2)\r",
+    b"Receiving objects: 100% (2/2), 1.20 MiB | 2.00 MiB/s, done.\nResolving",
+    b" deltas: 100% (3/3), done.\n\xe4\xb8",
+    b"\xad\xe6\x96\x87\n",
+]
+SCRIPT = f"""
+import sys, time
+out = sys.stderr.buffer
+for chunk in {CHUNKS!r}:
+    out.write(chunk)
+    out.flush()
+    time.sleep(0.05)
+print("done")
+"""
+
+
+def test_pump_splits_mixed_line_endings(git_ops):
+    lines, progress = [], []
+    result = git_ops._stream_command([sys.executable, "-c", SCRIPT],
+                                     on_line=lambda name, line: lines.append((name, line)),
+                                     on_progress=progress.append, timeout=30)
+    assert result.returncode == 0
+    assert [(p.phase, p.percent) for p in progress] == [
+        ("Receiving objects", 50), ("Receiving objects", 100), ("Resolving deltas", 100)]
+    # 被覆盖的中间进度只更新进度条，不写入输出
+    stderr_lines = [line for name, line in lines if name == "stderr"]
+    assert stderr_lines == [
+        "remote: Enumerating objects: 5, done.",
+        "Receiving objects: 100% (2/2), 1.20 MiB | 2.00 MiB/s, done.",
+        "Resolving deltas: 100% (3/3), done.",
+        "中文",
+    ]
+    assert result.stderr == "\n".join(stderr_lines)
+    assert ("stdout", "done") in lines
@@ -0,0 +1,79 @@
+"""状态快照解析与分批暂存"""
+
+from conftest import git
+from sync_core import RepoSnapshot
+
+OID = "0123456789abcdef0123456789abcdef01234567"
+MODES = "100644 100644 100644"
+
+# git status --porcelain=v2 --branch -z 的输出
+PORCELAIN_V2 = '\0'.join([
+    f"# branch.oid {OID}",
+    "# branch.head main",
+    "# branch.upstream origin/main",
+    "# branch.ab +2 -1",
+    f"1 .M N... {MODES} {OID} {OID} a.txt",
+    f"1 A. N... 000000 100644 100644 {'0' * 40} {OID} dir/with space.txt",
+    f"2 R. N... {MODES} {OID} {OID} R100 new name.py",
+    "old name.py",
+    f"u UU N... {MODES} 100644 {OID} {OID} {OID} conflict.txt",
+    "? untracked/",
+    "? notes.txt",
+    "",
+])
+
+
+def test_snapshot_parses_branch_headers():
+    snapshot = RepoSnapshot.parse(PORCELAIN_V2)
+    assert snapshot.valid
+    assert (snapshot.oid, snapshot.branch, snapshot.upstream) == (OID, "main", "origin/main")
+    assert (snapshot.ahead, snapshot.behind) == (2, 1)
+    assert snapshot.has_upstream
+
+
+def test_snapshot_parses_entries():
+    entries = RepoSnapshot.parse(PORCELAIN_V2).entries
+    assert [(entry.xy, entry.path, entry.orig_path) for entry in entries] == [
+        (" M", "a.txt", None),
+        ("A ", "dir/with space.txt", None),
+        ("R ", "new name.py", "old name.py"),
+        ("UU", "conflict.txt", None),
+        ("??", "untracked/", None),
+        ("??", "notes.txt", None),
+    ]
+
+
+def test_snapshot_status_lines_match_porcelain_v1():
+    lines = RepoSnapshot.parse(PORCELAIN_V2).status_lines()
+    assert lines[0] == " M a.txt"
+    assert lines[2] == "R  old name.py -> new name.py"
+
+
+def test_snapshot_initial_and_detached():
+    snapshot = RepoSnapshot.parse("# branch.oid (initial)\0# branch.head (detached)\0")
+    assert snapshot.oid is None
+    assert snapshot.branch == ""
+    assert not snapshot.has_upstream
+    assert snapshot.entries == []
+
+
+def test_stage_paths_in_chunks(repo, git_ops):
+    names = [f"file{i}.txt" for i in range(5)]
+    for name in names:
+        (repo / name).write_text(name)
+    assert git_ops.stage_paths(chunk_size=2)
+    assert git(repo, "diff", "--cached", "--name-only").split() == names
+    assert sum(">>> git add" in item[1] for item in git_ops.console_output) == 3
+
+
+def test_stage_paths_are_literal(repo, git_ops):
+    (repo / "a[1].txt").write_text("glob")
+    (repo / "a1.txt").write_text("plain")
+    assert git_ops.stage_paths(["a[1].txt"])
+    assert git(repo, "diff", "--cached", "--name-only").split() == ["a[1].txt"]
+
+
+def test_stage_paths_records_deletions(repo, git_ops):
+    (repo / "README.md").unlink()
+    assert git_ops.stage_paths()
+    assert git(repo, "status", "--porcelain").splitlines() == ["D  README.md"]
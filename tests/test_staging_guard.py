@@ -0,0 +1,145 @@
+"""暂存前的大文件与构建产物检查"""
+
+import os
+
+from conftest import git
+from sync_core import ArtifactMatcher, FileSizeIndex, GitOperations, StagingHit, StagingScan
+
+LIMIT = 1000
+
+
+def staged(repo):
+    return sorted(git(repo, "diff", "--cached", "--name-only").split('\n')[:-1])
+
+
+def test_artifact_directory_patterns():
+    matcher = ArtifactMatcher()
+    assert matcher.match("web/node_modules/react/index.js") == ("web/node_modules/", "**/node_modules/**")
+    # 嵌套时报告最外层的目录
+    assert matcher.match("node_modules/a/node_modules/b.js") == ("node_modules/", "**/node_modules/**")
+    assert matcher.match("dist/") == ("dist/", "dist/**")
+    assert matcher.match("dist/app.js") == ("dist/", "dist/**")
+    # 含 / 的目录模式从仓库根目录匹配
+    assert matcher.match("src/dist/app.js") is None
+    assert matcher.match("distribution/app.js") is None
+
+
+def test_artifact_file_patterns_match_basename():
+    matcher = ArtifactMatcher()
+    assert matcher.match("logs/server.log") == ("logs/server.log", "*.log")
+    assert matcher.match("release/app.tar.gz") == ("release/app.tar.gz", "*.tar.gz")
+    assert matcher.match("src/catalog.py") is None
+    assert ArtifactMatcher(["assets/*.psd", "# *.py"]).match("assets/logo.psd") == ("assets/logo.psd", "assets/*.psd")
+    assert ArtifactMatcher(["assets/*.psd", "# *.py"]).match("main.py") is None
+
+
+def test_size_index_reuses_unchanged_entries(tmp_path):
+    (tmp_path / "text.txt").write_text("hello")
+    (tmp_path / "blob.bin").write_bytes(b"\0" * 10)
+    index = FileSizeIndex(tmp_path / "index.json")
+    assert index.lookup(tmp_path, ["text.txt", "blob.bin", "missing", "."]) == {
+        "text.txt": (5, False), "blob.bin": (10, True)}
+
+    # mtime 与大小不变时使用记录，不重新读取内容
+    index.entries["text.txt"][2] = True
+    assert index.lookup(tmp_path, ["text.txt"]) == {"text.txt": (5, True)}
+    (tmp_path / "text.txt").write_text("hello world")
+    assert index.lookup(tmp_path, ["text.txt"]) == {"text.txt": (11, False)}
+
+
+def test_size_index_persists_and_prunes(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).write_text(name)
+    path = tmp_path / "index.json"
+    index = FileSizeIndex(path)
+    index.lookup(tmp_path, ["a", "b"])
+    index.save(keep={"a"})
+    assert set(FileSizeIndex(path).entries) == {"a"}
+
+    path.write_text("not json")
+    assert FileSizeIndex(path).entries == {}
+
+
+def test_scan_lists():
+    scan = StagingScan(
+        valid=True,
+        candidates=["src/main.py", "big.bin", "assets/", "node_modules/"],
+        indexed={"staged.iso": None, "moved.bin": "orig.bin", "ok.txt": None},
+        expanded={"assets/": ["assets/logo.png", "assets/video.mp4"]},
+        hits=[StagingHit("staged.iso", size=5000, pattern="*.iso", oversized=True),
+              StagingHit("big.bin", size=3000, oversized=True),
+              StagingHit("assets/video.mp4", size=2000, oversized=True),
+              StagingHit("node_modules/", size=None, files=0, pattern="**/node_modules/**")],
+    )
+    skip, lfs = scan.plan()
+    assert skip == ["staged.iso", "big.bin", "assets/video.mp4", "node_modules/"] and lfs == []
+    assert scan.plan("lfs", keep=["big.bin"]) == (["node_modules/"], ["staged.iso", "assets/video.mp4"])
+    assert scan.plan("include") == ([], [])
+
+    # 目录中有文件被跳过时展开为其余文件，否则保留目录本身
+    assert scan.stage_list(skip) == ["src/main.py", "assets/logo.png"]
+    assert scan.stage_list(["node_modules/"]) == ["src/main.py", "big.bin", "assets/"]
+    assert scan.stage_list() == scan.candidates
+    assert scan.unstage_list(skip) == ["staged.iso"]
+    assert scan.unstage_list(["moved.bin"]) == ["moved.bin", "orig.bin"]
+    assert scan.commit_list(skip) == ["src/main.py", "assets/logo.png", "moved.bin", "ok.txt"]
+
+
+def test_scan_and_stage_in_repo(repo, git_ops):
+    (repo / "main.py").write_text("print()\n")
+    (repo / "big.bin").write_bytes(os.urandom(LIMIT + 1))
+    (repo / "node_modules" / "pkg").mkdir(parents=True)
+    (repo / "node_modules" / "pkg" / "index.js").write_text("")
+    (repo / "assets").mkdir()
+    (repo / "assets" / "logo.svg").write_text("<svg/>")
+    (repo / "assets" / "video.mp4").write_bytes(b"x" * (LIMIT * 2))
+    (repo / "server.log").write_text("log\n")
+    # 事先手动暂存的大文件同样要检查
+    (repo / "staged.dat").write_bytes(b"y" * (LIMIT * 3))
+    git(repo, "add", "staged.dat")
+
+    scan = git_ops.scan_staging_candidates(max_size=LIMIT)
+    assert scan.valid
+    assert sorted(scan.indexed) == ["staged.dat"]
+    assert scan.expanded == {"assets/": ["assets/logo.svg", "assets/video.mp4"]}
+    assert [(hit.path, hit.oversized, hit.binary, hit.pattern) for hit in scan.hits] == [
+        ("staged.dat", True, False, None),
+        ("assets/video.mp4", True, False, None),
+        ("big.bin", True, True, None),
+        ("server.log", False, False, "*.log"),
+        ("node_modules/", False, False, "**/node_modules/**"),
+    ]
+
+    skip, _ = scan.plan(keep=["server.log"])
+    assert git_ops.stage_scanned(scan, skip=skip)
+    assert staged(repo) == ["assets/logo.svg", "main.py", "server.log"]
+    assert (repo / "staged.dat").exists()
+
+
+def test_scan_skips_lfs_tracked_files(repo, git_ops):
+    (repo / ".gitattributes").write_text("*.psd filter=lfs diff=lfs merge=lfs -text\n")
+    (repo / "art.psd").write_bytes(b"z" * (LIMIT + 1))
+    assert [hit.path for hit in git_ops.scan_staging_candidates(max_size=LIMIT).hits] == []
+
+
+def test_scan_saves_size_index(repo, git_ops):
+    (repo / "big.bin").write_bytes(b"x" * (LIMIT + 1))
+    git_ops.scan_staging_candidates(max_size=LIMIT)
+    saved = FileSizeIndex(repo / ".git" / "sync-tool" / "size-index.json")
+    assert saved.entries["big.bin"][1:] == [LIMIT + 1, False]
+
+
+def test_unstage_without_commits(tmp_path, repo):
+    # repo 夹具只用于隔离 git 配置，这里另建一个尚无提交的仓库
+    unborn = tmp_path / "unborn"
+    unborn.mkdir()
+    git(unborn, "init", "-q")
+    (unborn / "a.txt").write_text("a")
+    (unborn / "big.bin").write_bytes(b"x" * (LIMIT + 1))
+    git(unborn, "add", ".")
+
+    git_ops = GitOperations(unborn)
+    scan = git_ops.scan_staging_candidates(max_size=LIMIT)
+    assert sorted(scan.indexed) == ["a.txt", "big.bin"]
+    assert git_ops.stage_scanned(scan, skip=scan.plan()[0])
+    assert staged(unborn) == ["a.txt"]
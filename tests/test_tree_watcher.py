@@ -0,0 +1,70 @@
+"""TreeWatcher 轮询后端：工作区变化使 generation 增加，.git 内部的无关变化被忽略"""
+
+import time
+
+import pytest
+
+from conftest import git
+from sync_core import TreeWatcher
+
+POLL_INTERVAL = 0.05
+
+
+@pytest.fixture
+def watcher(repo):
+    watcher = TreeWatcher(repo, poll_interval=POLL_INTERVAL)
+    watcher._run = watcher._run_polling
+    watcher.start()
+    wait_for(lambda: watcher.ready)
+    yield watcher
+    watcher.stop()
+    watcher._thread.join(5)
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(POLL_INTERVAL / 2)
+
+
+def settle():
+    """等待若干个轮询周期"""
+    time.sleep(POLL_INTERVAL * 6)
+
+
+def assert_bumps(watcher, change, tree=True):
+    generation, tree_generation = watcher.generation, watcher.tree_generation
+    change()
+    wait_for(lambda: watcher.generation > generation)
+    assert (watcher.tree_generation > tree_generation) is tree
+
+
+def test_polling_backend_selected(watcher):
+    assert watcher.backend == "polling"
+
+
+def test_modify_create_delete(watcher, repo):
+    assert_bumps(watcher, lambda: (repo / "README.md").write_text("changed\n"))
+    assert_bumps(watcher, lambda: (repo / "new.txt").write_text("new\n"))
+    (repo / "sub").mkdir()
+    settle()
+    assert_bumps(watcher, lambda: (repo / "sub" / "deep.txt").write_text("deep\n"))
+    assert_bumps(watcher, lambda: (repo / "new.txt").unlink())
+
+
+def test_git_internal_churn_ignored(watcher, repo):
+    generation = watcher.generation
+    (repo / ".git" / "description").write_text("churn\n")
+    (repo / ".git" / "index.lock").write_text("")
+    (repo / ".git" / "index.lock").unlink()
+    git(repo, "hash-object", "-w", "--stdin", input="object\n")
+    settle()
+    assert watcher.generation == generation
+
+
+def test_ref_and_index_updates_are_not_tree_changes(watcher, repo):
+    assert_bumps(watcher, lambda: git(repo, "branch", "feature"), tree=False)
+    (repo / "README.md").write_text("staged\n")
+    settle()
+    assert_bumps(watcher, lambda: git(repo, "add", "README.md"), tree=False)